@@ -3,10 +3,8 @@ import yfinance as yf
 import pandas as pd
 import numpy as np
 import plotly.graph_objects as go
-import pandas_ta as ta
-from keras.models import Sequential
-from keras.layers import Dense, LSTM
-from sklearn.preprocessing import MinMaxScaler
+import os
+import time
 import warnings
 from sklearn.exceptions import InconsistentVersionWarning
 from datetime import timedelta
@@ -15,6 +13,21 @@ import datetime
 import plotly.express as px
 import matplotlib.pyplot as plt 
 from matplotlib.dates import DateFormatter# Add this import statement
+from price_matrix import DEFAULT_MATRIX_DIR, PriceMatrix
+from price_store import PriceStore
+from rolling_stats import RollingStatsStore
+from session_datasets import SessionDatasets
+from stock_dataset import DEFAULT_DATASET_DIR, write_dataset
+from fundamentals_cache import FundamentalsCache
+from gbr_models import predict_gbr
+from indicator_pipeline import IndicatorCache
+from job_queue import DONE, FAILED, JobQueue, download_prices_job, train_lstm_job
+from backtest import equity_curves
+from forecast import FORECAST_MODES, forecast_watchlist
+from global_model import GLOBAL_TICKER, forecast_global, predict_holdout_global
+from lstm_model import DEFAULT_PROFILE, TRAINING_PROFILES, predict_holdout
+from model_registry import ModelRegistry
+from screener import DEFAULT_LOOKBACK_DAYS, FILTERS, load_universe, run_screener
 
 # Set up the yfinance override
 yf.pdr_override()
@@ -26,30 +39,135 @@ plt.style.use("fivethirtyeight")
 # Suppress specific warnings
 warnings.filterwarnings("ignore", category=InconsistentVersionWarning)
 
+# Shared on-disk price cache (one instance per server process, shared by all sessions)
+@st.cache_resource
+def get_price_store():
+    return PriceStore()
+
+# Memory-mapped price matrix of the universe (built with `python price_matrix.py`), re-opened after a rebuild
+@st.cache_resource
+def open_price_matrix(built_at):
+    return PriceMatrix()
+
+# Function to return the price matrix, or None if it has not been built
+def get_price_matrix():
+    if not PriceMatrix.exists():
+        return None
+    return open_price_matrix(os.path.getmtime(os.path.join(DEFAULT_MATRIX_DIR, 'index.json')))
+
+# Precomputed rolling statistics (moving averages, %K low/high, RSI averages) kept next to the price store
+@st.cache_resource
+def get_rolling_stats():
+    return RollingStatsStore(get_price_store())
+
+# Shared fundamentals/holders cache with per-dataset time-to-live
+@st.cache_resource
+def get_fundamentals_cache():
+    return FundamentalsCache()
+
+# Registry of trained LSTM models (weights + scaler), loaded lazily for inference
+@st.cache_resource
+def get_model_registry():
+    return ModelRegistry()
+
+# Pool of worker processes for model training and downloads (shared by all sessions)
+@st.cache_resource
+def get_job_queue():
+    return JobQueue()
+
+# Number of past days fed to the LSTM
+PREDICTION_WINDOW = 60
+
+# Seconds between re-runs of the script while background jobs of the session are running
+JOB_POLL_SECONDS = 1
+
+# Background jobs that this script run is waiting for (see wait_for_job)
+st.session_state['pending_jobs'] = set()
+
+# Function to show the progress of a background job; returns its result once it has finished, else None
+def wait_for_job(job_id, label):
+    job = get_job_queue().get(job_id)
+    if job is None:
+        st.warning(f"{label}: the job has expired, please start it again.")
+        return None
+    if job.status == FAILED:
+        st.error(f"{label} failed: {job.error.splitlines()[0]}")
+        return None
+    if job.status == DONE:
+        return job.result()
+    st.progress(job.progress, text=f"{label}: {job.message or 'queued'}")
+    st.session_state['pending_jobs'].add(job_id)
+    return None
+
+# Function to load price history through the local price store
+def load_price_history(ticker, start_date, end_date):
+    return get_price_store().get(ticker, start_date, end_date)
+
+# Function to load the OHLCV bars of a ticker with indicator columns, each computed once per
+# session, date range and stored data version; all chart views read this shared frame
+def load_indicator_frame(ticker, start_date, end_date, indicators):
+    if 'indicator_cache' not in st.session_state:
+        st.session_state['indicator_cache'] = IndicatorCache()
+    last_bar = get_price_store().last_bar(ticker)
+    key = (ticker, str(start_date), str(end_date), None if last_bar is None else last_bar['Date'])
+    return st.session_state['indicator_cache'].get(key, lambda: load_bars_with_rolling_stats(ticker, start_date, end_date), indicators)
+
+# Function to load price history joined with the precomputed rolling columns (updated only for new bars),
+# which the indicator pipeline then does not recompute; like the EMA and ADL columns computed from the
+# loaded range, they start with a warm-up inside [start_date, end_date) and use no earlier bars
+def load_bars_with_rolling_stats(ticker, start_date, end_date):
+    df = load_price_history(ticker, start_date, end_date)
+    return df.join(get_rolling_stats().get(ticker, start_date, end_date))
+
+# Function to load several tickers as one aligned (ticker x field) frame in a batched fetch
+def load_price_panel(tickers, start_date, end_date):
+    return get_price_store().get_many(tickers, start_date, end_date)
+
 # Function to download and preprocess stock data
-def download_and_preprocess_data(tickers, start_date, end_date):
+def download_and_preprocess_data(tickers, start_date, end_date, incremental=False):
     company_list = []
     company_names = []
 
+    if incremental:
+        for ticker in tickers:
+            get_price_store().refresh(ticker)  # Only request bars newer than the last stored one
+    panel = load_price_panel(tickers, start_date, end_date)  # One batched fetch for all tickers
+
     for ticker in tickers:
-        data = yf.download(ticker, start=start_date, end=end_date)
+        data = panel[ticker].dropna(how='all').copy()  # Date index is already datetime and sorted
         data.ffill(inplace=True)  # Forward fill to handle missing data
-        data.reset_index(inplace=True)  # Reset index to ensure consistent date format
-        data['Date'] = pd.to_datetime(data['Date'])  # Ensure 'Date' column is in datetime format
-        data.set_index('Date', inplace=True)  # Set 'Date' as index again
         data["company_name"] = ticker  # Add company name column
         company_list.append(data)
         company_names.append(ticker)
 
     return company_list, company_names
 
-# Function to concatenate data into a single DataFrame
-def concatenate_and_save_data(company_list, filename='stock_data.csv'):
+# Downloaded frames of this session, kept in memory across script re-runs (LRU, bounded in bytes)
+def get_session_datasets():
+    if 'datasets' not in st.session_state:
+        st.session_state['datasets'] = SessionDatasets()
+    return st.session_state['datasets']
+
+# Function to return the preprocessed frames of (ticker, start, end) keys from the session, reading
+# frames that were evicted back from the local price store
+def get_company_list(company_keys):
+    datasets = get_session_datasets()
+    company_list = []
+    for key in company_keys:
+        data = datasets.get(key)
+        if data is None:
+            ticker, start, end = key
+            data = download_and_preprocess_data([ticker], start, end)[0][0]
+            datasets.put(key, data)
+        company_list.append(data)
+    return company_list
+
+# Function to save the per-ticker frames to the partitioned dataset (ticker/year parquet files, date order kept)
+# and return them as one frame sorted by date
+def concatenate_and_save_data(company_list, dataset_dir=DEFAULT_DATASET_DIR):
+    write_dataset(company_list, dataset_dir)
     df = pd.concat(company_list, axis=0)
-    df = df.sample(frac=1).reset_index(drop=True)  # Shuffle the data
-    df = df.fillna(method='ffill')  # Forward fill missing values
-    df.to_csv(filename, index=False)  # Save to CSV
-    return df
+    return df.sort_index(kind='stable')  # Rows of the same day stay in ticker order
 
 
 # Provide the path to the style.css file
@@ -66,7 +184,7 @@ popular_tickers = ['AAPL', 'META', 'NVDA', 'NFLX']
 
 # Stock tickers combo box
 st.sidebar.subheader("STOCK SEEKER WEB APP")
-selected_stocks = st.sidebar.multiselect("Select stock tickers...", popular_tickers)
+selected_stocks = st.sidebar.multiselect("Select stock tickers...", sorted(set(popular_tickers) | set(get_price_store().tickers())))
 
 # Date range selection
 start_date = st.sidebar.date_input("Start Date", datetime.datetime(2020, 1, 1))
@@ -87,23 +205,57 @@ selected_options = {
     "Predicted Prices": st.sidebar.checkbox("Predicted Prices")  # Add Predicted Prices option
 }
 
+# Model used for predicted prices (the shipped gradient boosting models are the fast default)
+prediction_model = st.sidebar.selectbox("Prediction Model", ["Gradient Boosting (fast)", "LSTM", "Global LSTM (all tickers)"])
+training_profile = st.sidebar.selectbox("LSTM Training Profile", list(TRAINING_PROFILES), index=list(TRAINING_PROFILES).index(DEFAULT_PROFILE))
+forecast_horizon = st.sidebar.number_input("Forecast Horizon (days past End Date)", min_value=0, max_value=90, value=0)
+forecast_mode = st.sidebar.selectbox("Forecast Mode", FORECAST_MODES)
+
 # Submit button
 button_clicked = st.sidebar.button("Analyze")
 
 # Summary button
 summary_clicked = st.sidebar.button("OsTron")
+transaction_cost_bps = st.sidebar.number_input("Signal backtest cost (bps per trade)", min_value=0.0, max_value=100.0, value=10.0)
+
+# Screener over every ticker in the local price store (or the selected ones)
+screener_universe = st.sidebar.selectbox("Screener Universe", ["All stored tickers", "Selected tickers"])
+screener_filters = st.sidebar.multiselect("Screens", list(FILTERS), default=["All"])
+screener_clicked = st.sidebar.button("Screen")
+
+# Incremental refresh of stored price history
+incremental_refresh = st.sidebar.checkbox("Incremental refresh (new bars only)")
 
 # Button to download and preprocess data
-if st.sidebar.button("Download and Preprocess Data"):
-    company_list, company_names = download_and_preprocess_data(selected_stocks, start_date, end_date)
-    st.write("Data downloaded and preprocessed successfully!")
+download_clicked = st.sidebar.button("Download and Preprocess Data")
+
+# Keep showing the last requested view while its background jobs run (the script re-runs to poll them)
+for view, clicked in (('analyze', button_clicked), ('summary', summary_clicked), ('download', download_clicked)):
+    if clicked:
+        st.session_state['resume_view'] = view
+resume_view = st.session_state.get('resume_view')
+
+# The download runs as a background job, so the page stays responsive
+if download_clicked:
+    st.session_state['download_job'] = (get_job_queue().submit(download_prices_job, (list(selected_stocks), start_date, end_date, incremental_refresh),
+                                                               name="Download", force=True), list(selected_stocks), str(start_date), str(end_date))
+if resume_view == 'download':
+    download_job, download_tickers, download_start, download_end = st.session_state['download_job']
+    if wait_for_job(download_job, "Downloading price data") is not None:
+        company_list, company_names = download_and_preprocess_data(download_tickers, download_start, download_end)  # Read back from the price store
+        datasets = get_session_datasets()
+        st.session_state['company_keys'] = [(ticker, download_start, download_end) for ticker in company_names]
+        for key, data in zip(st.session_state['company_keys'], company_list):
+            datasets.put(key, data)
+        st.write("Data downloaded and preprocessed successfully!")
+        st.caption(f"{len(datasets)} datasets kept for this session ({datasets.nbytes / 1024 ** 2:.1f} MB)")
 
 # Button to concatenate and save data
 if st.sidebar.button("Concatenate and Save Data"):
-    if 'company_list' in locals():
-        df = concatenate_and_save_data(company_list)
-        st.write("Data concatenated and saved to CSV successfully!")
-        st.write(df.tail(10))  # Display the last 10 rows of the shuffled dataframe
+    if st.session_state.get('company_keys'):
+        df = concatenate_and_save_data(get_company_list(st.session_state['company_keys']))  # Already-loaded frames, no download
+        st.write(f"Data concatenated and saved to {DEFAULT_DATASET_DIR} successfully!")
+        st.write(df.tail(10))  # Display the last 10 rows (latest dates)
     else:
         st.write("Please download and preprocess data first.")
          
@@ -117,8 +269,7 @@ def handle_analysis(selected_stock, analysis_type, start_date, end_date):
 
 # Function to display stock analysis
 def display_stock_analysis(selected_stock, analysis_type, start_date, end_date):
-    stock_data = yf.Ticker(selected_stock)
-    stock_df = stock_data.history(period='1d', start=start_date, end=end_date)
+    stock_df = load_price_history(selected_stock, start_date, end_date)
     st.subheader(f"{selected_stock} - {analysis_type}")
 
     if analysis_type == "Closing Prices":
@@ -134,8 +285,7 @@ def display_stock_analysis(selected_stock, analysis_type, start_date, end_date):
         st.plotly_chart(fig)
         
     elif analysis_type == "Moving Averages":
-        stock_df['MA20'] = stock_df['Close'].rolling(window=20).mean()
-        stock_df['MA50'] = stock_df['Close'].rolling(window=50).mean()
+        stock_df = load_indicator_frame(selected_stock, start_date, end_date, ['MA20', 'MA50'])  # Precomputed columns
         fig = go.Figure()
         fig.add_trace(go.Scatter(x=stock_df.index, y=stock_df['Close'], mode='lines', name='Close'))
         fig.add_trace(go.Scatter(x=stock_df.index, y=stock_df['MA20'], mode='lines', name='20-Day MA'))
@@ -153,7 +303,7 @@ def display_stock_analysis(selected_stock, analysis_type, start_date, end_date):
         st.plotly_chart(fig)
         
     elif analysis_type == "Correlation Heatmap":
-        df_selected_stocks = yf.download(selected_stocks, start=start_date, end=end_date)['Close']
+        df_selected_stocks = load_price_panel(selected_stocks, start_date, end_date).xs('Close', axis=1, level='Price')
         corr = df_selected_stocks.corr()
         fig = px.imshow(corr, title='Correlation Heatmap')
         st.plotly_chart(fig)
@@ -163,45 +313,25 @@ def display_stock_analysis(selected_stock, analysis_type, start_date, end_date):
         fig = px.histogram(stock_df['Daily Change'].dropna(), nbins=50, title='Distribution of Daily Changes')
         st.plotly_chart(fig)
 
+# yf.Ticker dataset behind each "Display Additional Information" option
+ADDITIONAL_INFO_DATASETS = {
+    "Stock Actions": "actions",
+    "Quarterly Financials": "quarterly_financials",
+    "Institutional Shareholders": "institutional_holders",
+    "Quarterly Balance Sheet": "quarterly_balance_sheet",
+    "Quarterly Cashflow": "quarterly_cashflow",
+    "Analysts Recommendation": "recommendations",
+}
+
 # Function to display additional information
 def display_additional_information(selected_stock, selected_options):
     for option, checked in selected_options.items():
         if checked:
             st.subheader(f"{selected_stock} - {option}")
-            if option == "Stock Actions":
-                display_action = yf.Ticker(selected_stock).actions
-                if not display_action.empty:
-                    st.write(display_action)
-                else:
-                    st.write("No data available")
-            elif option == "Quarterly Financials":
-                display_financials = yf.Ticker(selected_stock).quarterly_financials
-                if not display_financials.empty:
-                    st.write(display_financials)
-                else:
-                    st.write("No data available")
-            elif option == "Institutional Shareholders":
-                display_shareholders = yf.Ticker(selected_stock).institutional_holders
-                if not display_shareholders.empty:
-                    st.write(display_shareholders)
-                else:
-                    st.write("No data available")
-            elif option == "Quarterly Balance Sheet":
-                display_balancesheet = yf.Ticker(selected_stock).quarterly_balance_sheet
-                if not display_balancesheet.empty:
-                    st.write(display_balancesheet)
-                else:
-                    st.write("No data available")
-            elif option == "Quarterly Cashflow":
-                display_cashflow = yf.Ticker(selected_stock).quarterly_cashflow
-                if not display_cashflow.empty:
-                    st.write(display_cashflow)
-                else:
-                    st.write("No data available")
-            elif option == "Analysts Recommendation":
-                display_analyst_rec = yf.Ticker(selected_stock).recommendations
-                if not display_analyst_rec.empty:
-                    st.write(display_analyst_rec)
+            if option in ADDITIONAL_INFO_DATASETS:
+                display_data = get_fundamentals_cache().get(selected_stock, ADDITIONAL_INFO_DATASETS[option])
+                if not display_data.empty:
+                    st.write(display_data)
                 else:
                     st.write("No data available")
             elif option == "Predicted Prices":
@@ -211,44 +341,39 @@ def display_additional_information(selected_stock, selected_options):
 def display_predicted_prices(selected_stock, start_date, end_date):
     st.subheader(f"{selected_stock} - Predicted Prices")
     
-    # Download historical data
-    df = yf.download(selected_stock, start=start_date, end=end_date)
+    # Load historical data
+    df = load_price_history(selected_stock, start_date, end_date)
+
+    # Fast path: shipped gradient boosting model, features computed over the whole history
+    if prediction_model == "Gradient Boosting (fast)":
+        gbr_predictions = predict_gbr(selected_stock, df)
+        if gbr_predictions is not None:
+            display_gbr_predictions(selected_stock, df, gbr_predictions)
+            return
+        st.info(f"No gradient boosting model is available for {selected_stock}, using the LSTM instead.")
     
     # Prepare the data
     data = df.filter(['Close'])
     dataset = data.values
     training_data_len = int(np.ceil(len(dataset) * .95))
-    scaler = MinMaxScaler(feature_range=(0, 1))
-    scaled_data = scaler.fit_transform(dataset)
-
-    train_data = scaled_data[0:int(training_data_len), :]
-    x_train, y_train = [], []
-    for i in range(60, len(train_data)):
-        x_train.append(train_data[i-60:i, 0])
-        y_train.append(train_data[i, 0])
-    x_train, y_train = np.array(x_train), np.array(y_train)
-    x_train = np.reshape(x_train, (x_train.shape[0], x_train.shape[1], 1))
-
-    # Build the LSTM model
-    model = Sequential()
-    model.add(LSTM(128, return_sequences=True, input_shape=(x_train.shape[1], 1)))
-    model.add(LSTM(64, return_sequences=False))
-    model.add(Dense(25))
-    model.add(Dense(1))
-    model.compile(optimizer='adam', loss='mean_squared_error')
-    model.fit(x_train, y_train, batch_size=1, epochs=1)
-
-    # Create the testing data set
-    test_data = scaled_data[training_data_len - 60:, :]
-    x_test, y_test = [], dataset[training_data_len:, :]
-    for i in range(60, len(test_data)):
-        x_test.append(test_data[i-60:i, 0])
-    x_test = np.array(x_test)
-    x_test = np.reshape(x_test, (x_test.shape[0], x_test.shape[1], 1))
-
-    # Get the models predicted price values
-    predictions = model.predict(x_test)
-    predictions = scaler.inverse_transform(predictions)
+
+    # Pooled model shared by all tickers: no training run, even for tickers it has never seen
+    global_model = get_global_model() if prediction_model == "Global LSTM (all tickers)" else None
+    if global_model is not None:
+        predictions, _ = predict_holdout_global(global_model, dataset, PREDICTION_WINDOW)
+    else:
+        if prediction_model == "Global LSTM (all tickers)":
+            st.info("No global model has been trained yet (python train_models.py --global), using the per-ticker LSTM instead.")
+        lstm = get_lstm_model(selected_stock, dataset)
+        if lstm is None:
+            return  # Still training in the background; the plot appears once the job has finished
+        model, scaler, report = lstm
+        if report:
+            st.caption(f"Profile '{report['profile']}': {report['epochs']} epochs in {report['train_seconds']:.1f}s, "
+                       f"validation RMSE {report['val_rmse']:.2f}")
+
+        # Get the models predicted price values for the held-out days
+        predictions, _ = predict_holdout(model, scaler, dataset, PREDICTION_WINDOW)
 
     # Plot the data
     train = data[:training_data_len]
@@ -258,71 +383,83 @@ def display_predicted_prices(selected_stock, start_date, end_date):
     fig.add_trace(go.Scatter(x=train.index, y=train['Close'], mode='lines', name='Train'))
     fig.add_trace(go.Scatter(x=valid.index, y=valid['Close'], mode='lines', name='Valid'))
     fig.add_trace(go.Scatter(x=valid.index, y=valid['Predictions'], mode='lines', name='Predictions'))
+    if watchlist_forecast is not None and selected_stock in watchlist_forecast:
+        fig.add_trace(go.Scatter(x=watchlist_forecast.index, y=watchlist_forecast[selected_stock], mode='lines',
+                                 name=f'{forecast_horizon}-Day Forecast ({forecast_mode})'))
     fig.update_layout(title=f'{selected_stock} Predicted Prices',
                       xaxis_title='Date',
                       yaxis_title='Price')
     st.plotly_chart(fig)
 
-# Function to detect pivot points
-def isPivot(candle, window, df):
-    """
-    Function that detects if a candle is a pivot/fractal point
-    Args:
-        candle: Candle index (datetime object)
-        window: Number of days before and after the candle to test if pivot
-        df: DataFrame containing the stock data
-    Returns:
-        1 if pivot high, 2 if pivot low, 3 if both, and 0 default
-    """
-    # Assuming candle is a datetime object
-    candle_timestamp = pd.Timestamp(candle)
-    if candle_timestamp - datetime.timedelta(days=window) < df.index[0] or candle_timestamp + datetime.timedelta(days=window) >= df.index[-1]:
-        return 0
-
-    pivotHigh = 1
-    pivotLow = 2
-    start_index = candle_timestamp - datetime.timedelta(days=window)
-    end_index = candle_timestamp + datetime.timedelta(days=window)
-    for i in range((end_index - start_index).days + 1):
-        current_date = start_index + datetime.timedelta(days=i)
-    
-        if 'low' in df.columns and df.loc[candle_timestamp, 'low'] > df.loc[current_date, 'low']:
-            pivotLow = 0
-        if 'high' in df.columns and df.loc[candle_timestamp, 'high'] < df.loc[current_date, 'high']:
-            pivotHigh = 0
-    if pivotHigh and pivotLow:
-        return 3
-    elif pivotHigh:
-        return pivotHigh
-    elif pivotLow:
-        return pivotLow
-    else:
-        return 0
-
-# Function to calculate Chaikin Oscillator
-def calculate_chaikin_oscillator(data):
-    """
-    Calculate Chaikin Oscillator using pandas_ta.
-    """
-    data['ADL'] = ta.ad(data['High'], data['Low'], data['Close'], data['Volume'])
-    data['Chaikin_Oscillator'] = ta.ema(data['ADL'], length=3) - ta.ema(data['ADL'], length=10)
-    return data
+# Function to load the registry LSTM of a ticker; when no model is stored, training is started as a
+# background job (shared with other sessions asking for the same model) and None is returned until it is done
+def get_lstm_model(selected_stock, dataset, horizon=None):
+    registry = get_model_registry()
+    model_key = registry.make_key(selected_stock, PREDICTION_WINDOW, start_date, end_date,
+                                  profile=training_profile, horizon=horizon)
+    if registry.is_stale(model_key):
+        label = "LSTM" if horizon is None else f"{horizon}-day direct LSTM"
+        job_id = get_job_queue().submit(train_lstm_job, (model_key, dataset, training_profile, registry.root),
+                                        key=model_key, name=f"{label} {selected_stock}", force=button_clicked)
+        if wait_for_job(job_id, f"Training {label} model for {selected_stock} ({training_profile} profile)") is None:
+            return None
+    model, scaler = registry.load(model_key)
+    return model, scaler, registry.metadata(model_key)['metrics']
+
+# Function to load the newest global LSTM (trained with `python train_models.py --global`), or None
+def get_global_model(horizon=None):
+    registry = get_model_registry()
+    # One-step models are stored with horizon None, so direct multi-output models never match it
+    model_key = registry.latest(GLOBAL_TICKER, window=PREDICTION_WINDOW, horizon=horizon)
+    if model_key is None:
+        return None
+    return registry.load(model_key)[0]
+
+# Function to forecast all selected stocks past the end date in one batched pass
+def forecast_selected_stocks(tickers):
+    panel = load_price_panel(tickers, start_date, end_date)
+    histories = {ticker: panel[ticker]['Close'].dropna() for ticker in tickers}
+    histories = {ticker: close for ticker, close in histories.items() if len(close) > PREDICTION_WINDOW * 2}
+    if not histories:
+        return None
+
+    if prediction_model == "Global LSTM (all tickers)":
+        global_model = get_global_model(forecast_horizon if forecast_mode == 'direct' else None)
+        if global_model is not None:
+            return forecast_global(global_model, histories, forecast_horizon, PREDICTION_WINDOW, forecast_mode)
+
+    horizon = forecast_horizon if forecast_mode == 'direct' else None
+    lstms = {ticker: get_lstm_model(ticker, close.to_numpy().reshape(-1, 1), horizon) for ticker, close in histories.items()}
+    if any(lstm is None for lstm in lstms.values()):
+        return None  # Models still training in the background
+    models = {ticker: (model, scaler) for ticker, (model, scaler, _) in lstms.items()}
+    return forecast_watchlist(models, histories, forecast_horizon, PREDICTION_WINDOW, forecast_mode)
+
+# Function to display the forecast paths of the whole watchlist
+def display_watchlist_forecast(forecasts):
+    st.subheader(f"Watchlist - {forecast_horizon}-Day Forecast ({forecast_mode})")
+    fig = px.line(forecasts, x=forecasts.index, y=forecasts.columns, title='Forecast Prices')
+    fig.update_xaxes(title_text='Date')
+    fig.update_yaxes(title_text='Price')
+    st.plotly_chart(fig)
+    st.write(forecasts)
 
-# Define the calculate_stochastic_oscillator function
-def calculate_stochastic_oscillator(df, period=14):
-    """
-    Calculate Stochastic Oscillator (%K and %D).
-    """
-    df['L14'] = df['Low'].rolling(window=period).min()
-    df['H14'] = df['High'].rolling(window=period).max() 
-    df['%K'] = 100 * ((df['Close'] - df['L14']) / (df['H14'] - df['L14']))
-    df['%D'] = df['%K'].rolling(window=3).mean()
-    return df
+# Function to plot gradient boosting predictions against the actual prices
+def display_gbr_predictions(selected_stock, df, predictions):
+    price_col = 'Adj Close' if 'Adj Close' in df.columns else 'Close'
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(x=df.index, y=df[price_col], mode='lines', name='Actual'))
+    fig.add_trace(go.Scatter(x=predictions.index, y=predictions, mode='lines', name='Predictions'))
+    fig.update_layout(title=f'{selected_stock} Predicted Prices (Gradient Boosting)',
+                      xaxis_title='Date',
+                      yaxis_title='Price')
+    st.plotly_chart(fig)
 
 def chart_stochastic_oscillator_and_price(ticker, df):
     """
     Plots the stock's closing price with its 50-day and 200-day moving averages,
     and the Stochastic Oscillator (%K and %D) below the price chart.
+    `df` is a frame from load_indicator_frame with the MA50, MA200, %K and %D columns.
     """
     plt.figure(figsize=[16, 8])
     plt.style.use('default')
@@ -331,8 +468,8 @@ def chart_stochastic_oscillator_and_price(ticker, df):
 
     # Plotting the closing price and moving averages on the first subplot
     ax[0].plot(df['Close'], color='black', linewidth=1, label='Close')
-    ax[0].plot(df['ma50'], color='blue', linewidth=1, linestyle='--', label='50-day MA')
-    ax[0].plot(df['ma200'], color='red', linewidth=1, linestyle='--', label='200-day MA')
+    ax[0].plot(df['MA50'], color='blue', linewidth=1, linestyle='--', label='50-day MA')
+    ax[0].plot(df['MA200'], color='red', linewidth=1, linestyle='--', label='200-day MA')
     ax[0].set_ylabel('Price [\$]')
     ax[0].grid(True)
     ax[0].legend(loc='upper left')
@@ -354,22 +491,12 @@ def chart_stochastic_oscillator_and_price(ticker, df):
     plt.subplots_adjust(hspace=0.1)  # Adjust space between the plots
 
     st.pyplot(fig)  # Display the plot in Streamlit
-    return data
 
 def display_technical_summary(selected_stock, start_date, end_date):
     st.subheader(f"{selected_stock} - Technical Summary")
     
-    stock_data = yf.Ticker(selected_stock)
-    stock_df = stock_data.history(period='1d', start=start_date, end=end_date)
-    
-    # Calculate Chaikin Oscillator
-    stock_df = calculate_chaikin_oscillator(stock_df)
-    stock_df = calculate_stochastic_oscillator(stock_df)
-
-    # Detect pivot points
-    window = 5
-    stock_df['isPivot'] = stock_df.apply(lambda x: isPivot(x.name, window, stock_df), axis=1)
-    stock_df['pointpos'] = stock_df.apply(lambda row: row['Low'] - 1e-3 if row['isPivot'] == 2 else (row['High'] + 1e-3 if row['isPivot'] == 1 else np.nan), axis=1)
+    # Chaikin Oscillator, Stochastic Oscillator and pivot points from the shared indicator frame
+    stock_df = load_indicator_frame(selected_stock, start_date, end_date, ['Chaikin_Oscillator', '%K', '%D', 'pointpos'])
 
     # Plot candlestick with pivots
     fig = go.Figure(data=[go.Candlestick(x=stock_df.index,
@@ -407,18 +534,10 @@ def display_technical_summary(selected_stock, start_date, end_date):
 def display_advanced_analysis(selected_stock, start_date, end_date):
     st.subheader(f"Advanced Analysis for {selected_stock}")
 
-    # Download historical data
-    df = yf.download(selected_stock, start=start_date, end=end_date)
-
-    # Add Moving Average Convergence Divergence (MACD)
-    df['12 Day EMA'] = df['Close'].ewm(span=12, adjust=False).mean()
-    df['26 Day EMA'] = df['Close'].ewm(span=26, adjust=False).mean()
-    df['MACD'] = df['12 Day EMA'] - df['26 Day EMA']
-    df['Signal Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-
-    # MACD Buy/Sell Signals
-    df['MACD_Buy_Signal'] = np.where(df['MACD'] > df['Signal Line'], df['MACD'], np.nan)
-    df['MACD_Sell_Signal'] = np.where(df['MACD'] < df['Signal Line'], df['MACD'], np.nan)
+    # Moving Average Convergence Divergence (MACD), Relative Strength Index (RSI) and their
+    # buy/sell signals from the shared indicator frame
+    df = load_indicator_frame(selected_stock, start_date, end_date,
+                              ['MACD_Buy_Signal', 'MACD_Sell_Signal', 'RSI_Buy_Signal', 'RSI_Sell_Signal'])
 
     fig, ax = plt.subplots()
     ax.plot(df.index, df['MACD'], label='MACD', color='blue')
@@ -431,17 +550,6 @@ def display_advanced_analysis(selected_stock, start_date, end_date):
     plt.xticks(rotation=45)  # Rotate x-axis labels for better visibility
     st.pyplot(fig)
 
-    # Add Relative Strength Index (RSI)
-    delta = df['Close'].diff()
-    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-    rs = gain / loss
-    df['RSI'] = 100 - (100 / (1 + rs))
-
-    # RSI Buy/Sell Signals
-    df['RSI_Buy_Signal'] = np.where(df['RSI'] < 30, df['RSI'], np.nan)
-    df['RSI_Sell_Signal'] = np.where(df['RSI'] > 70, df['RSI'], np.nan)
-
     fig, ax = plt.subplots()
     ax.plot(df.index, df['RSI'], label='RSI', color='purple')
     ax.axhline(30, linestyle='--', alpha=0.5, color='red')
@@ -454,18 +562,8 @@ def display_advanced_analysis(selected_stock, start_date, end_date):
     plt.xticks(rotation=45)  # Rotate x-axis labels for better visibility
     st.pyplot(fig)
 def stochastic_calculator(selected_stock, start_date, end_date):
-    # Download historical data
-    df = yf.download(selected_stock, start=start_date, end=end_date)
-    
-    # Calculate moving averages
-    df['MA50'] = df['Close'].rolling(window=50).mean()
-    df['MA200'] = df['Close'].rolling(window=200).mean()
-    
-    # Calculate Stochastic Oscillator (%K and %D)
-    high14 = df['High'].rolling(window=14).max()
-    low14 = df['Low'].rolling(window=14).min()
-    df['%K'] = 100 * (df['Close'] - low14) / (high14 - low14)
-    df['%D'] = df['%K'].rolling(window=3).mean()
+    # Moving averages and Stochastic Oscillator (%K and %D) from the shared indicator frame
+    df = load_indicator_frame(selected_stock, start_date, end_date, ['MA50', 'MA200', '%K', '%D'])
 
     fig, axs = plt.subplots(2, figsize=(12, 8), sharex=True)
 
@@ -494,25 +592,75 @@ def stochastic_calculator(selected_stock, start_date, end_date):
     # Display the plot in Streamlit
     st.pyplot(fig)
 
+# Function to backtest the MACD, RSI and stochastic signals shown above
+def display_signal_backtest(selected_stock, start_date, end_date):
+    st.subheader(f"Signal Backtest for {selected_stock}")
+    df = load_indicator_frame(selected_stock, start_date, end_date, [])
+    curves = equity_curves(df, transaction_cost_bps)
+    fig = px.line(curves, x=curves.index, y=curves.columns,
+                  title=f'{selected_stock} - Growth of 1 (after {transaction_cost_bps:g} bps per trade)')
+    fig.update_xaxes(title_text='Date')
+    fig.update_yaxes(title_text='Equity')
+    st.plotly_chart(fig)
+    st.write((curves.iloc[-1] - 1).rename('Total Return').to_frame())
+
+# Function to rank a ticker universe by the latest RSI, MACD, stochastic, MA crossover and Chaikin values
+def display_screener(universe, filters):
+    st.subheader("Screener")
+    store = get_price_store()
+    end = end_date + timedelta(days=1)
+    matrix = get_price_matrix()
+    if matrix is not None:
+        stale = matrix.stale_tickers(store, load_universe(universe, store))
+        if stale:
+            st.warning(f"The price matrix is out of date for {len(stale)} tickers ({', '.join(stale[:5])}"
+                       f"{', ...' if len(stale) > 5 else ''}), screening from the price store instead. "
+                       "Rebuild it with `python price_matrix.py`.")
+            matrix = None
+        elif not matrix.covers(pd.Timestamp(end) - pd.Timedelta(days=DEFAULT_LOOKBACK_DAYS), end):
+            matrix = None
+    results = run_screener(universe, end, filters=filters or ["All"], store=store, matrix=matrix)
+    st.write(f"{len(results)} matching tickers as of {end_date}")
+    if matrix is not None:
+        st.caption(f"Prices from the price matrix ({matrix.shape[0]} tickers, {matrix.meta['start']} to {matrix.meta['end']})")
+    st.dataframe(results)
+
 # Execute analysis when button is clicked
-if button_clicked:
+watchlist_forecast = None
+if resume_view == 'analyze':
     if selected_stocks:
+        load_price_panel(selected_stocks, start_date, end_date)  # Warm the store for all tickers in one batch
+        if forecast_horizon and (analysis_type == "Predicted Prices" or selected_options["Predicted Prices"]):
+            watchlist_forecast = forecast_selected_stocks(selected_stocks)
         for selected_stock in selected_stocks:
             handle_analysis(selected_stock, analysis_type, start_date, end_date)
+        if watchlist_forecast is not None:
+            display_watchlist_forecast(watchlist_forecast)
     else:
         st.sidebar.warning("Please select at least one stock ticker.")
 
 # Execute technical summary when summary button is clicked
-if summary_clicked:
+if resume_view == 'summary':
     if selected_stocks:
+        load_price_panel(selected_stocks, start_date, end_date)  # Warm the store for all tickers in one batch
         for selected_stock in selected_stocks:
             display_technical_summary(selected_stock, start_date, end_date)
             display_advanced_analysis(selected_stock, start_date, end_date)   
             stochastic_calculator(selected_stock, start_date, end_date)
+            display_signal_backtest(selected_stock, start_date, end_date)
 # Define the stochastic_calculator function
     else:
         st.sidebar.warning("Please select at least one stock ticker.")
 
+# Execute the screener when the screen button is clicked
+if screener_clicked:
+    if screener_universe == "All stored tickers":
+        display_screener('store', screener_filters)
+    elif selected_stocks:
+        display_screener(selected_stocks, screener_filters)
+    else:
+        st.sidebar.warning("Please select at least one stock ticker.")
+
 # Main logic for handling button clicks
 # if button_clicked:
 #     for selected_stock in selected_stocks:
@@ -523,3 +671,11 @@ if summary_clicked:
 #         st.subheader(f"Oscillatron Summary for {selected_stock}")
 #         stochastic_calculator(selected_stock, start_date, end_date)
 # Define the stochastic_calculator function
+
+# Poll the background jobs this run is waiting for: re-run the script until they have finished,
+# then stop resuming the view that started them
+if st.session_state['pending_jobs']:
+    time.sleep(JOB_POLL_SECONDS)
+    st.rerun()
+else:
+    st.session_state.pop('resume_view', None)
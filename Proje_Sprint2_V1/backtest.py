@@ -0,0 +1,371 @@
+# backtest.py
+"""
+Vectorized backtester for the app's MACD, RSI and stochastic signals.
+
+Signals are computed for a whole (dates x tickers x parameter-grid) array at once and
+turned into long/flat positions: a position opened at the close of day t earns the
+return from t to t+1, and every position change pays `cost_bps` of the traded value.
+Tickers are processed in chunks so the arrays stay within a fixed memory budget.
+
+Rules, with the defaults used by the app:
+- rsi: buy when RSI(window) < lower, sell when RSI > upper (14, 30, 70).
+- macd: long while MACD(fast, slow) is above its signal line (12, 26, 9).
+- stochastic: buy when %K(k_window) crosses above %D(d_window) below `oversold`, sell when it
+  crosses below %D above `overbought` (14, 3, 20, 80).
+
+Usage:
+    python backtest.py AAPL META NVDA NFLX --rule rsi
+    python backtest.py --tickers-file sp500.txt --rule macd --cost-bps 5 --top 10
+"""
+
+import argparse
+import itertools
+import time
+from datetime import date
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+TRADING_DAYS = 252
+
+# Largest growth of the rescaled terms within one block of the block-wise EMA (bounds the rounding error)
+EMA_BLOCK_GROWTH = 1e3
+
+
+def make_grid(**params):
+    """
+    Cartesian product of parameter lists.
+
+    Returns:
+    - dict: name -> numpy array of length P (one entry per combination).
+    """
+    names = list(params)
+    combos = list(itertools.product(*(params[name] for name in names)))
+    return {name: np.array([combo[i] for combo in combos]) for i, name in enumerate(names)}
+
+
+def _per_unique(values, compute):
+    # Compute once per distinct parameter value and broadcast onto the grid axis (last)
+    unique, inverse = np.unique(values, return_inverse=True)
+    stacked = np.stack([compute(value) for value in unique], axis=-1)
+    return stacked[..., inverse]
+
+
+def _hold(signal):
+    """
+    Forward-fill 1 (buy) / 0 (sell) / NaN (no signal) along time; flat before the first signal.
+    """
+    t = np.arange(len(signal)).reshape((-1,) + (1,) * (signal.ndim - 1))
+    last = np.where(np.isnan(signal), 0, t)
+    np.maximum.accumulate(last, axis=0, out=last)
+    return np.nan_to_num(np.take_along_axis(signal, last, axis=0), nan=0.)
+
+
+def _rolling_mean(values, window):
+    # NaN until the window is full, like pandas rolling(window).mean()
+    out = np.full(values.shape, np.nan)
+    if window <= len(values):
+        out[window - 1:] = sliding_window_view(values, window, axis=0).mean(axis=-1)
+    return out
+
+
+def _ema_2d(values, spans):
+    """
+    EMA (adjust=False) of every column of a (T, m) array, computed block-wise in closed form.
+
+    Within a block, y[j] = decay**j * cumsum(alpha * x[i] / decay**i)[j] + decay**(j + 1) * y[-1],
+    where y[-1] is the last EMA of the previous block: one cumulative sum per block for all
+    columns. Blocks are as long as decay**-i stays below EMA_BLOCK_GROWTH for the shortest span,
+    so the result matches the recursion to rounding error. Leading NaNs stay NaN and each series
+    starts at its first value; gaps inside a series carry the last value forward.
+
+    Parameters:
+    - values: (T, m) array.
+    - spans: One span for all columns, or an array with the span of each column.
+    """
+    alpha = 2. / (np.broadcast_to(np.asarray(spans, dtype='float64'), values.shape[1:]) + 1)
+    decay = 1. - alpha
+    gaps = np.flatnonzero(np.isnan(values).any(axis=0))
+    if len(gaps):
+        # Forward-fill gaps and back-fill the leading NaNs with the first value (EMA of a constant)
+        valid = ~np.isnan(values[:, gaps])
+        first = np.argmax(valid, axis=0)
+        t = np.arange(len(values))[:, None]
+        last = np.maximum.accumulate(np.where(valid, t, first), axis=0)
+        values = values.copy()
+        values[:, gaps] = np.take_along_axis(values[:, gaps], last, axis=0)
+
+    out = np.empty(values.shape)
+    if len(values):
+        smallest = decay.min(initial=1.)
+        # Span 1 (decay 0) is the input itself, one bar per block
+        block = 1 if smallest <= 0 else int(np.log(EMA_BLOCK_GROWTH) / -np.log(smallest))
+        block = max(1, min(len(values), block))
+        powers = decay ** np.arange(block)[:, None]
+        scaled, carry = alpha / powers, decay * powers
+        prev = values[0]  # y[-1] = x[0] makes y[0] = x[0]
+        for start in range(0, len(values), block):
+            n = min(block, len(values) - start)
+            chunk = out[start:start + n]
+            np.multiply(values[start:start + n], scaled[:n], out=chunk)
+            np.cumsum(chunk, axis=0, out=chunk)
+            chunk *= powers[:n]
+            chunk += carry[:n] * prev
+            prev = chunk[-1]
+    if len(gaps):
+        out[:, gaps] = np.where(t < first, np.nan, out[:, gaps])
+    return out
+
+
+def ema(values, spans):
+    """
+    EMAs (adjust=False) of a (T, n) array for several spans at once.
+
+    Leading NaNs (tickers without data yet) are skipped: each series starts at its first value.
+
+    Returns:
+    - numpy array: Shape (T, n, len(spans)).
+    """
+    values = np.asarray(values, dtype='float64')
+    spans = np.asarray(spans, dtype='float64')
+    repeated = np.repeat(values[..., None], len(spans), axis=-1)
+    shape = repeated.shape
+    return _ema_2d(repeated.reshape(len(values), -1), np.broadcast_to(spans, shape[1:]).reshape(-1)).reshape(shape)
+
+
+def _ema_per_column(values, spans):
+    # EMA of a (T, n, P) array with a different span per grid column
+    values = np.ascontiguousarray(values, dtype='float64')
+    column_spans = np.broadcast_to(np.asarray(spans, dtype='float64'), values.shape[1:]).reshape(-1)
+    return _ema_2d(values.reshape(len(values), -1), column_spans).reshape(values.shape)
+
+
+def rsi(close, window=14):
+    """
+    RSI with simple rolling means of gains and losses, as in display_advanced_analysis.
+    """
+    delta = np.diff(close, axis=0, prepend=np.nan)
+    gain = _rolling_mean(np.where(delta > 0, delta, 0.), window)
+    loss = _rolling_mean(np.where(delta < 0, -delta, 0.), window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 - 100 / (1 + gain / loss)
+
+
+def rsi_positions(prices, window, lower, upper):
+    values = _per_unique(window, lambda w: rsi(prices['Close'], int(w)))
+    signal = np.where(values < lower, 1., np.where(values > upper, 0., np.nan))
+    return _hold(signal)
+
+
+def macd_positions(prices, fast, slow, signal):
+    spans = np.union1d(fast, slow)
+    emas = ema(prices['Close'], spans)
+    macd = emas[..., np.searchsorted(spans, fast)] - emas[..., np.searchsorted(spans, slow)]
+    signal_line = _ema_per_column(macd, signal)
+    return np.where(np.isnan(macd), 0., (macd > signal_line).astype('float64'))
+
+
+def stochastic_k(high, low, close, window=14):
+    """
+    Stochastic %K as in stochastic_calculator.
+    """
+    high_max = np.full(close.shape, np.nan)
+    low_min = np.full(close.shape, np.nan)
+    if window <= len(close):
+        high_max[window - 1:] = sliding_window_view(high, window, axis=0).max(axis=-1)
+        low_min[window - 1:] = sliding_window_view(low, window, axis=0).min(axis=-1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return 100 * (close - low_min) / (high_max - low_min)
+
+
+def stochastic_positions(prices, k_window, d_window, oversold, overbought):
+    # %K and %D once per distinct (k_window, d_window) pair, broadcast onto the grid axis
+    pairs, inverse = np.unique(np.stack([k_window, d_window], axis=1), axis=0, return_inverse=True)
+    k_by_window = {}
+    stacked = []
+    for k_w, d_w in pairs:
+        if k_w not in k_by_window:
+            k_by_window[k_w] = stochastic_k(prices['High'], prices['Low'], prices['Close'], int(k_w))
+        stacked.append(np.stack([k_by_window[k_w], _rolling_mean(k_by_window[k_w], int(d_w))]))
+    k, d = np.stack(stacked, axis=-1)[..., inverse.reshape(-1)]
+    above = k > d
+    was_above = np.roll(above, 1, axis=0)
+    was_above[0] = above[0]
+    buy = above & ~was_above & (k < oversold)
+    sell = ~above & was_above & (k > overbought)
+    return _hold(np.where(buy, 1., np.where(sell, 0., np.nan)))
+
+
+# rule -> (position function, price fields used, default sweep grid, app defaults)
+RULES = {
+    'rsi': (rsi_positions, ['Close'],
+            dict(window=[7, 10, 14, 21, 28], lower=[20, 25, 30, 35], upper=[65, 70, 75, 80]),
+            dict(window=[14], lower=[30], upper=[70])),
+    'macd': (macd_positions, ['Close'],
+             dict(fast=[8, 10, 12, 15], slow=[21, 26, 30, 35], signal=[5, 7, 9, 12]),
+             dict(fast=[12], slow=[26], signal=[9])),
+    'stochastic': (stochastic_positions, ['High', 'Low', 'Close'],
+                   dict(k_window=[9, 14, 21], d_window=[3, 5], oversold=[20, 30], overbought=[70, 80]),
+                   dict(k_window=[14], d_window=[3], oversold=[20], overbought=[80])),
+}
+
+RULE_LABELS = {'rsi': 'RSI', 'macd': 'MACD', 'stochastic': 'Stochastic'}
+
+
+def strategy_returns(close, positions, cost_bps=10.):
+    """
+    Daily returns of long/flat positions after transaction costs.
+
+    Parameters:
+    - close: (T, n) closing prices.
+    - positions: (T, n, P) exposure decided at each close (0 or 1).
+    - cost_bps: Cost of each position change in basis points of the traded value.
+
+    Returns:
+    - tuple: (returns, turnover), both (T, n, P).
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        daily = np.nan_to_num(close[1:] / close[:-1] - 1)
+    returns = np.zeros(positions.shape)
+    returns[1:] = positions[:-1] * daily[..., None]
+    turnover = np.abs(np.diff(positions, axis=0, prepend=0.))
+    returns -= turnover * cost_bps / 1e4
+    return returns, turnover
+
+
+def summarize(returns, positions, turnover):
+    """
+    Per (ticker, parameter) metrics of strategy returns.
+
+    Returns:
+    - dict: name -> (n, P) array with total_return, cagr, sharpe, max_drawdown, trades and exposure.
+    """
+    equity = np.cumprod(1 + returns, axis=0)
+    years = len(returns) / TRADING_DAYS
+    std = returns.std(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe = np.where(std > 0, returns.mean(axis=0) / std * np.sqrt(TRADING_DAYS), 0.)
+    return {
+        'total_return': equity[-1] - 1,
+        'cagr': equity[-1] ** (1 / years) - 1 if years else np.zeros(equity.shape[1:]),
+        'sharpe': sharpe,
+        'max_drawdown': (equity / np.maximum.accumulate(equity, axis=0) - 1).min(axis=0),
+        'trades': (turnover > 0).sum(axis=0),
+        'exposure': positions.mean(axis=0),
+    }
+
+
+def price_arrays(panel, fields):
+    """
+    Split a (ticker, field) wide frame from PriceStore.get_many into (T, n) arrays per field,
+    with tickers in column order and gaps forward-filled (leading NaNs stay NaN).
+    """
+    tickers = list(dict.fromkeys(panel.columns.get_level_values(0)))
+    return {field: panel.xs(field, axis=1, level=-1)[tickers].ffill().to_numpy(dtype='float64') for field in fields}
+
+
+def sweep(rule, panel, grid=None, cost_bps=10., max_cells=20_000_000):
+    """
+    Backtest every parameter combination of a rule on every ticker of a wide price frame.
+
+    Parameters:
+    - rule: Name in RULES.
+    - panel: Wide frame with (ticker, field) columns, e.g. PriceStore.get_many(...).
+    - grid: dict of parameter lists (default: the rule's sweep grid).
+    - cost_bps: Transaction cost per position change, in basis points.
+    - max_cells: Upper bound of dates x tickers x combinations held in one array.
+
+    Returns:
+    - DataFrame: One row per (ticker, parameter combination) with the metrics and the
+      ticker's buy-and-hold return.
+    """
+    position_func, fields, default_grid, _ = RULES[rule]
+    grid = make_grid(**(grid or default_grid))
+    if rule == 'macd':
+        keep = grid['fast'] < grid['slow']
+        grid = {name: values[keep] for name, values in grid.items()}
+
+    tickers = list(dict.fromkeys(panel.columns.get_level_values(0)))
+    arrays = price_arrays(panel, fields)
+    n_params = len(next(iter(grid.values())))
+    chunk = max(1, int(max_cells // max(1, len(panel) * n_params)))
+
+    frames = []
+    for start in range(0, len(tickers), chunk):
+        part = {field: values[:, start:start + chunk] for field, values in arrays.items()}
+        positions = position_func(part, **{name: values for name, values in grid.items()})
+        returns, turnover = strategy_returns(part['Close'], positions, cost_bps)
+        metrics = summarize(returns, positions, turnover)
+
+        close = part['Close']
+        first = np.take_along_axis(close, np.argmax(~np.isnan(close), axis=0)[None, :], axis=0)[0]
+        n = close.shape[1]
+        frame = pd.DataFrame({'ticker': np.repeat(tickers[start:start + n], n_params)})
+        for name, values in grid.items():
+            frame[name] = np.tile(values, n)
+        for name, values in metrics.items():
+            frame[name] = values.reshape(-1)
+        frame['buy_hold_return'] = np.repeat(close[-1] / first - 1, n_params)
+        frames.append(frame)
+
+    return pd.concat(frames, ignore_index=True)
+
+
+def equity_curves(data, cost_bps=10.):
+    """
+    Equity curves of the app's default MACD, RSI and stochastic rules for one ticker, plus buy and hold.
+
+    Parameters:
+    - data: OHLCV DataFrame of one ticker.
+
+    Returns:
+    - DataFrame: Growth of 1 per strategy, indexed by date.
+    """
+    curves = {}
+    for rule, (position_func, fields, _, defaults) in RULES.items():
+        prices = {field: data[[field]].ffill().to_numpy(dtype='float64') for field in fields}
+        positions = position_func(prices, **make_grid(**defaults))
+        returns, _ = strategy_returns(prices['Close'], positions, cost_bps)
+        curves[RULE_LABELS[rule]] = np.cumprod(1 + returns[:, 0, 0])
+    curves['Buy & Hold'] = (data['Close'] / data['Close'].iloc[0]).to_numpy()
+    return pd.DataFrame(curves, index=data.index)
+
+
+def main():
+    from price_store import PriceStore
+
+    parser = argparse.ArgumentParser(description="Sweep signal-rule parameters over many tickers.")
+    parser.add_argument('tickers', nargs='*', help="Ticker symbols, e.g. AAPL META")
+    parser.add_argument('--tickers-file', help="Text file with one ticker per line")
+    parser.add_argument('--rule', default='rsi', choices=sorted(RULES))
+    parser.add_argument('--start', default='2010-01-01')
+    parser.add_argument('--end', default=str(date.today()), help="End of the history (exclusive)")
+    parser.add_argument('--cost-bps', type=float, default=10.)
+    parser.add_argument('--top', type=int, default=10, help="Parameter sets to print, by median Sharpe ratio")
+    parser.add_argument('--output', help="Optional CSV with every (ticker, parameter) result")
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers]
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip().upper() for line in f if line.strip() and not line.startswith('#')]
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        parser.error("no tickers given")
+
+    panel = PriceStore().get_many(tickers, args.start, args.end)
+    started = time.perf_counter()
+    results = sweep(args.rule, panel, cost_bps=args.cost_bps)
+    elapsed = time.perf_counter() - started
+
+    params = list(RULES[args.rule][2])
+    summary = results.groupby(params)[['sharpe', 'total_return', 'max_drawdown', 'trades']].median()
+    print(summary.sort_values('sharpe', ascending=False).head(args.top).to_string())
+    print(f"{len(results)} backtests ({results['ticker'].nunique()} tickers x {len(summary)} parameter sets) in {elapsed:.2f}s")
+    if args.output:
+        results.to_csv(args.output, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+# benchmark_indicators.py
+"""
+Parity check and benchmark for indicators.py against the original loop-based library
+in Proje_Sprint2_V1_old/StockSeekerWebAppV4.py.
+
+The original functions call DataFrame.set_value, which no longer exists in pandas, so a
+small shim (set_value -> .loc) is installed before they run. Both versions are fed the
+same synthetic random-walk OHLCV bars.
+
+Usage:
+    python benchmark_indicators.py                  # parity + benchmark, 500 tickers x 21 years
+    python benchmark_indicators.py --parity-only
+    python benchmark_indicators.py --tickers 50 --years 10
+"""
+
+import argparse
+import importlib.util
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import indicators
+
+REFERENCE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'Proje_Sprint2_V1_old',
+                              'StockSeekerWebAppV4.py')
+
+# Indicators that were implemented with iterrows/set_value in the original library
+LOOP_INDICATORS = [
+    'acc_dist', 'on_balance_volume', 'price_volume_trend', 'average_true_range', 'bollinger_bands',
+    'chaikin_oscillator', 'ease_of_movement', 'mass_index', 'directional_movement_index',
+    'money_flow_index', 'negative_volume_index', 'positive_volume_index', 'momentum', 'rsi',
+    'chaikin_volatility', 'williams_ad', 'williams_r', 'ultimate_oscillator',
+]
+
+BARS_PER_YEAR = 252
+
+
+def load_reference():
+    """
+    Import the original V4 indicator module with a set_value shim for current pandas.
+    """
+    if not hasattr(pd.DataFrame, 'set_value'):
+        def set_value(self, index, col, value):
+            self.loc[index, col] = value
+        pd.DataFrame.set_value = set_value
+
+    spec = importlib.util.spec_from_file_location('indicators_v4', REFERENCE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def synthetic_ohlcv(n_bars, seed=0):
+    """
+    Random-walk OHLCV bars using the '<OPEN>'-style column names of the original library.
+    """
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, n_bars)))
+    open_ = close * np.exp(rng.normal(0, 0.005, n_bars))
+    high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, 0.01, n_bars)))
+    low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, 0.01, n_bars)))
+    volume = rng.integers(1_000_000, 50_000_000, n_bars).astype('float64')
+    # A few flat bars exercise the high == low branches
+    flat = rng.random(n_bars) < 0.01
+    high[flat] = low[flat] = close[flat]
+    return pd.DataFrame({'<OPEN>': open_, '<HIGH>': high, '<LOW>': low, '<CLOSE>': close, '<VOL>': volume})
+
+
+def _run(func, data):
+    # The original ultimate_oscillator returns None and only mutates its input
+    result = func(data)
+    return data if result is None else result
+
+
+def check_parity(reference, n_bars=750, n_tickers=3, rtol=1e-7, atol=1e-9):
+    """
+    Compare every new output column with the original implementation.
+
+    Returns:
+    - DataFrame: One row per (ticker, indicator, column) with the max absolute difference.
+    """
+    rows = []
+    for seed in range(n_tickers):
+        base = synthetic_ohlcv(n_bars, seed)
+        for name in LOOP_INDICATORS:
+            expected = _run(getattr(reference, name), base.copy())
+            actual = _run(getattr(indicators, name), base.copy())
+            for column in expected.columns.difference(base.columns):
+                exp, act = expected[column].to_numpy(dtype='float64'), actual[column].to_numpy(dtype='float64')
+                rows.append({
+                    'ticker': seed,
+                    'indicator': name,
+                    'column': column,
+                    'max_abs_diff': float(np.nanmax(np.abs(exp - act))) if np.isfinite(exp).any() else 0.,
+                    'match': bool(np.allclose(exp, act, rtol=rtol, atol=atol, equal_nan=True)),
+                })
+    return pd.DataFrame(rows)
+
+
+def benchmark(reference, n_tickers=500, years=21, reference_tickers=1):
+    """
+    Time both libraries on `n_tickers` tickers of `years` years of daily bars.
+
+    The loop implementation is only run on `reference_tickers` tickers and extrapolated,
+    because running it on the whole universe takes hours.
+
+    Returns:
+    - DataFrame: Seconds per indicator for the whole universe and the speedup.
+    """
+    n_bars = years * BARS_PER_YEAR
+    universe = [synthetic_ohlcv(n_bars, seed) for seed in range(n_tickers)]
+    rows = []
+    for name in LOOP_INDICATORS:
+        started = time.perf_counter()
+        for data in universe:
+            _run(getattr(indicators, name), data.copy())
+        vectorized = time.perf_counter() - started
+
+        started = time.perf_counter()
+        for data in universe[:reference_tickers]:
+            _run(getattr(reference, name), data.copy())
+        loop = (time.perf_counter() - started) * n_tickers / reference_tickers
+
+        rows.append({'indicator': name, 'loop_seconds_est': loop, 'vectorized_seconds': vectorized,
+                     'speedup': loop / vectorized if vectorized else np.inf})
+    return pd.DataFrame(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Parity check and benchmark for indicators.py")
+    parser.add_argument('--tickers', type=int, default=500)
+    parser.add_argument('--years', type=int, default=21)
+    parser.add_argument('--reference-tickers', type=int, default=1,
+                        help="Tickers the loop implementation is timed on before extrapolating")
+    parser.add_argument('--parity-only', action='store_true')
+    args = parser.parse_args()
+
+    reference = load_reference()
+
+    parity = check_parity(reference)
+    print(parity.groupby(['indicator', 'column'])[['max_abs_diff', 'match']].agg({'max_abs_diff': 'max', 'match': 'all'}).to_string())
+    if not parity['match'].all():
+        raise SystemExit("Parity check failed")
+    print("Parity check passed")
+
+    if not args.parity_only:
+        results = benchmark(reference, args.tickers, args.years, args.reference_tickers)
+        print(results.to_string(index=False))
+        total_loop, total_vec = results['loop_seconds_est'].sum(), results['vectorized_seconds'].sum()
+        print(f"Total: loop ~{total_loop:.1f}s, vectorized {total_vec:.1f}s, speedup ~{total_loop / total_vec:.0f}x "
+              f"({args.tickers} tickers x {args.years * BARS_PER_YEAR} bars)")
+
+
+if __name__ == '__main__':
+    main()
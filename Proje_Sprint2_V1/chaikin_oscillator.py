@@ -1,7 +1,23 @@
 # chaikin_oscillator.py
 
+import numpy as np
 import pandas as pd
 
+def money_flow_volume(high, low, close, volume):
+    """
+    Money flow volume of each bar (0 for bars where high equals low).
+
+    Parameters:
+    - high, low, close, volume: numpy arrays (or Series) of equal length.
+
+    Returns:
+    - numpy array: The per-bar contribution to the accumulation/distribution line.
+    """
+    high, low, close, volume = (np.asarray(values, dtype='float64') for values in (high, low, close, volume))
+    span = high - low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(span != 0, ((close - low) - (high - close)) / span * volume, 0.)
+
 def calculate_chaikin_oscillator(data, periods_short=3, periods_long=10, high_col='high', low_col='low', close_col='close', vol_col='volume'):
     """
     Calculate the Chaikin Oscillator for the given data.
@@ -18,20 +34,72 @@ def calculate_chaikin_oscillator(data, periods_short=3, periods_long=10, high_co
     Returns:
     - DataFrame: Original DataFrame with a new column 'ch_osc' containing the Chaikin Oscillator values.
     """
-    ac = pd.Series(index=data.index, dtype='float64')
-    val_last = 0
-
-    for index, row in data.iterrows():
-        if row[high_col] != row[low_col]:
-            val = val_last + ((row[close_col] - row[low_col]) - (row[high_col] - row[close_col])) / (
-                        row[high_col] - row[low_col]) * row[vol_col]
-        else:
-            val = val_last
-        ac[index] = val
-        val_last = val
+    # Accumulation/distribution line as one cumulative sum over the whole history
+    flow = money_flow_volume(data[high_col], data[low_col], data[close_col], data[vol_col])
+    ac = pd.Series(np.cumsum(flow), index=data.index, dtype='float64')
 
     ema_long = ac.ewm(span=periods_long, adjust=False).mean()
     ema_short = ac.ewm(span=periods_short, adjust=False).mean()
     data['ch_osc'] = ema_short - ema_long
 
-    return data
\ No newline at end of file
+    return data
+
+class ChaikinOscillatorState:
+    """
+    Running Chaikin Oscillator for one symbol.
+
+    Holds the accumulation/distribution line and the two EMA states, so each new bar is an
+    O(1) update instead of a recomputation over the full history. The values match
+    calculate_chaikin_oscillator (EMAs with adjust=False) bar for bar.
+    """
+
+    __slots__ = ('adl', 'ema_short', 'ema_long', 'alpha_short', 'alpha_long')
+
+    def __init__(self, periods_short=3, periods_long=10):
+        self.adl = 0.0
+        self.ema_short = None
+        self.ema_long = None
+        self.alpha_short = 2.0 / (periods_short + 1)
+        self.alpha_long = 2.0 / (periods_long + 1)
+
+    @property
+    def value(self):
+        """
+        Current oscillator value (None before the first bar).
+        """
+        if self.ema_short is None:
+            return None
+        return self.ema_short - self.ema_long
+
+    def update(self, high, low, close, volume):
+        """
+        Add one bar and return the new oscillator value.
+        """
+        if high != low:
+            self.adl += ((close - low) - (high - close)) / (high - low) * volume
+
+        if self.ema_short is None:
+            # ewm(adjust=False) starts from the first value
+            self.ema_short = self.ema_long = self.adl
+        else:
+            self.ema_short += self.alpha_short * (self.adl - self.ema_short)
+            self.ema_long += self.alpha_long * (self.adl - self.ema_long)
+        return self.ema_short - self.ema_long
+
+    @classmethod
+    def from_history(cls, data, periods_short=3, periods_long=10, high_col='high', low_col='low', close_col='close', vol_col='volume'):
+        """
+        Build a state that continues where a batch calculation over `data` ends.
+
+        The history is processed with the vectorized cumulative sum and pandas EWMs, so
+        seeding thousands of symbols stays cheap.
+        """
+        state = cls(periods_short, periods_long)
+        if len(data) == 0:
+            return state
+
+        adl = np.cumsum(money_flow_volume(data[high_col], data[low_col], data[close_col], data[vol_col]))
+        ema_short = pd.Series(adl).ewm(span=periods_short, adjust=False).mean().iloc[-1]
+        ema_long = pd.Series(adl).ewm(span=periods_long, adjust=False).mean().iloc[-1]
+        state.adl, state.ema_short, state.ema_long = float(adl[-1]), float(ema_short), float(ema_long)
+        return state
@@ -0,0 +1,106 @@
+# forecast.py
+
+import numpy as np
+import pandas as pd
+
+# 'recursive' feeds each one-step prediction back into the input window;
+# 'direct' uses a model trained to output the whole horizon at once
+FORECAST_MODES = ['recursive', 'direct']
+
+
+def last_windows(scalers, datasets, window=60):
+    """
+    Stack the scaled last `window` bars of several price series into one model input.
+
+    Parameters:
+    - scalers: Fitted scaler of each series.
+    - datasets: numpy arrays of shape (n_i, 1) with closing prices.
+    - window: Number of past bars fed to the network.
+
+    Returns:
+    - numpy array: Shape (n_series, window, 1).
+    """
+    return np.stack([scaler.transform(dataset[-window:]) for scaler, dataset in zip(scalers, datasets)]).astype('float32')
+
+
+def recursive_forecast(model, windows, horizon):
+    """
+    Forecast `horizon` steps with a one-step model by rolling its own predictions into the input.
+
+    All series are advanced together, so each step is one batched call for the whole batch.
+
+    Parameters:
+    - model: One-step keras model.
+    - windows: Scaled input windows of shape (n_series, window, 1).
+    - horizon: Number of steps to forecast.
+
+    Returns:
+    - numpy array: Scaled forecasts of shape (n_series, horizon).
+    """
+    buffer = np.array(windows, dtype='float32')
+    path = np.empty((len(buffer), horizon), dtype='float32')
+    for step in range(horizon):
+        next_values = np.asarray(model.predict_on_batch(buffer)).reshape(len(buffer), -1)[:, 0]
+        path[:, step] = next_values
+        # Shift the rolling buffer one bar to the left and append the prediction
+        buffer[:, :-1] = buffer[:, 1:]
+        buffer[:, -1, 0] = next_values
+    return path
+
+
+def direct_forecast(model, windows, horizon):
+    """
+    Forecast `horizon` steps with a multi-output model in a single batched call.
+
+    Returns:
+    - numpy array: Scaled forecasts of shape (n_series, horizon).
+    """
+    path = np.asarray(model.predict_on_batch(np.asarray(windows, dtype='float32')))
+    if path.shape[1] < horizon:
+        raise ValueError(f"Model predicts {path.shape[1]} steps, {horizon} requested")
+    return path[:, :horizon]
+
+
+def forecast_dates(last_date, horizon):
+    """
+    Business days following `last_date`.
+    """
+    return pd.bdate_range(pd.Timestamp(last_date) + pd.offsets.BDay(1), periods=horizon)
+
+
+def forecast_watchlist(models, histories, horizon=30, window=60, mode='recursive'):
+    """
+    Forecast the next `horizon` business days for many tickers at once.
+
+    Tickers that share one model object are stacked into a single batch, so a shared
+    model needs one predict call per step in recursive mode and one call in total
+    in direct mode.
+
+    Parameters:
+    - models: dict mapping ticker -> (model, scaler).
+    - histories: dict mapping ticker -> Series of closing prices with a DatetimeIndex.
+    - horizon: Number of business days to forecast.
+    - window: Number of past bars fed to the network.
+    - mode: One of FORECAST_MODES.
+
+    Returns:
+    - DataFrame: Forecast prices, future business days x tickers.
+    """
+    if mode not in FORECAST_MODES:
+        raise ValueError(f"Unknown forecast mode {mode!r}, expected one of {FORECAST_MODES}")
+    predict = recursive_forecast if mode == 'recursive' else direct_forecast
+
+    groups = {}
+    for ticker, (model, _) in models.items():
+        groups.setdefault(id(model), (model, []))[1].append(ticker)
+
+    paths = {}
+    for model, tickers in groups.values():
+        scalers = [models[ticker][1] for ticker in tickers]
+        datasets = [histories[ticker].to_numpy(dtype='float64').reshape(-1, 1) for ticker in tickers]
+        scaled = predict(model, last_windows(scalers, datasets, window), horizon)
+        for ticker, scaler, row in zip(tickers, scalers, scaled):
+            paths[ticker] = scaler.inverse_transform(row.reshape(-1, 1))[:, 0]
+
+    last_date = max(histories[ticker].index[-1] for ticker in models)
+    return pd.DataFrame(paths, index=forecast_dates(last_date, horizon))[list(models)]
@@ -0,0 +1,103 @@
+# fundamentals_cache.py
+
+import os
+import threading
+import time
+
+import pandas as pd
+import yfinance as yf
+
+# Default location of the on-disk fundamentals cache (next to this module)
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fundamentals_cache')
+
+# Time-to-live per yf.Ticker dataset, in seconds
+DAY = 24 * 60 * 60
+DATASET_TTLS = {
+    'actions': 1 * DAY,
+    'quarterly_financials': 7 * DAY,
+    'institutional_holders': 7 * DAY,
+    'quarterly_balance_sheet': 7 * DAY,
+    'quarterly_cashflow': 7 * DAY,
+    'recommendations': 1 * DAY,
+}
+
+
+class FundamentalsCache:
+    """
+    Disk-backed cache for the yf.Ticker metadata shown under "Display Additional Information".
+
+    One yf.Ticker object is shared per symbol, and every dataset (actions, quarterly
+    statements, holders, recommendations) is kept in memory and pickled to disk until
+    its time-to-live expires, so reruns and restarts do not scrape Yahoo again.
+    """
+
+    def __init__(self, root=DEFAULT_CACHE_DIR, ttls=None):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self.ttls = dict(DATASET_TTLS if ttls is None else ttls)
+        self._lock = threading.Lock()
+        self._tickers = {}
+        self._memory = {}
+
+    def _path(self, symbol, dataset):
+        return os.path.join(self.root, f"{symbol.upper()}_{dataset}.pkl")
+
+    def ticker(self, symbol):
+        """
+        Return the shared yf.Ticker object for a symbol.
+        """
+        symbol = symbol.upper()
+        if symbol not in self._tickers:
+            self._tickers[symbol] = yf.Ticker(symbol)
+        return self._tickers[symbol]
+
+    def _is_fresh(self, fetched_at, dataset):
+        return time.time() - fetched_at < self.ttls.get(dataset, DAY)
+
+    def get(self, symbol, dataset):
+        """
+        Return a yf.Ticker dataset for a symbol, fetching it only when the cached copy expired.
+
+        Parameters:
+        - symbol: Ticker symbol, e.g. 'AAPL'.
+        - dataset: Name of the yf.Ticker attribute, e.g. 'quarterly_financials'.
+
+        Returns:
+        - DataFrame or Series: The dataset (an empty DataFrame if Yahoo returned nothing).
+        """
+        key = (symbol.upper(), dataset)
+        with self._lock:
+            cached = self._memory.get(key)
+            if cached is not None and self._is_fresh(cached[0], dataset):
+                return cached[1]
+
+            path = self._path(symbol, dataset)
+            if os.path.exists(path) and self._is_fresh(os.path.getmtime(path), dataset):
+                value = pd.read_pickle(path)
+                self._memory[key] = (os.path.getmtime(path), value)
+                return value
+
+            ticker = self.ticker(symbol)
+
+        # Scrape outside the lock so other symbols are not held up by this request
+        value = getattr(ticker, dataset)
+        if value is None:
+            value = pd.DataFrame()
+
+        with self._lock:
+            pd.to_pickle(value, path + '.tmp')
+            os.replace(path + '.tmp', path)
+            self._memory[key] = (time.time(), value)
+        return value
+
+    def invalidate(self, symbol, dataset=None):
+        """
+        Drop cached datasets of a symbol (all of them if dataset is None).
+        """
+        datasets = self.ttls if dataset is None else [dataset]
+        with self._lock:
+            for name in datasets:
+                self._memory.pop((symbol.upper(), name), None)
+                path = self._path(symbol, name)
+                if os.path.exists(path):
+                    os.remove(path)
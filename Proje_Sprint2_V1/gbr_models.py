@@ -0,0 +1,144 @@
+# gbr_models.py
+
+import functools
+import os
+
+import pandas as pd
+
+# Directory holding the <TICKER>_model.pkl files trained in deneme.ipynb
+GBR_MODEL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Feature columns, in the order the models were fitted on
+GBR_FEATURES = ['10_day_MA', '20_day_MA', '50_day_MA', 'Daily_Return']
+
+# History the models were fitted on in deneme.ipynb (from 2020-01-01 up to the June 2024 run)
+GBR_TRAINING_RANGE = ('2020-01-01', '2024-06-08')
+
+
+def _is_gbr_pickle(path):
+    # Some shipped .pkl files hold pickled keras models; peek at the header instead of
+    # unpickling them, which would import TensorFlow just to find out
+    with open(path, 'rb') as f:
+        return b'GradientBoostingRegressor' in f.read(256)
+
+
+@functools.lru_cache(maxsize=None)
+def load_gbr_model(ticker, model_dir=GBR_MODEL_DIR):
+    """
+    Load the shipped GradientBoostingRegressor of a ticker once per process.
+
+    A <TICKER>_model.npz written by model_export.py is preferred: it is evaluated with
+    NumPy alone and loads without sklearn or joblib.
+
+    Parameters:
+    - ticker: Ticker symbol, e.g. 'META'.
+    - model_dir: Directory containing the <TICKER>_model.pkl files.
+
+    Returns:
+    - TreeEnsemble, GradientBoostingRegressor or None if no gradient boosting model is shipped for the ticker.
+    """
+    npz_path = os.path.join(model_dir, f"{ticker.upper()}_model.npz")
+    if os.path.exists(npz_path):
+        from model_export import TreeEnsemble
+        return TreeEnsemble.load(npz_path)
+
+    path = os.path.join(model_dir, f"{ticker.upper()}_model.pkl")
+    if not os.path.exists(path) or not _is_gbr_pickle(path):
+        return None
+    import joblib
+    return joblib.load(path)
+
+
+def compute_gbr_features(data, price_col='Adj Close'):
+    """
+    Compute the gradient boosting feature set over the whole history in one vectorized pass.
+
+    Parameters:
+    - data: DataFrame with a price column.
+    - price_col: Column the moving averages and returns are computed on.
+
+    Returns:
+    - DataFrame: GBR_FEATURES columns, rows with incomplete windows dropped.
+    """
+    if price_col not in data.columns:
+        price_col = 'Close'
+    price = data[price_col]
+    features = pd.DataFrame({
+        '10_day_MA': price.rolling(window=10).mean(),
+        '20_day_MA': price.rolling(window=20).mean(),
+        '50_day_MA': price.rolling(window=50).mean(),
+        'Daily_Return': price.pct_change(),
+    }, index=data.index)
+    return features.dropna()
+
+
+def gbr_scaler_path(ticker, model_dir=GBR_MODEL_DIR):
+    return os.path.join(model_dir, f"{ticker.upper()}_model.scaler.npz")
+
+
+def fit_gbr_scaler(ticker, store=None, training_range=GBR_TRAINING_RANGE):
+    """
+    Fit the feature standardizer of a ticker on the fixed training range of the shipped models.
+
+    Parameters:
+    - ticker: Ticker symbol, e.g. 'META'.
+    - store: PriceStore to read the training range from.
+    - training_range: (start, end) of the training history, end exclusive.
+
+    Returns:
+    - ArrayStandardScaler: Mean and scale of each GBR_FEATURES column.
+    """
+    from model_export import ArrayStandardScaler
+    from price_store import PriceStore
+
+    data = (store or PriceStore()).get(ticker, *training_range)
+    features = compute_gbr_features(data)
+    if features.empty:
+        raise ValueError(f"No training history for {ticker} in {training_range}")
+    return ArrayStandardScaler.fit(features[GBR_FEATURES].to_numpy(dtype='float64'))
+
+
+@functools.lru_cache(maxsize=None)
+def load_gbr_scaler(ticker, model_dir=GBR_MODEL_DIR):
+    """
+    Load the feature standardizer saved by model_export.py, or fit it on the training range
+    once per process if it has not been exported yet.
+    """
+    path = gbr_scaler_path(ticker, model_dir)
+    if os.path.exists(path):
+        from model_export import ArrayStandardScaler
+        return ArrayStandardScaler.load(path)
+    return fit_gbr_scaler(ticker)
+
+
+def predict_gbr(ticker, data, price_col='Adj Close'):
+    """
+    Predict prices for every bar of a history with the shipped gradient boosting model.
+
+    The notebook standardised the features with a StandardScaler that was not saved
+    alongside the models, so an equivalent scaler fitted on the training range is used
+    (see load_gbr_scaler). It does not depend on the displayed history, so the prediction
+    for a day is the same whatever date range is shown.
+
+    Parameters:
+    - ticker: Ticker symbol, e.g. 'META'.
+    - data: DataFrame with the price history.
+    - price_col: Column the features are computed on.
+
+    Returns:
+    - Series: Predicted prices indexed like the feature rows, or None if no model is shipped
+      or its training history cannot be loaded.
+    """
+    model = load_gbr_model(ticker)
+    if model is None:
+        return None
+    try:
+        scaler = load_gbr_scaler(ticker.upper())
+    except ValueError:
+        return None
+
+    features = compute_gbr_features(data, price_col)
+    if features.empty:
+        return pd.Series(dtype='float64', name='Predictions')
+    scaled = scaler.transform(features[GBR_FEATURES].to_numpy(dtype='float64'))
+    return pd.Series(model.predict(scaled), index=features.index, name='Predictions')
@@ -0,0 +1,152 @@
+# global_model.py
+
+import hashlib
+import time
+
+import numpy as np
+import pandas as pd
+
+from forecast import FORECAST_MODES, forecast_dates
+from lstm_model import DEFAULT_PROFILE, build_lstm_model, fit_profile
+from windowing import make_windows
+
+# Registry "ticker" under which the pooled model is stored
+GLOBAL_TICKER = '__GLOBAL__'
+
+
+def universe_id(tickers):
+    """
+    Short stable id of a ticker universe, used in the registry key of a global model.
+    """
+    return hashlib.sha1(','.join(sorted(ticker.upper() for ticker in tickers)).encode()).hexdigest()[:12]
+
+
+def _log_prices(close):
+    close = close.dropna()
+    return close[close > 0]
+
+
+def build_global_dataset(histories, window=60, horizon=1, train_fraction=0.95):
+    """
+    Pool the training windows of many tickers into one dataset.
+
+    Every window is normalized on its own: inputs and targets are log prices minus the log
+    price of the window's last bar. The model therefore learns relative moves shared by all
+    tickers and needs no per-ticker scaler or embedding, so it also applies to tickers it
+    was never trained on.
+
+    Parameters:
+    - histories: dict mapping ticker -> Series of closing prices with a DatetimeIndex.
+    - window: Number of past bars per sample.
+    - horizon: Number of future bars in each target.
+    - train_fraction: Share of each ticker's history used for training.
+
+    Returns:
+    - tuple: (x, y) float32 arrays of shape (n_windows, window, 1) and (n_windows, horizon),
+      ordered by the date of the window's last bar so the validation split is the most recent period.
+    """
+    xs, ys, ends = [], [], []
+    for close in histories.values():
+        close = _log_prices(close)
+        values = np.log(close.to_numpy(dtype='float64'))
+        x, y = make_windows(values[:int(np.ceil(len(values) * train_fraction))], window, horizon)
+        if not len(x):
+            continue
+        xs.append(x)
+        ys.append(y.reshape(len(x), -1))
+        ends.append(close.index[window - 1:window - 1 + len(x)].to_numpy())
+
+    if not xs:
+        return np.empty((0, window, 1), dtype='float32'), np.empty((0, horizon), dtype='float32')
+
+    x, y, ends = np.concatenate(xs), np.concatenate(ys), np.concatenate(ends)
+    anchor = x[:, -1, :].copy()
+    x -= anchor[:, None, :]
+    y -= anchor
+    order = np.argsort(ends, kind='stable')
+    return x[order].astype('float32'), y[order].astype('float32')
+
+
+def train_global_lstm(histories, window=60, train_fraction=0.95, profile=DEFAULT_PROFILE, horizon=1):
+    """
+    Fit one LSTM on the pooled windows of every ticker in `histories`.
+
+    Returns:
+    - tuple: (model, report) where report holds the profile, epochs run, wall-clock training
+      time, the best validation RMSE in log-price units and the pool size.
+    """
+    started = time.perf_counter()
+    x_train, y_train = build_global_dataset(histories, window, horizon, train_fraction)
+    if not len(x_train):
+        raise ValueError(f"No ticker has enough history for {window}-bar windows")
+
+    model = build_lstm_model(window, n_outputs=horizon)
+    val_losses, _ = fit_profile(model, x_train, y_train if horizon > 1 else y_train[:, 0], profile)
+    report = {
+        'profile': profile,
+        'epochs': len(val_losses),
+        'train_seconds': round(time.perf_counter() - started, 3),
+        'val_rmse_log': float(np.sqrt(min(val_losses))),
+        'n_tickers': len(histories),
+        'n_windows': int(len(x_train)),
+    }
+    return model, report
+
+
+def predict_holdout_global(model, dataset, window=60, train_fraction=0.95):
+    """
+    Predict the held-out tail of a (n, 1) price array one step ahead with the global model.
+
+    Returns:
+    - tuple: (predictions, rmse) where predictions has shape (n_test, 1) in price units.
+    """
+    training_data_len = int(np.ceil(len(dataset) * train_fraction))
+    log_prices = np.log(np.asarray(dataset, dtype='float64')[training_data_len - window:, 0])
+
+    x_test, _ = make_windows(log_prices, window)
+    anchor = x_test[:, -1, :]
+    steps = np.asarray(model.predict((x_test - anchor[:, None, :]).astype('float32'), verbose=0))[:, :1]
+    predictions = np.exp(anchor + steps)
+    rmse = float(np.sqrt(np.mean((predictions - dataset[training_data_len:, :]) ** 2)))
+    return predictions, rmse
+
+
+def forecast_global(model, histories, horizon=30, window=60, mode='recursive'):
+    """
+    Forecast the next `horizon` business days of many tickers with the global model.
+
+    All tickers form one batch: recursive mode makes one predict call per step and direct
+    mode a single call in total, however many tickers are forecast.
+
+    Parameters:
+    - model: Global LSTM (direct mode needs at least `horizon` outputs).
+    - histories: dict mapping ticker -> Series of closing prices with a DatetimeIndex.
+    - horizon: Number of business days to forecast.
+    - window: Number of past bars fed to the network.
+    - mode: One of forecast.FORECAST_MODES.
+
+    Returns:
+    - DataFrame: Forecast prices, future business days x tickers.
+    """
+    if mode not in FORECAST_MODES:
+        raise ValueError(f"Unknown forecast mode {mode!r}, expected one of {FORECAST_MODES}")
+
+    closes = {ticker: _log_prices(close) for ticker, close in histories.items()}
+    buffer = np.stack([np.log(close.to_numpy(dtype='float64')[-window:]) for close in closes.values()])
+
+    if mode == 'direct':
+        steps = np.asarray(model.predict_on_batch((buffer - buffer[:, -1:])[..., None].astype('float32')))
+        if steps.shape[1] < horizon:
+            raise ValueError(f"Model predicts {steps.shape[1]} steps, {horizon} requested")
+        path = buffer[:, -1:] + steps[:, :horizon]
+    else:
+        path = np.empty((len(buffer), horizon))
+        for step in range(horizon):
+            # Re-anchor the rolling buffer on its newest bar, as during training
+            steps = np.asarray(model.predict_on_batch((buffer - buffer[:, -1:])[..., None].astype('float32')))
+            path[:, step] = buffer[:, -1] + steps.reshape(len(buffer), -1)[:, 0]
+            buffer[:, :-1] = buffer[:, 1:]
+            buffer[:, -1] = path[:, step]
+
+    last_date = max(close.index[-1] for close in closes.values())
+    return pd.DataFrame(np.exp(path).T, index=forecast_dates(last_date, horizon), columns=list(closes))
@@ -0,0 +1,151 @@
+# indicator_pipeline.py
+"""
+Compute the app's chart indicators once per (ticker, date range).
+
+Every indicator column is registered in INDICATORS together with the columns it is
+computed from. A request for a set of columns is resolved into a dependency order, so
+e.g. asking for 'Signal Line' also computes 'MACD' and both EMAs, and nothing is
+computed twice. Columns already in the frame are not recomputed, so frames joined with
+the precomputed columns of rolling_stats.py skip the rolling windows. IndicatorCache keeps
+the resulting frames, so the display functions of one report all read the same frame and
+only add columns that no view asked for yet.
+"""
+
+from collections import OrderedDict
+
+import numpy as np
+
+from chaikin_oscillator import money_flow_volume
+from pivots import detect_pivots, pivot_marker_positions
+
+# Number of candles before and after a pivot
+PIVOT_WINDOW = 5
+
+
+def _avg_gain(df, window=14):
+    delta = df['Close'].diff()
+    return (delta.where(delta > 0, 0)).rolling(window=window).mean()
+
+
+def _avg_loss(df, window=14):
+    delta = df['Close'].diff()
+    return (-delta.where(delta < 0, 0)).rolling(window=window).mean()
+
+
+# Column name -> (columns it depends on, function of the frame returning the column)
+# (MA*, L14/H14 and the average gain/loss have the names used by rolling_stats.ROLLING_STATS)
+INDICATORS = {
+    'MA20': ((), lambda df: df['Close'].rolling(window=20).mean()),
+    'MA50': ((), lambda df: df['Close'].rolling(window=50).mean()),
+    'MA200': ((), lambda df: df['Close'].rolling(window=200).mean()),
+    '12 Day EMA': ((), lambda df: df['Close'].ewm(span=12, adjust=False).mean()),
+    '26 Day EMA': ((), lambda df: df['Close'].ewm(span=26, adjust=False).mean()),
+    'MACD': (('12 Day EMA', '26 Day EMA'), lambda df: df['12 Day EMA'] - df['26 Day EMA']),
+    'Signal Line': (('MACD',), lambda df: df['MACD'].ewm(span=9, adjust=False).mean()),
+    'MACD_Buy_Signal': (('MACD', 'Signal Line'), lambda df: df['MACD'].where(df['MACD'] > df['Signal Line'])),
+    'MACD_Sell_Signal': (('MACD', 'Signal Line'), lambda df: df['MACD'].where(df['MACD'] < df['Signal Line'])),
+    'Avg Gain 14': ((), _avg_gain),
+    'Avg Loss 14': ((), _avg_loss),
+    'RSI': (('Avg Gain 14', 'Avg Loss 14'), lambda df: 100 - (100 / (1 + df['Avg Gain 14'] / df['Avg Loss 14']))),
+    'RSI_Buy_Signal': (('RSI',), lambda df: df['RSI'].where(df['RSI'] < 30)),
+    'RSI_Sell_Signal': (('RSI',), lambda df: df['RSI'].where(df['RSI'] > 70)),
+    'L14': ((), lambda df: df['Low'].rolling(window=14).min()),
+    'H14': ((), lambda df: df['High'].rolling(window=14).max()),
+    '%K': (('L14', 'H14'), lambda df: 100 * ((df['Close'] - df['L14']) / (df['H14'] - df['L14']))),
+    '%D': (('%K',), lambda df: df['%K'].rolling(window=3).mean()),
+    'ADL': ((), lambda df: np.cumsum(money_flow_volume(df['High'], df['Low'], df['Close'], df['Volume']))),
+    'Chaikin_Oscillator': (('ADL',), lambda df: df['ADL'].ewm(span=3, adjust=False).mean() - df['ADL'].ewm(span=10, adjust=False).mean()),
+    'isPivot': ((), lambda df: detect_pivots(df, PIVOT_WINDOW)),
+    'pointpos': (('isPivot',), lambda df: pivot_marker_positions(df, df['isPivot'])),
+}
+
+
+def resolve(names, registry=INDICATORS):
+    """
+    Order the requested columns and everything they depend on so that each column comes
+    after its dependencies.
+
+    Parameters:
+    - names: Indicator column names.
+    - registry: Mapping of column name to (dependencies, function).
+
+    Returns:
+    - list: Column names in computation order, each listed once.
+    """
+    order = []
+    visiting = set()
+
+    def visit(name):
+        if name in order:
+            return
+        if name in visiting:
+            raise ValueError(f"Circular indicator dependency at {name!r}")
+        if name not in registry:
+            raise KeyError(f"Unknown indicator {name!r}")
+        visiting.add(name)
+        for dependency in registry[name][0]:
+            visit(dependency)
+        visiting.discard(name)
+        order.append(name)
+
+    for name in names:
+        visit(name)
+    return order
+
+
+def compute(df, names, registry=INDICATORS):
+    """
+    Add the requested indicator columns (and their dependencies) that the frame lacks.
+
+    Parameters:
+    - df: OHLCV DataFrame; modified in place.
+    - names: Indicator column names.
+    - registry: Mapping of column name to (dependencies, function).
+
+    Returns:
+    - list: The columns that were actually computed.
+    """
+    computed = []
+    for name in resolve(names, registry):
+        if name not in df.columns:
+            df[name] = registry[name][1](df)
+            computed.append(name)
+    return computed
+
+
+class IndicatorCache:
+    """
+    Least-recently-used cache of indicator frames keyed by (ticker, start, end, version).
+
+    `version` identifies the stored bars (e.g. the date of the last stored bar), so a frame
+    is rebuilt after new bars arrive. Entries grow as views request more columns.
+    """
+
+    def __init__(self, maxsize=16):
+        self.maxsize = maxsize
+        self._frames = OrderedDict()
+        self.computed = 0
+
+    def get(self, key, load, names):
+        """
+        Return the frame of a key with the requested indicator columns.
+
+        Parameters:
+        - key: Hashable (ticker, start, end, version) tuple.
+        - load: Function returning the OHLCV frame of the key; only called on a miss.
+        - names: Indicator column names the caller reads.
+
+        Returns:
+        - DataFrame: The shared frame; callers must not modify it.
+        """
+        df = self._frames.pop(key, None)
+        if df is None:
+            df = load()
+        self.computed += len(compute(df, names))
+        self._frames[key] = df
+        while len(self._frames) > self.maxsize:
+            self._frames.popitem(last=False)
+        return df
+
+    def clear(self):
+        self._frames.clear()
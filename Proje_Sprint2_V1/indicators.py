@@ -0,0 +1,593 @@
+"""
+Vectorized technical indicator library.
+
+NumPy/pandas port of the indicator module in Proje_Sprint2_V1_old/StockSeekerWebAppV4.py
+(originally: Copyright, Rinat Maksutov, 2017. License: GNU General Public License).
+Function names, parameters and output columns are unchanged, but no function iterates
+over rows or uses DataFrame.set_value (removed from pandas), so every indicator runs in
+a handful of array operations. Positions are used instead of integer labels, so the
+functions also work on date-indexed frames.
+
+Run benchmark_indicators.py to check parity with the original loop implementations
+and to measure the speedup.
+"""
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def _ewm(series, com):
+    return series.ewm(ignore_na=False, min_periods=0, com=com, adjust=True).mean()
+
+
+def _values(data, column):
+    return data[column].to_numpy(dtype='float64')
+
+
+def _lagged(values, periods):
+    # values[i - periods] at position i, NaN where that position does not exist
+    out = np.full(len(values), np.nan)
+    if periods < len(values):
+        out[periods:] = values[:len(values) - periods]
+    return out
+
+
+def _window_before(values, periods, func):
+    # func(values[i - periods:i]) at position i >= periods (current bar excluded), NaN elsewhere
+    out = np.full(len(values), np.nan)
+    if periods > 0 and len(values) > periods:
+        out[periods:] = func(sliding_window_view(values, periods)[:-1], axis=1)
+    return out
+
+
+"""
+Exponential moving average
+Source: http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:moving_averages
+Params:
+    data: pandas DataFrame
+    period: smoothing period
+    column: the name of the column with values for calculating EMA in the 'data' DataFrame
+
+Returns:
+    copy of 'data' DataFrame with 'ema[period]' column added
+"""
+def ema(data, period=0, column='<CLOSE>'):
+    data['ema' + str(period)] = data[column].ewm(ignore_na=False, min_periods=period, com=period, adjust=True).mean()
+
+    return data
+
+"""
+Moving Average Convergence/Divergence Oscillator (MACD)
+Source: http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:moving_average_convergence_divergence_macd
+Params:
+    data: pandas DataFrame
+    period_long: the longer period EMA (26 days recommended)
+    period_short: the shorter period EMA (12 days recommended)
+    period_signal: signal line EMA (9 days recommended)
+    column: the name of the column with values for calculating MACD in the 'data' DataFrame
+
+Returns:
+    copy of 'data' DataFrame with 'macd_val' and 'macd_signal_line' columns added
+"""
+def macd(data, period_long=26, period_short=12, period_signal=9, column='<CLOSE>'):
+    remove_cols = []
+    if not 'ema' + str(period_long) in data.columns:
+        data = ema(data, period_long, column)
+        remove_cols.append('ema' + str(period_long))
+
+    if not 'ema' + str(period_short) in data.columns:
+        data = ema(data, period_short, column)
+        remove_cols.append('ema' + str(period_short))
+
+    data['macd_val'] = data['ema' + str(period_short)] - data['ema' + str(period_long)]
+    data['macd_signal_line'] = _ewm(data['macd_val'], period_signal)
+
+    data = data.drop(remove_cols, axis=1)
+
+    return data
+
+"""
+Accumulation Distribution
+Source: http://stockcharts.com/school/doku.php?st=accumulation+distribution&id=chart_school:technical_indicators:accumulation_distribution_line
+Params:
+    data: pandas DataFrame
+    trend_periods: the over which to calculate AD
+    open_col: the name of the OPEN values column
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+    close_col: the name of the CLOSE values column
+    vol_col: the name of the VOL values column
+
+Returns:
+    copy of 'data' DataFrame with 'acc_dist' and 'acc_dist_ema[trend_periods]' columns added
+"""
+def acc_dist(data, trend_periods=21, open_col='<OPEN>', high_col='<HIGH>', low_col='<LOW>', close_col='<CLOSE>', vol_col='<VOL>'):
+    high, low, close, vol = (_values(data, col) for col in (high_col, low_col, close_col, vol_col))
+    span = high - low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        data['acc_dist'] = np.where(span != 0, ((close - low) - (high - close)) / span * vol, 0.)
+    data['acc_dist_ema' + str(trend_periods)] = _ewm(data['acc_dist'], trend_periods)
+
+    return data
+
+"""
+On Balance Volume (OBV)
+Source: http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:on_balance_volume_obv
+Params:
+    data: pandas DataFrame
+    trend_periods: the over which to calculate OBV
+    close_col: the name of the CLOSE values column
+    vol_col: the name of the VOL values column
+
+Returns:
+    copy of 'data' DataFrame with 'obv' and 'obv_ema[trend_periods]' columns added
+"""
+def on_balance_volume(data, trend_periods=21, close_col='<CLOSE>', vol_col='<VOL>'):
+    close, vol = _values(data, close_col), _values(data, vol_col)
+    change = np.diff(close)
+    step = np.where(change > 0, vol[1:], np.where(change < 0, -vol[1:], 0.))
+    data['obv'] = np.cumsum(np.concatenate([vol[:1], step]))
+    data['obv_ema' + str(trend_periods)] = _ewm(data['obv'], trend_periods)
+
+    return data
+
+"""
+Price-volume trend (PVT) (sometimes volume-price trend)
+Source: https://en.wikipedia.org/wiki/Volume%E2%80%93price_trend
+Params:
+    data: pandas DataFrame
+    trend_periods: the over which to calculate PVT
+    close_col: the name of the CLOSE values column
+    vol_col: the name of the VOL values column
+
+Returns:
+    copy of 'data' DataFrame with 'pvt' and 'pvt_ema[trend_periods]' columns added
+"""
+def price_volume_trend(data, trend_periods=21, close_col='<CLOSE>', vol_col='<VOL>'):
+    close, vol = _values(data, close_col), _values(data, vol_col)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        step = vol[1:] * (close[1:] - close[:-1]) / close[:-1]
+    data['pvt'] = np.cumsum(np.concatenate([vol[:1], step]))
+    data['pvt_ema' + str(trend_periods)] = _ewm(data['pvt'], trend_periods)
+
+    return data
+
+"""
+Average true range (ATR)
+Source: https://en.wikipedia.org/wiki/Average_true_range
+Params:
+    data: pandas DataFrame
+    trend_periods: the over which to calculate ATR
+    open_col: the name of the OPEN values column
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+    close_col: the name of the CLOSE values column
+    drop_tr: whether to drop the True Range values column from the resulting DataFrame
+
+Returns:
+    copy of 'data' DataFrame with 'atr' (and 'true_range' if 'drop_tr' == False) column(s) added
+"""
+def average_true_range(data, trend_periods=14, open_col='<OPEN>', high_col='<HIGH>', low_col='<LOW>', close_col='<CLOSE>', drop_tr = True):
+    prices = np.vstack([_values(data, col) for col in (high_col, low_col, close_col, open_col)])
+    highest, lowest = prices.max(axis=0), prices.min(axis=0)
+    prev_close = _lagged(_values(data, close_col), 1)
+
+    true_range = np.vstack([highest - lowest, np.abs(highest - prev_close), np.abs(lowest - prev_close)]).max(axis=0)
+    true_range[:1] = highest[:1] - lowest[:1]
+
+    data['true_range'] = true_range
+    data['atr'] = _ewm(data['true_range'], trend_periods)
+    if drop_tr:
+        data = data.drop(['true_range'], axis=1)
+
+    return data
+
+"""
+Bollinger Bands
+Source: https://en.wikipedia.org/wiki/Bollinger_Bands
+Params:
+    data: pandas DataFrame
+    trend_periods: the over which to calculate BB
+    close_col: the name of the CLOSE values column
+
+Returns:
+    copy of 'data' DataFrame with 'bol_bands_middle', 'bol_bands_upper' and 'bol_bands_lower' columns added
+"""
+def bollinger_bands(data, trend_periods=20, close_col='<CLOSE>'):
+    data['bol_bands_middle'] = _ewm(data[close_col], trend_periods)
+    close, middle = _values(data, close_col), data['bol_bands_middle'].to_numpy(dtype='float64')
+
+    # Deviation of the previous `trend_periods` closes around the current middle band
+    std = np.zeros(len(data))
+    if len(data) > trend_periods:
+        windows = sliding_window_view(close, trend_periods)[:-1]
+        std[trend_periods:] = np.sqrt(np.square(windows - middle[trend_periods:, None]).sum(axis=1) / trend_periods)
+
+    d = 2
+    data['bol_bands_upper'] = middle + (d * std)
+    data['bol_bands_lower'] = middle - (d * std)
+
+    return data
+
+"""
+Chaikin Oscillator
+Source: http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:chaikin_oscillator
+Params:
+    data: pandas DataFrame
+    periods_short: period for the shorter EMA (3 days recommended)
+    periods_long: period for the longer EMA (10 days recommended)
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+    close_col: the name of the CLOSE values column
+    vol_col: the name of the VOL values column
+
+Returns:
+    copy of 'data' DataFrame with 'ch_osc' column added
+"""
+def chaikin_oscillator(data, periods_short=3, periods_long=10, high_col='<HIGH>',
+                       low_col='<LOW>', close_col='<CLOSE>', vol_col='<VOL>'):
+    high, low, close, vol = (_values(data, col) for col in (high_col, low_col, close_col, vol_col))
+    span = high - low
+    with np.errstate(divide='ignore', invalid='ignore'):
+        flow = np.where(span != 0, ((close - low) - (high - close)) / span * vol, 0.)
+    ac = pd.Series(np.cumsum(flow), index=data.index)
+
+    ema_long = _ewm(ac, periods_long)
+    ema_short = _ewm(ac, periods_short)
+    data['ch_osc'] = ema_short - ema_long
+
+    return data
+
+"""
+Typical Price
+Source: https://en.wikipedia.org/wiki/Typical_price
+Params:
+    data: pandas DataFrame
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+    close_col: the name of the CLOSE values column
+
+Returns:
+    copy of 'data' DataFrame with 'typical_price' column added
+"""
+def typical_price(data, high_col = '<HIGH>', low_col = '<LOW>', close_col = '<CLOSE>'):
+
+    data['typical_price'] = (data[high_col] + data[low_col] + data[close_col]) / 3
+
+    return data
+
+"""
+Ease of Movement
+Source: http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:ease_of_movement_emv
+Params:
+    data: pandas DataFrame
+    period: period for calculating EMV
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+    vol_col: the name of the VOL values column
+
+Returns:
+    copy of 'data' DataFrame with 'emv' and 'emv_ema_[period]' columns added
+"""
+def ease_of_movement(data, period=14, high_col='<HIGH>', low_col='<LOW>', vol_col='<VOL>'):
+    high, low, vol = (_values(data, col) for col in (high_col, low_col, vol_col))
+    midpoint = (high + low) / 2
+    midpoint_move = np.zeros(len(data))
+    midpoint_move[1:] = midpoint[1:] - midpoint[:-1]
+
+    diff = high - low
+    diff = np.where(diff == 0, 0.000000001, diff)  # this is to avoid division by zero below
+    vol = np.where(vol == 0, 1, vol)
+    box_ratio = (vol / 100000000) / diff
+    data['emv'] = midpoint_move / box_ratio
+
+    data['emv_ema_'+str(period)] = _ewm(data['emv'], period)
+
+    return data
+
+"""
+Mass Index
+Source: http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:mass_index
+Params:
+    data: pandas DataFrame
+    period: period for calculating MI (25 days recommended)
+    ema_period: period of the single and double EMA of the high-low range (9 days recommended)
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+
+Returns:
+    copy of 'data' DataFrame with 'mass_index' column added
+"""
+def mass_index(data, period=25, ema_period=9, high_col='<HIGH>', low_col='<LOW>'):
+    high_low = data[high_col] - data[low_col] + 0.000001  # this is to avoid division by zero below
+    ema = _ewm(high_low, ema_period)
+    ema_ema = _ewm(ema, ema_period)
+    div = (ema / ema_ema).to_numpy(dtype='float64')
+
+    # Sum of the ratio over the previous `period` bars, 0 until enough bars exist
+    data['mass_index'] = np.where(np.arange(len(data)) >= period, _window_before(div, period, np.nansum), 0.)
+
+    return data
+
+"""
+Average directional movement index
+Source: https://en.wikipedia.org/wiki/Average_directional_movement_index
+Params:
+    data: pandas DataFrame
+    periods: period for calculating ADX (14 days recommended)
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+
+Returns:
+    copy of 'data' DataFrame with 'adx', 'dxi', 'di_plus', 'di_minus' columns added
+"""
+def directional_movement_index(data, periods=14, high_col='<HIGH>', low_col='<LOW>'):
+    remove_tr_col = False
+    if not 'true_range' in data.columns:
+        data = average_true_range(data, high_col=high_col, low_col=low_col, drop_tr = False)
+        remove_tr_col = True
+
+    high, low = _values(data, high_col), _values(data, low_col)
+    m_plus, m_minus = np.zeros(len(data)), np.zeros(len(data))
+    m_plus[1:] = high[1:] - high[:-1]
+    m_minus[1:] = low[1:] - low[:-1]
+
+    dm_plus = np.where((m_plus > m_minus) & (m_plus > 0), m_plus, 0.)
+    dm_minus = np.where((m_minus > m_plus) & (m_minus > 0), m_minus, 0.)
+
+    true_range = data['true_range']
+    data['di_plus'] = _ewm(dm_plus / true_range, periods)
+    data['di_minus'] = _ewm(dm_minus / true_range, periods)
+
+    dxi = (np.abs(data['di_plus'] - data['di_minus']) / (data['di_plus'] + data['di_minus'])).to_numpy(dtype='float64', copy=True)
+    dxi[:1] = 1.
+    data['dxi'] = dxi
+    data['adx'] = _ewm(data['dxi'], periods)
+    if remove_tr_col:
+        data = data.drop(['true_range'], axis=1)
+
+    return data
+
+"""
+Money Flow Index (MFI)
+Source: http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:money_flow_index_mfi
+Params:
+    data: pandas DataFrame
+    periods: period for calculating MFI (14 days recommended)
+    vol_col: the name of the VOL values column
+    high_col, low_col, close_col: columns used for the typical price if it is not present yet
+
+Returns:
+    copy of 'data' DataFrame with 'money_flow_index' column added
+"""
+def money_flow_index(data, periods=14, vol_col='<VOL>', high_col='<HIGH>', low_col='<LOW>', close_col='<CLOSE>'):
+    remove_tp_col = False
+    if not 'typical_price' in data.columns:
+        data = typical_price(data, high_col, low_col, close_col)
+        remove_tp_col = True
+
+    price = _values(data, 'typical_price')
+    money_flow = price * _values(data, vol_col)
+
+    # Same split as the original library: a falling typical price counts as positive flow
+    falling = price[1:] < price[:-1]
+    money_flow_positive, money_flow_negative = np.zeros(len(data)), np.zeros(len(data))
+    money_flow_positive[1:] = np.where(falling, money_flow[1:], 0.)
+    money_flow_negative[1:] = np.where(falling, 0., money_flow[1:])
+
+    positive_sum = _window_before(money_flow_positive, periods, np.nansum)
+    negative_sum = _window_before(money_flow_negative, periods, np.nansum)
+    negative_sum = np.where(negative_sum == 0., 0.00001, negative_sum)  # this is to avoid division by zero below
+    m_r = positive_sum / negative_sum
+    data['money_flow_index'] = np.where(np.arange(len(data)) >= periods, 1 - (1 / (1 + m_r)), 0.)
+
+    if remove_tp_col:
+        data = data.drop(['typical_price'], axis=1)
+
+    return data
+
+
+def _volume_index(data, periods, close_col, vol_col, column, update):
+    # The original recurrence prev + (close - prev_close / prev_close * prev) reduces to
+    # the close price on update bars; the index keeps its previous value on other bars
+    close = _values(data, close_col)
+    prev_close = _lagged(close, 1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = close * (prev_close / prev_close)
+    values[:1] = 1000
+
+    positions = np.where(update, np.arange(len(data)), 0)
+    positions[:1] = 0
+    data[column] = values[np.maximum.accumulate(positions)] if len(data) else values
+    data[column + '_ema'] = _ewm(data[column], periods)
+
+    return data
+
+"""
+Negative Volume Index (NVI)
+Source: http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:negative_volume_inde
+Params:
+    data: pandas DataFrame
+    periods: period for calculating NVI (255 days recommended)
+    close_col: the name of the CLOSE values column
+    vol_col: the name of the VOL values column
+
+Returns:
+    copy of 'data' DataFrame with 'nvi' and 'nvi_ema' columns added
+"""
+def negative_volume_index(data, periods=255, close_col='<CLOSE>', vol_col='<VOL>'):
+    vol = _values(data, vol_col)
+    return _volume_index(data, periods, close_col, vol_col, 'nvi', vol < _lagged(vol, 1))
+
+"""
+Positive Volume Index (PVI)
+Source: https://www.equities.com/news/the-secret-to-the-positive-volume-index
+Params:
+    data: pandas DataFrame
+    periods: period for calculating PVI (255 days recommended)
+    close_col: the name of the CLOSE values column
+    vol_col: the name of the VOL values column
+
+Returns:
+    copy of 'data' DataFrame with 'pvi' and 'pvi_ema' columns added
+"""
+def positive_volume_index(data, periods=255, close_col='<CLOSE>', vol_col='<VOL>'):
+    vol = _values(data, vol_col)
+    return _volume_index(data, periods, close_col, vol_col, 'pvi', vol > _lagged(vol, 1))
+
+"""
+Momentum
+Source: https://en.wikipedia.org/wiki/Momentum_(technical_analysis)
+Params:
+    data: pandas DataFrame
+    periods: period for calculating momentum
+    close_col: the name of the CLOSE values column
+
+Returns:
+    copy of 'data' DataFrame with 'momentum' column added
+"""
+def momentum(data, periods=14, close_col='<CLOSE>'):
+    close = _values(data, close_col)
+    prev_close = _lagged(close, periods)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        val_perc = (close - prev_close) / prev_close
+    data['momentum'] = np.where(np.arange(len(data)) >= periods, val_perc, 0.)
+
+    return data
+
+"""
+Relative Strenght Index
+Source: https://en.wikipedia.org/wiki/Relative_strength_index
+Params:
+    data: pandas DataFrame
+    periods: period for calculating momentum
+    close_col: the name of the CLOSE values column
+
+Returns:
+    copy of 'data' DataFrame with 'rsi' column added
+"""
+def rsi(data, periods=14, close_col='<CLOSE>'):
+    close = _values(data, close_col)
+    prev_close = _lagged(close, periods)
+    rsi_u = pd.Series(np.where(prev_close < close, close - prev_close, 0.), index=data.index)
+    rsi_d = pd.Series(np.where(prev_close > close, prev_close - close, 0.), index=data.index)
+
+    ema_u, ema_d = _ewm(rsi_u, periods), _ewm(rsi_d, periods)
+    data['rsi'] = ema_u / (ema_u + ema_d)
+
+    return data
+
+"""
+Chaikin Volatility (CV)
+Source: https://www.marketvolume.com/technicalanalysis/chaikinvolatility.asp
+Params:
+    data: pandas DataFrame
+    ema_periods: period for smoothing Highest High and Lowest Low difference
+    change_periods: the period for calculating the difference between Highest High and Lowest Low
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+    close_col: the name of the CLOSE values column
+
+Returns:
+    copy of 'data' DataFrame with 'chaikin_volatility' column added
+"""
+def chaikin_volatility(data, ema_periods=10, change_periods=10, high_col='<HIGH>', low_col='<LOW>', close_col='<CLOSE>'):
+    ch_vol_ema = _ewm(data[high_col] - data[low_col], ema_periods).to_numpy(dtype='float64')
+    prev_value = _lagged(ch_vol_ema, change_periods)
+    prev_value = np.where(prev_value == 0, 0.0001, prev_value)  # this is to avoid division by zero below
+    data['chaikin_volatility'] = np.where(np.arange(len(data)) >= change_periods,
+                                          (ch_vol_ema - prev_value) / prev_value, 0.)
+
+    return data
+
+"""
+William's Accumulation/Distribution
+Source: https://www.metastock.com/customer/resources/taaz/?p=125
+Params:
+    data: pandas DataFrame
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+    close_col: the name of the CLOSE values column
+
+Returns:
+    copy of 'data' DataFrame with 'williams_ad' column added
+"""
+def williams_ad(data, high_col='<HIGH>', low_col='<LOW>', close_col='<CLOSE>'):
+    high, low, close = (_values(data, col) for col in (high_col, low_col, close_col))
+    prev_close = _lagged(close, 1)
+    ad = np.where(close > prev_close, close - np.minimum(prev_close, low),
+                  np.where(close < prev_close, close - np.maximum(prev_close, high), 0.))
+    ad[:1] = 0.
+    data['williams_ad'] = np.cumsum(ad)
+
+    return data
+
+"""
+William's % R
+Source: https://www.metastock.com/customer/resources/taaz/?p=126
+Params:
+    data: pandas DataFrame
+    periods: the period over which to calculate the indicator value
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+    close_col: the name of the CLOSE values column
+
+Returns:
+    copy of 'data' DataFrame with 'williams_r' column added
+"""
+def williams_r(data, periods=14, high_col='<HIGH>', low_col='<LOW>', close_col='<CLOSE>'):
+    highest = _window_before(_values(data, high_col), periods, np.max)
+    lowest = _window_before(_values(data, low_col), periods, np.min)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        value = (highest - _values(data, close_col)) / (highest - lowest)
+    data['williams_r'] = np.where(np.arange(len(data)) > periods, value, 0.)
+
+    return data
+
+"""
+TRIX
+Source: https://www.metastock.com/customer/resources/taaz/?p=114
+Params:
+    data: pandas DataFrame
+    periods: the period over which to calculate the indicator value
+    signal_periods: the period for signal moving average
+    close_col: the name of the CLOSE values column
+
+Returns:
+    copy of 'data' DataFrame with 'trix' and 'trix_signal' columns added
+"""
+def trix(data, periods=14, signal_periods=9, close_col='<CLOSE>'):
+    data['trix'] = _ewm(_ewm(_ewm(data[close_col], periods), periods), periods)
+    data['trix_signal'] = _ewm(data['trix'], signal_periods)
+
+    return data
+
+"""
+Ultimate Oscillator
+Source: http://stockcharts.com/school/doku.php?id=chart_school:technical_indicators:ultimate_oscillator
+Params:
+    data: pandas DataFrame
+    period_1: the period of the first average (7 days recommended)
+    period_2: the period of the second average (14 days recommended)
+    period_3: the period of the third average (28 days recommended)
+    high_col: the name of the HIGH values column
+    low_col: the name of the LOW values column
+    close_col: the name of the CLOSE values column
+
+Returns:
+    copy of 'data' DataFrame with 'ultimate_oscillator' column added
+"""
+def ultimate_oscillator(data, period_1=7,period_2=14, period_3=28, high_col='<HIGH>', low_col='<LOW>', close_col='<CLOSE>'):
+    high, low, close = (_values(data, col) for col in (high_col, low_col, close_col))
+    uo_bp, uo_tr = np.zeros(len(data)), np.zeros(len(data))
+    uo_bp[1:] = close[1:] - np.minimum(low[1:], close[:-1])
+    uo_tr[1:] = np.maximum(high[1:], close[:-1]) - np.minimum(low[1:], close[:-1])
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        uo_avg_1, uo_avg_2, uo_avg_3 = (_window_before(uo_bp, period, np.sum) / _window_before(uo_tr, period, np.sum)
+                                        for period in (period_1, period_2, period_3))
+    uo = (4 * uo_avg_1 + 2 * uo_avg_2 + uo_avg_3) / 7
+    data['ultimate_oscillator'] = np.where(np.arange(len(data)) >= period_3, uo, 0.)
+
+    return data
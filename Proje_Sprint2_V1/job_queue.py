@@ -0,0 +1,223 @@
+# job_queue.py
+"""
+Background job queue for long-running work of the web app (model training, downloads).
+
+Jobs run in a pool of worker processes shared by all sessions, so a training run neither
+freezes the Streamlit script that started it nor queues other users behind it (up to one
+job per worker). A job's ID is derived from the function and its key, so identical
+requests, e.g. two sessions asking for the same model or a rerun of the script, attach to
+the same job, and finished results stay cached until they are evicted. Workers report
+progress through report_progress; the app polls job status and renders results once done.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+from model_registry import DEFAULT_REGISTRY_DIR
+from price_store import DEFAULT_STORE_DIR, PriceStore
+
+# Job states
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+
+# Set in worker processes by _init_worker / _run
+_progress_queue = None
+_current_job = None
+
+
+def _init_worker(progress_queue, threads_per_worker):
+    global _progress_queue
+    from train_models import _init_worker as limit_threads
+
+    _progress_queue = progress_queue
+    limit_threads(threads_per_worker)
+
+
+def report_progress(fraction, message=''):
+    """
+    Report the progress of the job running in this worker (ignored outside a JobQueue worker).
+
+    Parameters:
+    - fraction: Share of the work done, between 0 and 1.
+    - message: Short status text shown next to the progress bar.
+    """
+    if _progress_queue is not None and _current_job is not None:
+        _progress_queue.put((_current_job, min(max(float(fraction), 0.), 1.), message))
+
+
+def _run(job_id, func, args, kwargs):
+    global _current_job
+    _current_job = job_id
+    report_progress(0., 'started')
+    try:
+        return func(*args, **kwargs)
+    except Exception as exc:
+        # Tracebacks do not survive pickling, so send the formatted text back instead
+        raise RuntimeError(f"{type(exc).__name__}: {exc}\n{traceback.format_exc()}") from None
+    finally:
+        _current_job = None
+
+
+class Job:
+    """
+    Status of one submitted job, as seen by the app process.
+    """
+
+    def __init__(self, job_id, name, future):
+        self.job_id = job_id
+        self.name = name
+        self.future = future
+        self.submitted_at = time.time()
+        self.started = False
+        self.progress = 0.
+        self.message = ''
+
+    @property
+    def status(self):
+        if self.future.done():
+            return FAILED if self.future.exception() is not None else DONE
+        return RUNNING if self.started else PENDING
+
+    @property
+    def finished(self):
+        return self.future.done()
+
+    @property
+    def error(self):
+        return str(self.future.exception()) if self.status == FAILED else None
+
+    def result(self):
+        """
+        Return the job's result, or None while it is still pending or running.
+        """
+        return self.future.result() if self.status == DONE else None
+
+
+class JobQueue:
+    """
+    Process pool with job IDs, progress reporting and a cache of finished results.
+
+    Parameters:
+    - max_workers: Number of worker processes (default: number of CPUs).
+    - threads_per_worker: TensorFlow/OpenMP threads per worker.
+    - max_finished: Number of finished jobs whose results are kept.
+    """
+
+    def __init__(self, max_workers=None, threads_per_worker=1, max_finished=64):
+        context = multiprocessing.get_context('spawn')
+        self.max_finished = max_finished
+        self._progress = context.Queue()
+        self._pool = ProcessPoolExecutor(max_workers=max_workers or os.cpu_count(), mp_context=context,
+                                         initializer=_init_worker, initargs=(self._progress, threads_per_worker))
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        threading.Thread(target=self._collect_progress, daemon=True).start()
+
+    def _collect_progress(self):
+        while True:
+            job_id, fraction, message = self._progress.get()
+            with self._lock:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job.started = True
+                    job.progress = fraction
+                    job.message = message
+
+    @staticmethod
+    def make_job_id(func, key):
+        name = f"{func.__module__}.{func.__qualname__}"
+        return hashlib.sha1(json.dumps([name, key], sort_keys=True, default=str).encode()).hexdigest()[:16]
+
+    def submit(self, func, args=(), kwargs=None, key=None, name=None, force=False):
+        """
+        Run func(*args, **kwargs) in a worker process unless the same job already exists.
+
+        Parameters:
+        - func: Module-level function (it is imported by name in the worker).
+        - args, kwargs: Arguments of the call; they must be picklable.
+        - key: JSON-serialisable identity of the job (default: args and kwargs). Jobs with the
+          same function and key share one run and one cached result.
+        - name: Label shown in the UI.
+        - force: Start a new run even if a finished (or failed) job with the same ID is cached.
+          Failed jobs are otherwise kept, so polling callers do not retry them in a loop.
+
+        Returns:
+        - str: The job ID.
+        """
+        kwargs = kwargs or {}
+        job_id = self.make_job_id(func, key if key is not None else [args, kwargs])
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is not None and not (force and job.finished):
+                self._jobs.move_to_end(job_id)
+                return job_id
+            future = self._pool.submit(_run, job_id, func, args, kwargs)
+            self._jobs[job_id] = Job(job_id, name or func.__name__, future)
+            self._evict()
+        return job_id
+
+    def _evict(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+        for job_id in finished[:max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+    def get(self, job_id):
+        """
+        Return the Job of an ID, or None if it is unknown or was evicted.
+        """
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self):
+        with self._lock:
+            return list(self._jobs.values())
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+
+
+# Jobs submitted by the web app
+
+def train_lstm_job(key, dataset, profile, registry_dir=DEFAULT_REGISTRY_DIR):
+    """
+    Train the LSTM of a registry key on a (n, 1) price array and store it in the registry.
+
+    Returns:
+    - dict: The training report saved as the model's metrics.
+    """
+    from lstm_model import train_lstm
+    from model_registry import ModelRegistry
+
+    def progress(epoch, max_epochs):
+        report_progress(epoch / max_epochs, f"epoch {epoch} of at most {max_epochs}")
+
+    model, scaler, report = train_lstm(dataset, key['window'], profile=profile, horizon=key.get('horizon') or 1,
+                                       progress=progress)
+    ModelRegistry(registry_dir).save(key, model, scaler, report)
+    return report
+
+
+def download_prices_job(tickers, start, end, incremental=False, store_dir=DEFAULT_STORE_DIR):
+    """
+    Bring the price store up to date for a list of tickers.
+
+    Returns:
+    - dict: Number of stored bars per ticker in the requested range.
+    """
+    store = PriceStore(store_dir)
+    if incremental:
+        for i, ticker in enumerate(tickers):
+            report_progress(i / (len(tickers) + 1), f"refreshing {ticker}")
+            store.refresh(ticker)
+    report_progress(len(tickers) / (len(tickers) + 1) if incremental else 0.5, "downloading")
+    panel = store.get_many(tickers, start, end)
+    return {ticker: int(panel[ticker].dropna(how='all').shape[0]) for ticker in tickers}
@@ -0,0 +1,154 @@
+# lstm_model.py
+
+import time
+
+import numpy as np
+from sklearn.preprocessing import MinMaxScaler
+
+from windowing import make_windows
+
+# Named speed/quality tradeoffs for LSTM training. Every profile trains on mini-batches,
+# holds out the last `validation_split` of the training windows, stops once the validation
+# loss stops improving and lowers the learning rate on plateaus.
+TRAINING_PROFILES = {
+    'fast': {'batch_size': 64, 'epochs': 10, 'validation_split': 0.1,
+             'early_stopping_patience': 2, 'lr_patience': 1, 'lr_factor': 0.5},
+    'balanced': {'batch_size': 32, 'epochs': 30, 'validation_split': 0.1,
+                 'early_stopping_patience': 4, 'lr_patience': 2, 'lr_factor': 0.5},
+    'accurate': {'batch_size': 16, 'epochs': 100, 'validation_split': 0.15,
+                 'early_stopping_patience': 8, 'lr_patience': 3, 'lr_factor': 0.3},
+}
+DEFAULT_PROFILE = 'balanced'
+
+
+def build_lstm_model(window=60, n_features=1, n_outputs=1):
+    """
+    Build the two-layer LSTM used for price prediction.
+
+    Keras is imported here rather than at module level so that code paths that only
+    load cached predictions never pay for the TensorFlow import.
+
+    Parameters:
+    - window: Number of past bars fed to the network.
+    - n_features: Number of input features per bar.
+    - n_outputs: Number of future bars predicted at once (1 for one-step models,
+      the horizon for direct multi-step models).
+
+    Returns:
+    - keras.Model: Compiled (untrained) model.
+    """
+    from keras.models import Sequential
+    from keras.layers import Dense, LSTM
+
+    model = Sequential()
+    model.add(LSTM(128, return_sequences=True, input_shape=(window, n_features)))
+    model.add(LSTM(64, return_sequences=False))
+    model.add(Dense(25))
+    model.add(Dense(n_outputs))
+    model.compile(optimizer='adam', loss='mean_squared_error')
+    return model
+
+
+def prepare_training_data(dataset, window=60, train_fraction=0.95, horizon=1):
+    """
+    Scale a (n, 1) price array and build the LSTM training windows.
+
+    Parameters:
+    - dataset: numpy array of shape (n, 1) with closing prices.
+    - window: Number of past bars per training sample.
+    - train_fraction: Share of the history used for training.
+    - horizon: Number of future bars in each target.
+
+    Returns:
+    - tuple: (scaled_data, scaler, training_data_len, x_train, y_train)
+    """
+    training_data_len = int(np.ceil(len(dataset) * train_fraction))
+    scaler = MinMaxScaler(feature_range=(0, 1))
+    scaled_data = scaler.fit_transform(dataset)
+
+    train_data = scaled_data[0:int(training_data_len), :]
+    x_train, y_train = make_windows(train_data, window, horizon)
+    return scaled_data, scaler, training_data_len, x_train, y_train
+
+
+def fit_profile(model, x_train, y_train, profile=DEFAULT_PROFILE, progress=None):
+    """
+    Fit a compiled model with the settings of a training profile.
+
+    Parameters:
+    - model: Compiled keras model.
+    - x_train, y_train: Training windows and targets, oldest first.
+    - profile: Name of an entry in TRAINING_PROFILES.
+    - progress: Optional function called as progress(epoch, max_epochs) after every epoch.
+
+    Returns:
+    - tuple: (val_losses, train_seconds) with the validation loss of every epoch run.
+    """
+    from keras.callbacks import EarlyStopping, LambdaCallback, ReduceLROnPlateau
+
+    if profile not in TRAINING_PROFILES:
+        raise ValueError(f"Unknown training profile {profile!r}, expected one of {sorted(TRAINING_PROFILES)}")
+    settings = TRAINING_PROFILES[profile]
+
+    started = time.perf_counter()
+    callbacks = [
+        EarlyStopping(monitor='val_loss', patience=settings['early_stopping_patience'], restore_best_weights=True),
+        ReduceLROnPlateau(monitor='val_loss', factor=settings['lr_factor'], patience=settings['lr_patience'], min_lr=1e-5),
+    ]
+    if progress is not None:
+        callbacks.append(LambdaCallback(on_epoch_end=lambda epoch, logs: progress(epoch + 1, settings['epochs'])))
+    # validation_split takes the last windows, so validation stays after training in time
+    history = model.fit(x_train, y_train, batch_size=settings['batch_size'], epochs=settings['epochs'],
+                        validation_split=settings['validation_split'], callbacks=callbacks, verbose=0)
+    return history.history['val_loss'], time.perf_counter() - started
+
+
+def train_lstm(dataset, window=60, train_fraction=0.95, profile=DEFAULT_PROFILE, horizon=1, progress=None):
+    """
+    Fit the LSTM on the first `train_fraction` of a (n, 1) price array.
+
+    Parameters:
+    - dataset: numpy array of shape (n, 1) with closing prices.
+    - window: Number of past bars per training sample.
+    - train_fraction: Share of the history used for training.
+    - profile: Name of an entry in TRAINING_PROFILES.
+    - horizon: Number of future bars predicted at once (see forecast.direct_forecast).
+    - progress: Optional per-epoch callback, see fit_profile.
+
+    Returns:
+    - tuple: (model, scaler, report) where report holds the profile, the epochs run,
+      the wall-clock training time and the best validation RMSE in price units.
+    """
+    started = time.perf_counter()
+    _, scaler, _, x_train, y_train = prepare_training_data(dataset, window, train_fraction, horizon)
+    model = build_lstm_model(window, n_outputs=horizon)
+    val_losses, _ = fit_profile(model, x_train, y_train, profile, progress)
+
+    # The loss is MSE on the MinMax-scaled prices; dividing by the scale gives price units
+    report = {
+        'profile': profile,
+        'epochs': len(val_losses),
+        'train_seconds': round(time.perf_counter() - started, 3),
+        'val_rmse': float(np.sqrt(min(val_losses)) / scaler.scale_[0]),
+    }
+    return model, scaler, report
+
+
+def predict_holdout(model, scaler, dataset, window=60, train_fraction=0.95):
+    """
+    Predict the held-out tail of a (n, 1) price array one step ahead.
+
+    Returns:
+    - tuple: (predictions, rmse) where predictions has shape (n_test, 1) in price units.
+    """
+    training_data_len = int(np.ceil(len(dataset) * train_fraction))
+    scaled_data = scaler.transform(dataset)
+
+    test_data = scaled_data[training_data_len - window:, :]
+    x_test, _ = make_windows(test_data, window)
+    y_test = dataset[training_data_len:, :]
+
+    predictions = model.predict(x_test, verbose=0)
+    predictions = scaler.inverse_transform(predictions)
+    rmse = float(np.sqrt(np.mean((predictions - y_test) ** 2)))
+    return predictions, rmse
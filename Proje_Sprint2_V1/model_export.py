@@ -0,0 +1,279 @@
+# model_export.py
+"""
+Export trained price models to portable formats and serve them without TensorFlow.
+
+- Registry LSTM models are converted to ONNX (tf2onnx is only needed at export time) and
+  run with onnxruntime; their MinMaxScaler is stored as plain arrays next to them.
+- Shipped GradientBoosting models are flattened into NumPy arrays (<TICKER>_model.npz) and
+  evaluated with a vectorized tree traversal, so serving them needs neither sklearn nor joblib.
+  Their feature standardizer, fitted once on the training range, is saved next to them.
+
+Usage:
+    python model_export.py                 # every registry model and every shipped GBR model
+    python model_export.py --gbr-only
+    python model_export.py --registry-only --registry-dir model_registry
+"""
+
+import argparse
+import glob
+import os
+
+import numpy as np
+
+# Name of the input tensor of exported LSTM graphs
+ONNX_INPUT_NAME = 'window'
+
+
+class ArrayMinMaxScaler:
+    """
+    The transform/inverse_transform of a fitted MinMaxScaler, rebuilt from its arrays.
+    """
+
+    def __init__(self, scale, min_):
+        self.scale_ = np.asarray(scale, dtype='float64')
+        self.min_ = np.asarray(min_, dtype='float64')
+
+    @classmethod
+    def from_sklearn(cls, scaler):
+        return cls(scaler.scale_, scaler.min_)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['scale'], data['min'])
+
+    def save(self, path):
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, scale=self.scale_, min=self.min_)
+        os.replace(path + '.tmp', path)
+
+    def transform(self, x):
+        return np.asarray(x, dtype='float64') * self.scale_ + self.min_
+
+    def inverse_transform(self, x):
+        return (np.asarray(x, dtype='float64') - self.min_) / self.scale_
+
+
+class ArrayStandardScaler:
+    """
+    Per-column standardization (x - mean) / scale with arrays stored as .npz, like sklearn's StandardScaler.
+    """
+
+    def __init__(self, mean, scale):
+        self.mean_ = np.asarray(mean, dtype='float64')
+        self.scale_ = np.asarray(scale, dtype='float64')
+
+    @classmethod
+    def fit(cls, x):
+        x = np.asarray(x, dtype='float64')
+        scale = x.std(axis=0)
+        # Constant columns are only centered
+        scale[scale == 0] = 1.
+        return cls(x.mean(axis=0), scale)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data['mean'], data['scale'])
+
+    def save(self, path):
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, mean=self.mean_, scale=self.scale_)
+        os.replace(path + '.tmp', path)
+
+    def transform(self, x):
+        return (np.asarray(x, dtype='float64') - self.mean_) / self.scale_
+
+
+class OnnxPriceModel:
+    """
+    onnxruntime session behind the predict/predict_on_batch interface of a keras model,
+    so predict_holdout and the forecast functions can use it unchanged.
+    """
+
+    def __init__(self, path, threads=1):
+        import onnxruntime as ort
+
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+        self.input_name = self.session.get_inputs()[0].name
+
+    def predict_on_batch(self, x):
+        return self.session.run(None, {self.input_name: np.asarray(x, dtype='float32')})[0]
+
+    def predict(self, x, verbose=0):
+        return self.predict_on_batch(x)
+
+
+def onnxruntime_available():
+    try:
+        import onnxruntime  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def export_lstm_onnx(model, path, window=60, n_features=1, opset=13):
+    """
+    Convert a keras LSTM to an ONNX file.
+
+    Parameters:
+    - model: Trained keras model.
+    - path: Output .onnx path.
+    - window: Number of past bars fed to the network.
+    - n_features: Number of input features per bar.
+    - opset: ONNX opset version.
+    """
+    import tensorflow as tf
+    import tf2onnx
+
+    signature = (tf.TensorSpec((None, window, n_features), tf.float32, name=ONNX_INPUT_NAME),)
+    tf2onnx.convert.from_keras(model, input_signature=signature, opset=opset, output_path=path + '.tmp')
+    os.replace(path + '.tmp', path)
+
+
+def export_registry_model(registry, key):
+    """
+    Export one registry model to ONNX (plus its scaler arrays) next to its joblib bundle.
+
+    Returns:
+    - str: Path of the written .onnx file.
+    """
+    onnx_path, scaler_path = registry.onnx_paths(key)
+    model, scaler = registry.load_keras(key)
+    export_lstm_onnx(model, onnx_path, key['window'])
+    if scaler is not None:
+        ArrayMinMaxScaler.from_sklearn(scaler).save(scaler_path)
+    return onnx_path
+
+
+class TreeEnsemble:
+    """
+    A fitted GradientBoostingRegressor as flat NumPy arrays.
+
+    All trees are concatenated into one node table (child indices shifted by each tree's
+    offset), and predict walks every (sample, tree) pair down one level per iteration.
+    """
+
+    FIELDS = ('left', 'right', 'feature', 'threshold', 'value', 'roots', 'learning_rate', 'baseline', 'max_depth')
+
+    def __init__(self, left, right, feature, threshold, value, roots, learning_rate, baseline, max_depth):
+        self.left = np.asarray(left, dtype='int32')
+        self.right = np.asarray(right, dtype='int32')
+        self.feature = np.asarray(feature, dtype='int32')
+        self.threshold = np.asarray(threshold, dtype='float64')
+        self.value = np.asarray(value, dtype='float64')
+        self.roots = np.asarray(roots, dtype='int32')
+        self.learning_rate = float(learning_rate)
+        self.baseline = float(baseline)
+        self.max_depth = int(max_depth)
+
+    @classmethod
+    def from_sklearn(cls, model):
+        """
+        Flatten a fitted (single-output) GradientBoostingRegressor.
+        """
+        trees = [estimator.tree_ for estimator in model.estimators_[:, 0]]
+        offsets = np.concatenate([[0], np.cumsum([tree.node_count for tree in trees])[:-1]]).astype('int32')
+
+        def stack(field, shift=False):
+            parts = []
+            for tree, offset in zip(trees, offsets):
+                values = getattr(tree, field)
+                parts.append(np.where(values >= 0, values + offset, -1) if shift else values)
+            return np.concatenate(parts)
+
+        n_features = model.n_features_in_
+        baseline = 0. if model.init_ == 'zero' else float(np.ravel(model.init_.predict(np.zeros((1, n_features))))[0])
+        return cls(left=stack('children_left', shift=True),
+                   right=stack('children_right', shift=True),
+                   # Leaves have feature -2; any valid column works since leaves are never split
+                   feature=np.maximum(stack('feature'), 0),
+                   threshold=stack('threshold'),
+                   value=np.concatenate([tree.value[:, 0, 0] for tree in trees]),
+                   roots=offsets,
+                   learning_rate=model.learning_rate,
+                   baseline=baseline,
+                   max_depth=max(tree.max_depth for tree in trees))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(**{field: data[field] for field in cls.FIELDS})
+
+    def save(self, path):
+        with open(path + '.tmp', 'wb') as f:
+            np.savez(f, **{field: getattr(self, field) for field in self.FIELDS})
+        os.replace(path + '.tmp', path)
+
+    def predict(self, X):
+        # sklearn compares float32 features against float64 thresholds
+        X = np.asarray(X, dtype='float32').astype('float64')
+        rows = np.arange(len(X))[:, None]
+        node = np.repeat(self.roots[None, :], len(X), axis=0)
+        for _ in range(self.max_depth):
+            left = self.left[node]
+            leaf = left < 0
+            if leaf.all():
+                break
+            go_left = X[rows, self.feature[node]] <= self.threshold[node]
+            node = np.where(leaf, node, np.where(go_left, left, self.right[node]))
+        return self.baseline + self.learning_rate * self.value[node].sum(axis=1)
+
+
+def export_gbr_models(model_dir):
+    """
+    Write <TICKER>_model.npz next to every shipped GradientBoosting <TICKER>_model.pkl, plus
+    the feature scaler fitted on the training range (<TICKER>_model.scaler.npz) if it is missing.
+
+    Returns:
+    - list: Paths of the written .npz files.
+    """
+    import joblib
+
+    from gbr_models import _is_gbr_pickle, fit_gbr_scaler, gbr_scaler_path
+
+    written = []
+    for pkl_path in sorted(glob.glob(os.path.join(model_dir, '*_model.pkl'))):
+        if not _is_gbr_pickle(pkl_path):
+            continue
+        npz_path = pkl_path[:-len('.pkl')] + '.npz'
+        TreeEnsemble.from_sklearn(joblib.load(pkl_path)).save(npz_path)
+        written.append(npz_path)
+        ticker = os.path.basename(pkl_path)[:-len('_model.pkl')]
+        scaler_path = gbr_scaler_path(ticker, model_dir)
+        if not os.path.exists(scaler_path):
+            fit_gbr_scaler(ticker).save(scaler_path)
+            written.append(scaler_path)
+    return written
+
+
+def main():
+    from gbr_models import GBR_MODEL_DIR
+    from model_registry import DEFAULT_REGISTRY_DIR, ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Export price models for TensorFlow-free inference.")
+    parser.add_argument('--registry-dir', default=DEFAULT_REGISTRY_DIR)
+    parser.add_argument('--gbr-dir', default=GBR_MODEL_DIR)
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--gbr-only', action='store_true')
+    group.add_argument('--registry-only', action='store_true')
+    args = parser.parse_args()
+
+    if not args.registry_only:
+        for path in export_gbr_models(args.gbr_dir):
+            print(f"GBR model exported to {path}")
+
+    if not args.gbr_only:
+        registry = ModelRegistry(args.registry_dir)
+        for key in registry.keys():
+            try:
+                print(f"{key['ticker']} {registry.key_id(key)} exported to {export_registry_model(registry, key)}")
+            except Exception as e:
+                print(f"{key['ticker']} {registry.key_id(key)} failed: {e!r}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+# model_registry.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+import joblib
+
+from global_model import GLOBAL_TICKER
+from lstm_model import build_lstm_model
+
+# Default location of the model registry (next to this module)
+DEFAULT_REGISTRY_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'model_registry')
+
+# Bump whenever the model architecture or preprocessing changes so old artifacts become stale
+MODEL_CODE_VERSION = '1'
+
+
+class ModelRegistry:
+    """
+    On-disk registry of trained LSTM price models.
+
+    Models are keyed by ticker, window length, training range and code version.
+    Each entry is one joblib bundle holding the network weights together with the
+    fitted MinMaxScaler, plus a JSON sidecar so staleness can be checked without
+    unpickling anything. Loaded models are kept in memory for inference.
+    """
+
+    def __init__(self, root=DEFAULT_REGISTRY_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._loaded = {}
+
+    @staticmethod
+    def make_key(ticker, window, train_start, train_end, **extra):
+        """
+        Build the registry key of a model.
+
+        Parameters:
+        - ticker: Ticker symbol the model is trained on.
+        - window: Number of past bars fed to the network.
+        - train_start, train_end: Date range of the training history.
+        - extra: Any further settings that change the trained weights.
+
+        Returns:
+        - dict: JSON-serialisable key, including MODEL_CODE_VERSION.
+        """
+        key = {'ticker': ticker.upper(), 'window': int(window),
+               'train_start': str(train_start), 'train_end': str(train_end),
+               'code_version': MODEL_CODE_VERSION}
+        key.update({name: value for name, value in extra.items() if value is not None})
+        return key
+
+    @staticmethod
+    def key_id(key):
+        return hashlib.sha1(json.dumps(key, sort_keys=True).encode()).hexdigest()[:16]
+
+    def _paths(self, key):
+        base = os.path.join(self.root, key['ticker'], self.key_id(key))
+        return base + '.joblib', base + '.json'
+
+    def onnx_paths(self, key):
+        """
+        Return the (.onnx, scaler .npz) paths written by model_export for a key.
+        """
+        base = os.path.join(self.root, key['ticker'], self.key_id(key))
+        return base + '.onnx', base + '.scaler.npz'
+
+    def is_stale(self, key):
+        """
+        Return True if no usable model is stored for the key and training is needed.
+        """
+        bundle_path, meta_path = self._paths(key)
+        if not (os.path.exists(bundle_path) and os.path.exists(meta_path)):
+            return True
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return meta.get('key') != key
+
+    def save(self, key, model, scaler, metrics=None):
+        """
+        Store the weights of a trained model together with its scaler.
+        """
+        bundle_path, meta_path = self._paths(key)
+        os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+
+        # An exported copy of the previous weights would otherwise shadow the new ones
+        for path in self.onnx_paths(key):
+            if os.path.exists(path):
+                os.remove(path)
+
+        bundle = {'key': key, 'weights': model.get_weights(), 'scaler': scaler}
+        joblib.dump(bundle, bundle_path + '.tmp')
+        os.replace(bundle_path + '.tmp', bundle_path)
+        with open(meta_path, 'w') as f:
+            json.dump({'key': key, 'metrics': metrics or {}, 'saved_at': time.time()}, f, indent=2)
+
+        with self._lock:
+            self._loaded[self.key_id(key)] = (model, scaler)
+
+    def load(self, key):
+        """
+        Load a stored model for inference once per process.
+
+        Models exported with model_export.py are served through onnxruntime when it is
+        installed, so inference never imports TensorFlow; otherwise the keras network is
+        rebuilt from the stored weights.
+
+        Returns:
+        - tuple: (model, scaler)
+        """
+        key_id = self.key_id(key)
+        with self._lock:
+            if key_id not in self._loaded:
+                self._loaded[key_id] = self._load_exported(key) or self.load_keras(key)
+            return self._loaded[key_id]
+
+    def _load_exported(self, key):
+        from model_export import ArrayMinMaxScaler, OnnxPriceModel, onnxruntime_available
+
+        onnx_path, scaler_path = self.onnx_paths(key)
+        # Per-ticker networks are only usable with their scaler; the global model is saved
+        # without one because it normalizes each window itself
+        needs_scaler = key['ticker'] != GLOBAL_TICKER
+        if not os.path.exists(onnx_path) or (needs_scaler and not os.path.exists(scaler_path)):
+            return None
+        if not onnxruntime_available():
+            return None
+        return OnnxPriceModel(onnx_path), ArrayMinMaxScaler.load(scaler_path) if needs_scaler else None
+
+    def load_keras(self, key):
+        """
+        Rebuild the keras network of a stored model from its weights (imports TensorFlow).
+
+        Returns:
+        - tuple: (model, scaler)
+        """
+        bundle = joblib.load(self._paths(key)[0])
+        model = build_lstm_model(bundle['key']['window'], n_outputs=bundle['key'].get('horizon', 1))
+        model.set_weights(bundle['weights'])
+        return model, bundle['scaler']
+
+    def _iter_metadata(self, ticker=None):
+        folders = [ticker.upper()] if ticker else sorted(os.listdir(self.root))
+        for folder in folders:
+            folder = os.path.join(self.root, folder)
+            if not os.path.isdir(folder):
+                continue
+            for name in sorted(os.listdir(folder)):
+                if name.endswith('.json'):
+                    with open(os.path.join(folder, name)) as f:
+                        yield json.load(f)
+
+    def keys(self, ticker=None):
+        """
+        Return the keys of all stored current-version models (of one ticker, if given).
+        """
+        return [meta['key'] for meta in self._iter_metadata(ticker)
+                if meta.get('key', {}).get('code_version') == MODEL_CODE_VERSION]
+
+    def latest(self, ticker, **match):
+        """
+        Return the key of the most recently saved current-version model of a ticker whose key
+        contains all items of `match`, or None.
+        """
+        best = None
+        for meta in self._iter_metadata(ticker):
+            key = meta.get('key', {})
+            if key.get('code_version') != MODEL_CODE_VERSION or any(key.get(k) != v for k, v in match.items()):
+                continue
+            if best is None or meta['saved_at'] > best['saved_at']:
+                best = meta
+        return None if best is None else best['key']
+
+    def metadata(self, key):
+        """
+        Return the JSON metadata stored with a model, or None.
+        """
+        meta_path = self._paths(key)[1]
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)
@@ -0,0 +1,86 @@
+# pivots.py
+
+import numpy as np
+import pandas as pd
+
+# Values returned by detect_pivots, as in the original isPivot function
+PIVOT_NONE = 0
+PIVOT_HIGH = 1
+PIVOT_LOW = 2
+PIVOT_BOTH = 3
+
+
+def _classify(high, low, rolling_high, rolling_low):
+    is_high = (high >= rolling_high).astype(int) * PIVOT_HIGH
+    is_low = (low <= rolling_low).astype(int) * PIVOT_LOW
+    return is_high + is_low
+
+
+def detect_pivots(df, window=5, high_col='High', low_col='Low', group_col=None):
+    """
+    Detect pivot/fractal candles with centered rolling max/min over trading-day positions.
+
+    A candle is a pivot high if its high is the highest of the `window` candles before and
+    after it, and a pivot low if its low is the lowest. Candles without a full window on
+    both sides are never pivots.
+
+    Parameters:
+    - df: DataFrame with high and low columns, or a wide frame with (ticker, field) MultiIndex
+      columns as returned by PriceStore.get_many.
+    - window: Number of candles before and after the candle to compare with.
+    - high_col: Name of the column (or field) containing high prices.
+    - low_col: Name of the column (or field) containing low prices.
+    - group_col: Optional column identifying the ticker of each row in a long multi-ticker frame,
+      e.g. 'company_name'. Windows never cross from one ticker into another.
+
+    Returns:
+    - Series (or DataFrame of dates x tickers for wide input): 1 if pivot high, 2 if pivot low,
+      3 if both, and 0 otherwise.
+    """
+    size = 2 * window + 1
+
+    if isinstance(df.columns, pd.MultiIndex):
+        # Wide frame: every ticker column is rolled in the same vectorized call
+        level = df.columns.nlevels - 1
+        high = df.xs(high_col, axis=1, level=level)
+        low = df.xs(low_col, axis=1, level=level)
+        pivots = _classify(high, low, high.rolling(size, center=True).max(), low.rolling(size, center=True).min())
+        return pivots.astype(int)
+
+    high = df[high_col].to_numpy(dtype='float64')
+    low = df[low_col].to_numpy(dtype='float64')
+
+    if group_col is None:
+        order = np.arange(len(df))
+        valid = np.zeros(len(df), dtype=bool)
+        valid[window:len(df) - window] = True
+    else:
+        # Sort by (ticker, date) so each ticker's rows are contiguous and in order, then mask
+        # windows that would reach into a neighbouring ticker
+        codes, _ = pd.factorize(df[group_col])
+        order = np.lexsort((df.index.to_numpy(), codes))
+        sorted_codes = codes[order]
+        position = pd.Series(sorted_codes).groupby(sorted_codes).cumcount().to_numpy()
+        group_size = np.bincount(sorted_codes)[sorted_codes]
+        valid = (position >= window) & (group_size - 1 - position >= window)
+
+    high_sorted = pd.Series(high[order])
+    low_sorted = pd.Series(low[order])
+    pivots_sorted = _classify(high_sorted.to_numpy(), low_sorted.to_numpy(),
+                              high_sorted.rolling(size, center=True).max().to_numpy(),
+                              low_sorted.rolling(size, center=True).min().to_numpy())
+    pivots_sorted = np.where(valid, pivots_sorted, PIVOT_NONE)
+
+    pivots = np.empty(len(df), dtype=int)
+    pivots[order] = pivots_sorted
+    return pd.Series(pivots, index=df.index, name='isPivot')
+
+
+def pivot_marker_positions(df, pivots, offset=1e-3, high_col='High', low_col='Low'):
+    """
+    Compute where pivot markers are drawn: just below the low of pivot lows and just above
+    the high of pivot highs (NaN for every other candle).
+    """
+    return pd.Series(np.where(pivots == PIVOT_LOW, df[low_col] - offset,
+                              np.where(pivots == PIVOT_HIGH, df[high_col] + offset, np.nan)),
+                     index=df.index, name='pointpos')
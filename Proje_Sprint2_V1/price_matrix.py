@@ -0,0 +1,248 @@
+# price_matrix.py
+"""
+Memory-mapped price matrix of a whole ticker universe.
+
+Each OHLCV field is stored as one raw (tickers x trading days) array file, next to a
+calendar of the trading days (calendar.npy) and a JSON index of the tickers, dtypes and
+shape. PriceMatrix opens the arrays with np.memmap, so a ticker row or a date window of
+all tickers is a zero-copy view and every process maps the same pages from the OS page
+cache instead of holding its own DataFrames. Days on which a ticker has no bar are NaN.
+
+The index also records the state of every ticker in the price store at build time, so
+readers can tell when the store has changed since (stale_tickers) and fall back to it.
+
+Build the matrix from the price store, then open it anywhere:
+    python price_matrix.py                                  # every ticker in the price store
+    python price_matrix.py --tickers-file sp500.txt --start 2015-01-01 --dtype float64
+"""
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from price_store import DEFAULT_STORE_DIR, OHLCV_COLUMNS, PriceStore
+
+# Default location of the matrix (next to this module)
+DEFAULT_MATRIX_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_matrix')
+
+# Volume is kept in float64: float32 is exact only up to 2**24 shares
+VOLUME_DTYPE = 'float64'
+
+
+def _field_path(root, field):
+    return os.path.join(root, field.replace(' ', '_') + '.dat')
+
+
+def _store_state(store, ticker):
+    # Start of the fetched range and last stored bar; changes whenever bars are added or adjusted
+    coverage, last = store.coverage(ticker), store.last_bar(ticker)
+    if coverage is None or last is None:
+        return None
+    return [coverage[0].isoformat(), last['Date'].isoformat(), last['Close']]
+
+
+def build_matrix(tickers=None, start='2010-01-01', end=None, root=DEFAULT_MATRIX_DIR, store=None, dtype='float32'):
+    """
+    Write the stored bars of a universe to a memory-mapped matrix, replacing any previous one.
+
+    Only bars already in the price store are used; run the app's download (or PriceStore.get_many)
+    first to fetch missing ranges.
+
+    Parameters:
+    - tickers: List of ticker symbols (default: every ticker in the store).
+    - start, end: Date range (end exclusive; default: open-ended).
+    - root: Matrix directory.
+    - store: PriceStore to read from.
+    - dtype: Storage type of the price fields, 'float32' or 'float64'.
+
+    Returns:
+    - PriceMatrix: The new matrix, opened read-only.
+    """
+    store = store or PriceStore()
+    tickers = [ticker.upper() for ticker in tickers] if tickers else store.tickers()
+    date_range = [pd.Timestamp(start).isoformat(), pd.Timestamp(end).isoformat() if end is not None else None]
+    store_state = {ticker: _store_state(store, ticker) for ticker in tickers}
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.max
+
+    frames = {}
+    for ticker in tickers:
+        data = store.load(ticker)
+        data = data.loc[(data.index >= start) & (data.index < end)]
+        if len(data):
+            frames[ticker] = data
+    if not frames:
+        raise ValueError("No stored bars for the requested universe")
+    tickers = list(frames)
+    calendar = np.unique(np.concatenate([data.index.values.astype('datetime64[D]') for data in frames.values()]))
+
+    os.makedirs(root, exist_ok=True)
+    shape = (len(tickers), len(calendar))
+    dtypes = {field: VOLUME_DTYPE if field == 'Volume' else dtype for field in OHLCV_COLUMNS}
+    for field in OHLCV_COLUMNS:
+        # Fill a temporary file one ticker row at a time, then swap it in
+        path = _field_path(root, field)
+        array = np.memmap(path + '.tmp', mode='w+', dtype=dtypes[field], shape=shape)
+        array[:] = np.nan
+        for row, ticker in enumerate(tickers):
+            data = frames[ticker]
+            if field in data.columns:
+                columns = np.searchsorted(calendar, data.index.values.astype('datetime64[D]'))
+                array[row, columns] = data[field].to_numpy(dtype='float64')
+        array.flush()
+        del array
+        os.replace(path + '.tmp', path)
+
+    np.save(os.path.join(root, 'calendar.npy'), calendar)
+    meta = {'tickers': tickers, 'fields': OHLCV_COLUMNS, 'dtypes': dtypes, 'shape': list(shape),
+            'start': str(calendar[0]), 'end': str(calendar[-1]), 'built_at': time.time(),
+            'range': date_range, 'store_state': store_state}
+    with open(os.path.join(root, 'index.json') + '.tmp', 'w') as f:
+        json.dump(meta, f, indent=2)
+    os.replace(os.path.join(root, 'index.json') + '.tmp', os.path.join(root, 'index.json'))
+    return PriceMatrix(root)
+
+
+class PriceMatrix:
+    """
+    Read-only, memory-mapped (tickers x trading days) arrays of a universe.
+
+    Field arrays are mapped lazily on first use. Slicing one ticker, a contiguous range of
+    tickers or a date window returns views of the mapped file; only a list of scattered
+    tickers is copied.
+    """
+
+    def __init__(self, root=DEFAULT_MATRIX_DIR):
+        self.root = root
+        with open(os.path.join(root, 'index.json')) as f:
+            self.meta = json.load(f)
+        self.tickers = self.meta['tickers']
+        self.fields = self.meta['fields']
+        self.shape = tuple(self.meta['shape'])
+        self.calendar = np.load(os.path.join(root, 'calendar.npy'))
+        self._positions = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self._arrays = {}
+
+    @staticmethod
+    def exists(root=DEFAULT_MATRIX_DIR):
+        return os.path.exists(os.path.join(root, 'index.json'))
+
+    @property
+    def dates(self):
+        return pd.DatetimeIndex(self.calendar, name='Date')
+
+    def field(self, field):
+        """
+        Return the full (tickers x days) memmap of a field.
+        """
+        if field not in self._arrays:
+            self._arrays[field] = np.memmap(_field_path(self.root, field), mode='r',
+                                            dtype=self.meta['dtypes'][field], shape=self.shape)
+        return self._arrays[field]
+
+    def date_slice(self, start=None, end=None):
+        """
+        Column slice of the trading days in [start, end).
+        """
+        lo = 0 if start is None else np.searchsorted(self.calendar, np.datetime64(pd.Timestamp(start).date()))
+        hi = len(self.calendar) if end is None else np.searchsorted(self.calendar, np.datetime64(pd.Timestamp(end).date()))
+        return slice(int(lo), int(hi))
+
+    def rows(self, tickers=None):
+        """
+        Row index of tickers: a slice for all tickers or one ticker, else an array of positions.
+        """
+        if tickers is None:
+            return slice(None)
+        if isinstance(tickers, str):
+            i = self._positions[tickers.upper()]
+            return slice(i, i + 1)
+        return np.array([self._positions[ticker.upper()] for ticker in tickers], dtype=np.intp)
+
+    def covers(self, start=None, end=None):
+        """
+        Return True if [start, end) lies within the date range the matrix was built for.
+        """
+        if 'range' not in self.meta:
+            return False
+        built_start, built_end = (None if value is None else pd.Timestamp(value) for value in self.meta['range'])
+        if start is None or pd.Timestamp(start) < built_start:
+            return False
+        return built_end is None or (end is not None and pd.Timestamp(end) <= built_end)
+
+    def stale_tickers(self, store, tickers=None):
+        """
+        Return the tickers whose bars in the price store changed since the matrix was built.
+
+        A ticker is stale if it was stored after the build, or if its fetched range or last
+        stored bar differs from the build (new or backfilled bars, split adjustments). Only the
+        store's metadata files are read. Matrices built without this record are stale throughout.
+
+        Parameters:
+        - store: PriceStore the matrix was built from.
+        - tickers: Tickers to check (default: every ticker in the store).
+
+        Returns:
+        - list: Stale ticker symbols.
+        """
+        tickers = [ticker.upper() for ticker in tickers] if tickers is not None else store.tickers()
+        built = self.meta.get('store_state')
+        if built is None:
+            return tickers
+        return [ticker for ticker in tickers if built.get(ticker) != _store_state(store, ticker)]
+
+    def get(self, field, tickers=None, start=None, end=None):
+        """
+        Return a (tickers x days) array of a field (a view unless `tickers` is a list).
+        """
+        return self.field(field)[self.rows(tickers), self.date_slice(start, end)]
+
+    def frame(self, field, tickers=None, start=None, end=None):
+        """
+        Return a field as a (dates x tickers) DataFrame, the layout of PriceStore.get_many fields.
+        """
+        cols = self.date_slice(start, end)
+        values = self.get(field, tickers, start, end)
+        names = [tickers.upper()] if isinstance(tickers, str) else (self.tickers if tickers is None else [t.upper() for t in tickers])
+        return pd.DataFrame(values.T, index=self.dates[cols], columns=pd.Index(names, name='Ticker'), copy=False)
+
+    def history(self, ticker, start=None, end=None):
+        """
+        Return the OHLCV bars of one ticker as a DataFrame (days without a bar dropped).
+        """
+        cols = self.date_slice(start, end)
+        row = self._positions[ticker.upper()]
+        data = pd.DataFrame({field: self.field(field)[row, cols] for field in self.fields}, index=self.dates[cols])
+        return data.dropna(how='all')
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the memory-mapped price matrix from the price store.")
+    parser.add_argument('tickers', nargs='*', help="Ticker symbols (default: every ticker in the store)")
+    parser.add_argument('--tickers-file', help="Text file with one ticker per line")
+    parser.add_argument('--start', default='2010-01-01')
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--dtype', choices=['float32', 'float64'], default='float32')
+    parser.add_argument('--matrix-dir', default=DEFAULT_MATRIX_DIR)
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers]
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip().upper() for line in f if line.strip()]
+
+    started = time.perf_counter()
+    matrix = build_matrix(tickers or None, args.start, args.end, args.matrix_dir,
+                          PriceStore(args.store_dir), args.dtype)
+    size = sum(os.path.getsize(_field_path(matrix.root, field)) for field in matrix.fields)
+    print(f"{matrix.shape[0]} tickers x {matrix.shape[1]} days ({matrix.meta['start']} to {matrix.meta['end']}), "
+          f"{size / 1024 ** 2:.1f} MB in {time.perf_counter() - started:.1f}s")
+
+
+if __name__ == '__main__':
+    main()
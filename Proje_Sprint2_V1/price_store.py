@@ -0,0 +1,352 @@
+# price_store.py
+
+import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+# Default location of the on-disk price store (next to this module)
+DEFAULT_STORE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'price_store')
+
+# Columns kept for every (ticker, interval) entry
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Adj Close', 'Volume']
+
+
+def normalize_ohlcv(data):
+    """
+    Bring a yfinance download into the layout used by the price store.
+
+    Parameters:
+    - data: DataFrame returned by yf.download for a single ticker.
+
+    Returns:
+    - DataFrame: OHLCV columns only, indexed by a sorted, timezone-naive 'Date' index without duplicates.
+    """
+    if data is None or data.empty:
+        return pd.DataFrame(columns=OHLCV_COLUMNS, index=pd.DatetimeIndex([], name='Date'))
+
+    data = data.copy()
+    if isinstance(data.columns, pd.MultiIndex):
+        # Recent yfinance versions return (field, ticker) columns even for one ticker
+        data.columns = data.columns.get_level_values(0)
+    data = data[[col for col in OHLCV_COLUMNS if col in data.columns]]
+
+    data.index = pd.to_datetime(data.index)
+    if data.index.tz is not None:
+        data.index = data.index.tz_localize(None)
+    data.index.name = 'Date'
+    data = data[~data.index.duplicated(keep='last')].sort_index()
+    return data
+
+
+class PriceStore:
+    """
+    Persistent OHLCV cache in front of yfinance.
+
+    Every (ticker, interval) pair is kept as one Parquet file plus a small JSON
+    sidecar recording the contiguous date range that has already been requested
+    from Yahoo. Reads only go to the network for the parts of a requested range
+    that are not covered yet, so repeated clicks on the same tickers are served
+    from disk (and from memory within one process).
+    """
+
+    def __init__(self, root=DEFAULT_STORE_DIR):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._frames = {}
+
+    # ------------------------------------------------------------------ paths
+    def _key(self, ticker, interval):
+        return f"{ticker.upper().replace('/', '_')}_{interval}"
+
+    def _data_path(self, ticker, interval):
+        return os.path.join(self.root, self._key(ticker, interval) + '.parquet')
+
+    def _meta_path(self, ticker, interval):
+        return os.path.join(self.root, self._key(ticker, interval) + '.json')
+
+    # ---------------------------------------------------------------- storage
+    def _read_meta(self, ticker, interval):
+        meta_path = self._meta_path(ticker, interval)
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)
+
+    def coverage(self, ticker, interval='1d'):
+        """
+        Return the (start, end) range already fetched for a ticker, or None.
+
+        The end of the range is exclusive, matching yfinance's `end` argument.
+        """
+        meta = self._read_meta(ticker, interval)
+        if meta is None:
+            return None
+        return pd.Timestamp(meta['start']), pd.Timestamp(meta['end'])
+
+    def tickers(self, interval='1d'):
+        """
+        Return the sorted symbols that have data stored for an interval.
+        """
+        suffix = f"_{interval}.json"
+        return sorted(name[:-len(suffix)] for name in os.listdir(self.root) if name.endswith(suffix))
+
+    def last_bar(self, ticker, interval='1d'):
+        """
+        Return the last stored bar of a ticker as a dict (date plus close prices), or None.
+        """
+        meta = self._read_meta(ticker, interval)
+        if meta is None or meta.get('last_bar') is None:
+            return None
+        last = dict(meta['last_bar'])
+        last['Date'] = pd.Timestamp(last['Date'])
+        return last
+
+    def load(self, ticker, interval='1d'):
+        """
+        Load everything stored for a ticker (empty DataFrame if nothing is stored).
+        """
+        data_path = self._data_path(ticker, interval)
+        if not os.path.exists(data_path):
+            return normalize_ohlcv(None)
+
+        mtime = os.path.getmtime(data_path)
+        cached = self._frames.get((ticker, interval))
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+
+        data = pd.read_parquet(data_path)
+        self._frames[(ticker, interval)] = (mtime, data)
+        return data
+
+    def save(self, ticker, interval, data, start, end):
+        """
+        Replace the stored frame and coverage range of a ticker.
+        """
+        data_path = self._data_path(ticker, interval)
+
+        # Write to a temporary file first so readers never see a half-written entry
+        data.to_parquet(data_path + '.tmp')
+        os.replace(data_path + '.tmp', data_path)
+        self._write_meta(ticker, interval, data, start, end)
+
+        self._frames[(ticker, interval)] = (os.path.getmtime(data_path), data)
+
+    def _write_meta(self, ticker, interval, data, start, end):
+        meta_path = self._meta_path(ticker, interval)
+        meta = {'start': pd.Timestamp(start).isoformat(), 'end': pd.Timestamp(end).isoformat(), 'last_bar': None}
+        if not data.empty:
+            # Remember the last bar so refreshes can validate it without reading the Parquet file
+            last = data.iloc[-1]
+            meta['last_bar'] = {'Date': data.index[-1].isoformat(),
+                                'Close': float(last['Close']),
+                                'Adj Close': float(last.get('Adj Close', last['Close']))}
+        with open(meta_path + '.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(meta_path + '.tmp', meta_path)
+
+    # ---------------------------------------------------------------- fetching
+    def _download(self, ticker, start, end, interval):
+        # yfinance is only imported for downloads, so reading the store does not need it
+        import yfinance as yf
+
+        data = yf.download(ticker, start=start, end=end, interval=interval,
+                           auto_adjust=False, progress=False)
+        return normalize_ohlcv(data)
+
+    @staticmethod
+    def _clamp_range(start, end):
+        # Never claim coverage for sessions that have not closed yet
+        start = pd.Timestamp(start)
+        end = min(pd.Timestamp(end), pd.Timestamp.today().normalize())
+        return start, max(start, end)
+
+    @staticmethod
+    def missing_ranges(start, end, coverage):
+        """
+        Return the [start, end) ranges that still have to be downloaded.
+
+        Parameters:
+        - start, end: Requested range (end exclusive).
+        - coverage: (start, end) range already stored, or None.
+
+        Returns:
+        - list of (start, end) tuples. Gaps are bridged so that the stored range stays contiguous.
+        """
+        if start >= end:
+            return []
+        if coverage is None:
+            return [(start, end)]
+
+        cov_start, cov_end = coverage
+        ranges = []
+        if start < cov_start:
+            ranges.append((start, cov_start))
+        if end > cov_end:
+            ranges.append((cov_end, end))
+        return ranges
+
+    def get(self, ticker, start, end, interval='1d'):
+        """
+        Return OHLCV bars for a ticker in [start, end), downloading only what is missing.
+
+        Parameters:
+        - ticker: Ticker symbol, e.g. 'AAPL'.
+        - start: First date of the requested range.
+        - end: End of the requested range (exclusive, as in yf.download).
+        - interval: yfinance bar interval, e.g. '1d'.
+
+        Returns:
+        - DataFrame: A copy of the stored bars for the range, safe for callers to add columns to.
+        """
+        req_start, req_end = pd.Timestamp(start), pd.Timestamp(end)
+        fetch_start, fetch_end = self._clamp_range(req_start, req_end)
+
+        with self._lock:
+            coverage = self.coverage(ticker, interval)
+            ranges = self.missing_ranges(fetch_start, fetch_end, coverage)
+            if ranges:
+                parts = [self._download(ticker, s, e, interval) for s, e in ranges]
+                data = self._merge(ticker, interval, parts, fetch_start, fetch_end)
+            else:
+                data = self.load(ticker, interval)
+
+        mask = (data.index >= req_start) & (data.index < req_end)
+        return data.loc[mask].copy()
+
+    def _merge(self, ticker, interval, parts, fetch_start, fetch_end):
+        # Combine freshly downloaded parts with the stored frame and extend the coverage range
+        coverage = self.coverage(ticker, interval)
+        parts = [p for p in [self.load(ticker, interval)] + list(parts) if not p.empty]
+        data = normalize_ohlcv(pd.concat(parts) if parts else None)
+        new_start = fetch_start if coverage is None else min(fetch_start, coverage[0])
+        new_end = fetch_end if coverage is None else max(fetch_end, coverage[1])
+        self.save(ticker, interval, data, new_start, new_end)
+        return data
+
+    def _download_batch(self, tickers, start, end, interval):
+        # One request for many tickers; split the (ticker, field) result back per ticker
+        import yfinance as yf
+
+        batch = yf.download(tickers, start=start, end=end, interval=interval, group_by='ticker',
+                            auto_adjust=False, threads=False, progress=False)
+        frames = {}
+        for ticker in tickers:
+            if isinstance(batch.columns, pd.MultiIndex):
+                data = batch[ticker] if ticker in batch.columns.get_level_values(0) else None
+            else:
+                data = batch if len(tickers) == 1 else None
+            if data is not None:
+                data = data.dropna(how='all')  # Rows that only exist for other tickers in the batch
+            frames[ticker] = normalize_ohlcv(data)
+        return frames
+
+    def get_many(self, tickers, start, end, interval='1d', chunk_size=100, max_workers=4):
+        """
+        Return OHLCV bars for many tickers as one aligned wide frame.
+
+        Tickers that need the same missing range are downloaded together, `chunk_size`
+        symbols per yf.download request, with at most `max_workers` requests in flight.
+
+        Parameters:
+        - tickers: List of ticker symbols.
+        - start: First date of the requested range.
+        - end: End of the requested range (exclusive, as in yf.download).
+        - interval: yfinance bar interval, e.g. '1d'.
+        - chunk_size: Maximum number of tickers per request.
+        - max_workers: Maximum number of concurrent requests.
+
+        Returns:
+        - DataFrame: Columns are a (ticker, field) MultiIndex over the union of all trading dates.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        req_start, req_end = pd.Timestamp(start), pd.Timestamp(end)
+        fetch_start, fetch_end = self._clamp_range(req_start, req_end)
+
+        # Group tickers by the ranges they are missing so each group is one batched request
+        groups = {}
+        for ticker in tickers:
+            ranges = self.missing_ranges(fetch_start, fetch_end, self.coverage(ticker, interval))
+            for rng in ranges:
+                groups.setdefault(rng, []).append(ticker)
+
+        downloaded = {ticker: [] for ticker in tickers}
+        if groups:
+            jobs = [(group[i:i + chunk_size], rng) for rng, group in groups.items()
+                    for i in range(0, len(group), chunk_size)]
+            with ThreadPoolExecutor(max_workers=max_workers) as pool:
+                results = pool.map(lambda job: self._download_batch(job[0], job[1][0], job[1][1], interval), jobs)
+                for frames in results:
+                    for ticker, data in frames.items():
+                        downloaded[ticker].append(data)
+
+        frames = {}
+        with self._lock:
+            for ticker in tickers:
+                if downloaded[ticker]:
+                    data = self._merge(ticker, interval, downloaded[ticker], fetch_start, fetch_end)
+                else:
+                    data = self.load(ticker, interval)
+                mask = (data.index >= req_start) & (data.index < req_end)
+                frames[ticker] = data.loc[mask]
+
+        wide = pd.concat(frames, axis=1, names=['Ticker', 'Price']) if frames else pd.DataFrame()
+        return wide.sort_index()
+
+    def refresh(self, ticker, interval='1d', rtol=1e-6):
+        """
+        Bring a stored ticker up to date by requesting only bars after the last stored one.
+
+        The last stored bar is downloaded again together with the new bars. If its Close or
+        Adj Close no longer matches the source (a split, dividend adjustment or data fix), the
+        whole stored range is downloaded again instead of appending to stale history. If that
+        download comes back empty (rate limit, delisting), the stored data is kept as it is.
+
+        Parameters:
+        - ticker: Ticker symbol, e.g. 'AAPL'.
+        - interval: yfinance bar interval, e.g. '1d'.
+        - rtol: Relative tolerance used when comparing the last stored bar with the source.
+
+        Returns:
+        - str: 'missing' if nothing is stored yet, 'unchanged', 'appended', 'rebuilt', or
+          'failed' if the history had to be downloaded again and nothing came back.
+        """
+        with self._lock:
+            coverage = self.coverage(ticker, interval)
+            last = self.last_bar(ticker, interval)
+            if coverage is None or last is None:
+                return 'missing'
+
+            _, fetch_end = self._clamp_range(coverage[0], pd.Timestamp.today())
+            if fetch_end <= last['Date']:
+                return 'unchanged'
+
+            fresh = self._download(ticker, last['Date'], fetch_end, interval)
+            if last['Date'] in fresh.index:
+                source = fresh.loc[last['Date']]
+                matches = (np.isclose(source['Close'], last['Close'], rtol=rtol) and
+                           np.isclose(source.get('Adj Close', source['Close']), last['Adj Close'], rtol=rtol))
+            else:
+                matches = fresh.empty
+
+            if not matches:
+                # History was restated upstream: re-pull the full stored range
+                data = self._download(ticker, coverage[0], fetch_end, interval)
+                if data.empty:
+                    return 'failed'
+                self.save(ticker, interval, data, coverage[0], fetch_end)
+                return 'rebuilt'
+
+            data = self.load(ticker, interval)
+            new_bars = fresh.loc[fresh.index > last['Date']]
+            if new_bars.empty:
+                self._write_meta(ticker, interval, data, coverage[0], max(coverage[1], fetch_end))
+                return 'unchanged'
+
+            data = pd.concat([data, new_bars])
+            self.save(ticker, interval, data, coverage[0], max(coverage[1], fetch_end))
+            return 'appended'
@@ -0,0 +1,303 @@
+# rolling_stats.py
+"""
+Precomputed rolling statistics of stored tickers, updated incrementally.
+
+The moving averages (MA20/MA50/MA200), the 14-day low/high of the stochastic %K and the
+14-day average gain/loss of the RSI are kept as columns per ticker next to the price
+store (<store>/rolling_stats/<TICKER>_<interval>.stats.pkl), together with the running
+state that produced them: a running sum per mean and a monotonic deque per min/max.
+When new bars arrive, each is an O(1) update of that state instead of a `.rolling()`
+pass over the whole history. The values match the pandas rolling formulas of the app.
+
+get(ticker, start, end) returns the columns as a calculation over [start, end) alone would:
+the rows whose windows reach back before `start` are recomputed from the bars in range, so
+they have the same NaN warm-up as the EMA, MACD and ADL columns the app computes in range.
+
+Usage:
+    python rolling_stats.py                    # update every ticker in the price store
+    python rolling_stats.py AAPL META --rebuild
+"""
+
+import argparse
+import math
+import os
+import pickle
+import threading
+import time
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from price_store import DEFAULT_STORE_DIR, PriceStore
+
+# Column name -> (statistic, input series, window)
+ROLLING_STATS = {
+    'MA20': ('mean', 'Close', 20),
+    'MA50': ('mean', 'Close', 50),
+    'MA200': ('mean', 'Close', 200),
+    'L14': ('min', 'Low', 14),
+    'H14': ('max', 'High', 14),
+    'Avg Gain 14': ('mean', 'gain', 14),
+    'Avg Loss 14': ('mean', 'loss', 14),
+}
+
+# Relative change of the last stored close that triggers a rebuild (e.g. after a split adjustment)
+REBUILD_RTOL = 1e-6
+
+
+class RollingMean:
+    """
+    Mean of the last `window` values from a running sum (NaN until the window is full).
+
+    The sum is recomputed exactly once per `window` updates, so rounding errors of the
+    running additions and subtractions cannot accumulate.
+    """
+
+    __slots__ = ('window', 'values', 'total', 'updates')
+
+    def __init__(self, window):
+        self.window = window
+        self.values = deque(maxlen=window)
+        self.total = 0.0
+        self.updates = 0
+
+    def update(self, value):
+        if len(self.values) == self.window:
+            self.total -= self.values[0]
+        self.values.append(value)
+        self.total += value
+        self.updates += 1
+        if self.updates % self.window == 0:
+            self.total = math.fsum(self.values)
+        return self.total / self.window if len(self.values) == self.window else np.nan
+
+
+class RollingExtreme:
+    """
+    Maximum (or minimum) of the last `window` values from a monotonic deque (NaN until full).
+
+    The deque holds (position, value) pairs with decreasing values for a maximum, so every
+    value is appended and removed at most once.
+    """
+
+    __slots__ = ('window', 'is_max', 'queue', 'count')
+
+    def __init__(self, window, mode='max'):
+        self.window = window
+        self.is_max = mode == 'max'
+        self.queue = deque()
+        self.count = 0
+
+    def update(self, value):
+        queue = self.queue
+        if self.is_max:
+            while queue and queue[-1][1] <= value:
+                queue.pop()
+        else:
+            while queue and queue[-1][1] >= value:
+                queue.pop()
+        queue.append((self.count, value))
+        if queue[0][0] <= self.count - self.window:
+            queue.popleft()
+        self.count += 1
+        return queue[0][1] if self.count >= self.window else np.nan
+
+
+class RollingStatsState:
+    """
+    Running state of all ROLLING_STATS columns of one ticker.
+    """
+
+    __slots__ = ('stats', 'prev_close', 'first_date', 'last_date', 'last_close', 'count')
+
+    def __init__(self, specs=ROLLING_STATS):
+        self.stats = {name: (RollingMean(window) if stat == 'mean' else RollingExtreme(window, stat), series)
+                      for name, (stat, series, window) in specs.items()}
+        self.prev_close = None
+        self.first_date = None
+        self.last_date = None
+        self.last_close = None
+        self.count = 0
+
+    def update(self, date, high, low, close):
+        """
+        Add one bar and return the new value of every column.
+        """
+        # As delta.where(delta > 0, 0) in the app, the first bar counts as no change
+        delta = 0.0 if self.prev_close is None else close - self.prev_close
+        inputs = {'Close': close, 'High': high, 'Low': low, 'gain': max(delta, 0.0), 'loss': max(-delta, 0.0)}
+        row = {name: stat.update(inputs[series]) for name, (stat, series) in self.stats.items()}
+        self.prev_close = self.last_close = close
+        if self.first_date is None:
+            self.first_date = date
+        self.last_date = date
+        self.count += 1
+        return row
+
+    def continues(self, bars):
+        """
+        Return True if `bars` extends the history this state was built from.
+
+        The first bar, the number of bars up to the last one and the last close must all be
+        unchanged, so backfilled earlier history or a gap filled in between triggers a rebuild.
+        """
+        # States pickled before first_date/count were tracked lack those slots
+        if getattr(self, 'first_date', None) is None or self.last_date not in bars.index:
+            return False
+        if bars.index[0] != self.first_date or bars.index.searchsorted(self.last_date, side='right') != self.count:
+            return False
+        return math.isclose(bars.at[self.last_date, 'Close'], self.last_close, rel_tol=REBUILD_RTOL)
+
+
+def compute_rolling_stats(bars, specs=ROLLING_STATS):
+    """
+    Batch-compute the rolling columns over a whole history with pandas.
+
+    Returns:
+    - DataFrame: One column per entry of `specs`, indexed like `bars`.
+    """
+    delta = bars['Close'].diff()
+    inputs = {'Close': bars['Close'], 'High': bars['High'], 'Low': bars['Low'],
+              'gain': delta.where(delta > 0, 0), 'loss': -delta.where(delta < 0, 0)}
+    columns = {}
+    for name, (stat, series, window) in specs.items():
+        columns[name] = getattr(inputs[series].rolling(window=window), stat)()
+    return pd.DataFrame(columns, index=bars.index)
+
+
+def seed_state(bars, specs=ROLLING_STATS):
+    """
+    Build the running state that continues where a batch calculation over `bars` ends.
+
+    Only the last max(window) bars are replayed, so seeding is cheap for long histories.
+    """
+    state = RollingStatsState(specs)
+    if len(bars) == 0:
+        return state
+    longest = max(window for _, _, window in specs.values())
+    tail = bars.iloc[-longest:]
+    skipped = len(bars) - len(tail)
+    for stat, _ in state.stats.values():
+        # Earlier bars only matter through the count of values seen
+        if isinstance(stat, RollingExtreme):
+            stat.count = skipped
+        else:
+            stat.updates = skipped
+    state.prev_close = float(bars['Close'].iloc[skipped - 1]) if skipped else None
+    state.first_date = bars.index[0]
+    state.count = skipped
+    for date, bar in zip(tail.index, tail[['High', 'Low', 'Close']].to_numpy(dtype='float64')):
+        state.update(date, *bar)
+    return state
+
+
+class RollingStatsStore:
+    """
+    On-disk rolling-statistic columns of the tickers in a PriceStore, kept next to it.
+
+    Each ticker has a pickled frame with the columns and a pickle with the running state.
+    update() appends the bars stored since the last call through the state, and rebuilds
+    everything only if the stored history changed underneath (e.g. split adjustments).
+    """
+
+    def __init__(self, store=None, root=None):
+        self.store = store or PriceStore()
+        self.root = root or os.path.join(self.store.root, 'rolling_stats')
+        os.makedirs(self.root, exist_ok=True)
+        self._lock = threading.Lock()
+        self._cache = {}
+
+    def _paths(self, ticker, interval):
+        base = os.path.join(self.root, f"{ticker.upper().replace('/', '_')}_{interval}")
+        return base + '.stats.pkl', base + '.state.pkl'
+
+    def _read(self, ticker, interval):
+        cached = self._cache.get((ticker, interval))
+        if cached is not None:
+            return cached
+        data_path, state_path = self._paths(ticker, interval)
+        if not (os.path.exists(data_path) and os.path.exists(state_path)):
+            return None, None
+        with open(state_path, 'rb') as f:
+            state = pickle.load(f)
+        return state, pd.read_pickle(data_path)
+
+    def _write(self, ticker, interval, state, stats):
+        data_path, state_path = self._paths(ticker, interval)
+        stats.to_pickle(data_path + '.tmp')
+        os.replace(data_path + '.tmp', data_path)
+        with open(state_path + '.tmp', 'wb') as f:
+            pickle.dump(state, f)
+        os.replace(state_path + '.tmp', state_path)
+
+    def update(self, ticker, interval='1d', rebuild=False):
+        """
+        Bring the rolling columns of a ticker up to date with the price store.
+
+        Returns:
+        - DataFrame: All rolling columns of the ticker, indexed by date.
+        """
+        return self._update(ticker, interval, rebuild)[1]
+
+    def _update(self, ticker, interval, rebuild=False):
+        # Returns the stored bars along with their rolling columns (both share one index)
+        with self._lock:
+            bars = self.store.load(ticker, interval)
+            state, stats = (None, None) if rebuild else self._read(ticker, interval)
+
+            if state is None or not state.continues(bars):
+                stats = compute_rolling_stats(bars)
+                state = seed_state(bars)
+            else:
+                new_bars = bars.loc[bars.index > state.last_date]
+                if len(new_bars) == 0:
+                    self._cache[(ticker, interval)] = (state, stats)
+                    return bars, stats
+                rows = [state.update(date, *bar) for date, bar in
+                        zip(new_bars.index, new_bars[['High', 'Low', 'Close']].to_numpy(dtype='float64'))]
+                stats = pd.concat([stats, pd.DataFrame(rows, index=new_bars.index)])
+
+            self._write(ticker, interval, state, stats)
+            self._cache[(ticker, interval)] = (state, stats)
+            return bars, stats
+
+    def get(self, ticker, start=None, end=None, interval='1d'):
+        """
+        Return the up-to-date rolling columns of a ticker for [start, end).
+
+        The values equal compute_rolling_stats over the bars in [start, end) only: the first
+        max(window) rows, whose windows would reach earlier stored bars, are recomputed from
+        the bars in range, and every later row is taken from the stored columns.
+        """
+        bars, stats = self._update(ticker, interval)
+        mask = np.ones(len(stats), dtype=bool)
+        if start is not None:
+            mask &= stats.index >= pd.Timestamp(start)
+        if end is not None:
+            mask &= stats.index < pd.Timestamp(end)
+        stats = stats.loc[mask]
+        if not mask.any() or mask.argmax() == 0:
+            return stats
+        longest = max(window for _, _, window in ROLLING_STATS.values())
+        head = compute_rolling_stats(bars.loc[mask].iloc[:longest])
+        return pd.concat([head, stats.iloc[len(head):]])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Update the precomputed rolling statistics of stored tickers.")
+    parser.add_argument('tickers', nargs='*', help="Ticker symbols (default: every ticker in the store)")
+    parser.add_argument('--rebuild', action='store_true', help="Recompute from the full history")
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    args = parser.parse_args()
+
+    stats_store = RollingStatsStore(PriceStore(args.store_dir))
+    tickers = [ticker.upper() for ticker in args.tickers] or stats_store.store.tickers()
+    started = time.perf_counter()
+    for ticker in tickers:
+        stats_store.update(ticker, rebuild=args.rebuild)
+    print(f"Updated {len(tickers)} tickers in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
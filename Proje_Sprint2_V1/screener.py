@@ -0,0 +1,235 @@
+# screener.py
+"""
+Rank a whole ticker universe by technical indicators in one vectorized pass.
+
+The universe is loaded from the local price store as one wide (dates x tickers) frame per
+field. RSI, MACD, stochastic %K/%D, the 20/50-day moving averages and the Chaikin
+oscillator are then computed column-wise for all tickers at once, and only the latest
+values (plus recent crossovers) are kept in a one-row-per-ticker table.
+
+Usage:
+    python screener.py --universe store --filter "RSI oversold (< 30)"
+    python screener.py --universe sp500.txt --sort rsi
+"""
+
+import argparse
+import os
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from backtest import ema, rsi, stochastic_k
+from chaikin_oscillator import money_flow_volume
+from price_matrix import PriceMatrix
+from price_store import DEFAULT_STORE_DIR, PriceStore
+
+# Enough history for the slowest indicator (50-day MA) plus EMA warm-up
+DEFAULT_LOOKBACK_DAYS = 365
+
+# Predefined watchlist of the app
+WATCHLIST = ['AAPL', 'META', 'NVDA', 'NFLX']
+
+
+def load_universe(universe='store', store=None):
+    """
+    Resolve a universe name to a list of tickers.
+
+    Parameters:
+    - universe: 'store' (every ticker in the local price store), 'watchlist', a path to a text
+      file with one ticker per line, or a list of tickers.
+    - store: PriceStore to list for 'store'.
+
+    Returns:
+    - list: Ticker symbols.
+    """
+    if not isinstance(universe, str):
+        return [ticker.upper() for ticker in universe]
+    if universe == 'store':
+        return (store or PriceStore()).tickers()
+    if universe == 'watchlist':
+        return list(WATCHLIST)
+    if os.path.exists(universe):
+        with open(universe) as f:
+            return list(dict.fromkeys(line.strip().upper() for line in f if line.strip() and not line.startswith('#')))
+    raise ValueError(f"Unknown universe {universe!r}: use 'store', 'watchlist' or a ticker file")
+
+
+def load_fields(tickers, start, end=None, store=None, download=False, fields=('High', 'Low', 'Close', 'Volume'), matrix=None):
+    """
+    Load a universe as one wide (dates x tickers) frame per field.
+
+    Parameters:
+    - tickers: List of ticker symbols.
+    - start, end: Date range of the bars (end exclusive, open-ended if None).
+    - store: PriceStore to read from.
+    - download: If True, missing ranges are fetched through PriceStore.get_many; otherwise only
+      bars already in the store are read, so screening never waits on the network.
+    - fields: OHLCV fields to return.
+    - matrix: Optional PriceMatrix; when it covers the date range and none of the tickers changed
+      in the store since it was built, the fields are sliced from its memory-mapped arrays instead
+      of being read from the store.
+
+    Returns:
+    - dict: Field name -> DataFrame indexed by date with one column per ticker.
+    """
+    store = store or PriceStore()
+    if matrix is not None and not download and matrix.covers(start, end) and not matrix.stale_tickers(store, tickers):
+        # Tickers left out of the build had no bars in its date range
+        tickers = [ticker for ticker in map(str.upper, tickers) if ticker in matrix.tickers]
+        if not tickers:
+            raise ValueError("No stored bars for the requested universe")
+        rows = None if tickers == matrix.tickers else tickers
+        return {field: matrix.frame(field, rows, start, end).ffill() for field in fields}
+    start = pd.Timestamp(start)
+    end = pd.Timestamp(end) if end is not None else pd.Timestamp.max
+    if download:
+        panel = store.get_many(tickers, start, end)
+    else:
+        frames = {}
+        for ticker in tickers:
+            data = store.load(ticker)
+            frames[ticker] = data.loc[(data.index >= start) & (data.index < end)]
+        panel = pd.concat(frames, axis=1, names=['Ticker', 'Price']).sort_index() if frames else pd.DataFrame()
+    if panel.empty:
+        raise ValueError("No stored bars for the requested universe")
+    return {field: panel.xs(field, axis=1, level=-1).ffill() for field in fields}
+
+
+def _crossed(fast, slow, days):
+    # +1 if `fast` crossed above `slow` within the last `days` bars, -1 if below, 0 otherwise
+    with np.errstate(invalid='ignore'):
+        above = (fast > slow).astype('int8')
+    valid = ~(np.isnan(fast) | np.isnan(slow))
+    recent = (np.diff(above, axis=0) * (valid[1:] & valid[:-1]))[-days:][::-1]
+    return recent[np.argmax(recent != 0, axis=0), np.arange(recent.shape[1])]
+
+
+def _moving_average(values, window):
+    # NaN while a ticker has fewer bars than the window, like pandas rolling(window).mean()
+    out = np.full(values.shape, np.nan)
+    if window <= len(values):
+        out[window - 1:] = sliding_window_view(values, window, axis=0).mean(axis=-1)
+    return out
+
+
+def compute_indicators(fields, cross_days=5, rsi_window=14, stoch_window=14):
+    """
+    Latest indicator values of every ticker.
+
+    Every indicator is computed on the full (dates x tickers) arrays at once, with the same
+    formulas as the app's views: RSI with simple rolling means, MACD(12, 26, 9), %K(14) with a
+    3-day %D, 20/50-day moving averages and the Chaikin oscillator (3, 10).
+
+    Parameters:
+    - fields: dict of wide (dates x tickers) frames with High, Low, Close and Volume.
+    - cross_days: Number of recent bars in which MACD and MA crossovers are reported.
+    - rsi_window: RSI period.
+    - stoch_window: Stochastic %K period.
+
+    Returns:
+    - DataFrame: One row per ticker.
+    """
+    tickers = fields['Close'].columns
+    high, low, close, volume = (fields[field].to_numpy(dtype='float64') for field in ('High', 'Low', 'Close', 'Volume'))
+
+    macd_emas = ema(close, [12, 26])
+    macd = macd_emas[..., 0] - macd_emas[..., 1]
+    signal_line = ema(macd, [9])[..., 0]
+
+    k = stochastic_k(high, low, close, stoch_window)
+    ma20 = _moving_average(close, 20)
+    ma50 = _moving_average(close, 50)
+
+    adl = np.cumsum(np.nan_to_num(money_flow_volume(high, low, close, volume)), axis=0)
+    chaikin_emas = ema(adl, [3, 10])
+
+    table = pd.DataFrame({
+        'close': close[-1],
+        'change_1d': close[-1] / close[-2] - 1,
+        'rsi': rsi(close, rsi_window)[-1],
+        'macd': macd[-1],
+        'macd_signal': signal_line[-1],
+        'macd_cross': _crossed(macd, signal_line, cross_days),
+        'stoch_k': k[-1],
+        'stoch_d': k[-3:].mean(axis=0),
+        'ma20': ma20[-1],
+        'ma50': ma50[-1],
+        'ma_cross': _crossed(ma20, ma50, cross_days),
+        'chaikin': chaikin_emas[-1, :, 0] - chaikin_emas[-1, :, 1],
+    }, index=pd.Index(tickers, name='ticker'))
+    table['macd_state'] = np.where(table['macd'] > table['macd_signal'], 'bullish', 'bearish')
+    table['stoch_state'] = np.select([table['stoch_k'] < 20, table['stoch_k'] > 80], ['oversold', 'overbought'], 'neutral')
+    return table.dropna(subset=['close'])
+
+
+# Named screens: each maps the indicator table to a boolean mask
+FILTERS = {
+    'All': lambda t: pd.Series(True, index=t.index),
+    'RSI oversold (< 30)': lambda t: t['rsi'] < 30,
+    'RSI overbought (> 70)': lambda t: t['rsi'] > 70,
+    'MACD bullish cross': lambda t: t['macd_cross'] > 0,
+    'MACD bearish cross': lambda t: t['macd_cross'] < 0,
+    'Golden cross (MA20 over MA50)': lambda t: t['ma_cross'] > 0,
+    'Death cross (MA20 under MA50)': lambda t: t['ma_cross'] < 0,
+    'Stochastic oversold': lambda t: t['stoch_state'] == 'oversold',
+    'Stochastic overbought': lambda t: t['stoch_state'] == 'overbought',
+    'Chaikin accumulation (> 0)': lambda t: t['chaikin'] > 0,
+}
+
+
+def screen(table, filters=('All',), sort_by='rsi', ascending=True):
+    """
+    Keep the tickers matching every named filter and sort them.
+    """
+    mask = pd.Series(True, index=table.index)
+    for name in filters:
+        mask &= FILTERS[name](table)
+    return table[mask].sort_values(sort_by, ascending=ascending)
+
+
+def run_screener(universe='store', end=None, lookback_days=DEFAULT_LOOKBACK_DAYS, filters=('All',),
+                 sort_by='rsi', ascending=True, store=None, download=False, matrix=None):
+    """
+    Load a universe from the price store (or a PriceMatrix that is current for it), compute the
+    indicators and apply the screens.
+
+    Returns:
+    - DataFrame: Matching tickers with their latest indicator values.
+    """
+    store = store or PriceStore()
+    end = pd.Timestamp(end or date.today() + timedelta(days=1))
+    tickers = load_universe(universe, store)
+    fields = load_fields(tickers, end - pd.Timedelta(days=lookback_days), end, store, download, matrix=matrix)
+    return screen(compute_indicators(fields), filters, sort_by, ascending)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen a ticker universe by technical indicators.")
+    parser.add_argument('--universe', default='store', help="'store', 'watchlist' or a ticker file")
+    parser.add_argument('--filter', action='append', choices=sorted(FILTERS), help="Repeat to combine screens")
+    parser.add_argument('--sort', default='rsi')
+    parser.add_argument('--descending', action='store_true')
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--download', action='store_true', help="Fetch missing bars before screening")
+    parser.add_argument('--matrix', action='store_true', help="Read prices from the memory-mapped price matrix")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    store = PriceStore(args.store_dir)
+    matrix = PriceMatrix() if args.matrix else None
+    if matrix is not None:
+        stale = matrix.stale_tickers(store, load_universe(args.universe, store))
+        if stale:
+            print(f"Price matrix is out of date for {len(stale)} tickers, reading the price store instead "
+                  f"(rebuild with python price_matrix.py)")
+    results = run_screener(args.universe, filters=args.filter or ('All',), sort_by=args.sort,
+                           ascending=not args.descending, store=store, download=args.download, matrix=matrix)
+    print(results.to_string())
+    print(f"{len(results)} matches in {time.perf_counter() - started:.2f}s")
+
+
+if __name__ == '__main__':
+    main()
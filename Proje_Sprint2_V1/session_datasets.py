@@ -0,0 +1,85 @@
+# session_datasets.py
+
+from collections import OrderedDict
+
+# Default memory budget of one session's datasets
+DEFAULT_MAX_BYTES = 256 * 1024 ** 2
+
+
+def frame_nbytes(data):
+    """
+    Memory used by a DataFrame or Series, including the index and object columns.
+    """
+    return int(data.memory_usage(deep=True).sum()) if hasattr(data, 'columns') else int(data.memory_usage(deep=True))
+
+
+class SessionDatasets:
+    """
+    In-memory datasets of one user session, kept across Streamlit script re-runs.
+
+    Frames are stored under a hashable key (e.g. (ticker, start, end)) and their size is
+    accounted in bytes. When the total exceeds `max_bytes`, the least recently used frames
+    are evicted; the frame just stored is always kept, even if it alone exceeds the budget.
+    Keep one instance in st.session_state.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()
+        self.nbytes = 0
+        self.evictions = 0
+
+    def put(self, key, data):
+        """
+        Store a frame under a key, replacing any previous frame of that key.
+
+        Returns:
+        - list: Keys of the frames evicted to stay within the budget.
+        """
+        self.pop(key)
+        size = frame_nbytes(data)
+        self._frames[key] = (data, size)
+        self.nbytes += size
+
+        evicted = []
+        while self.nbytes > self.max_bytes and len(self._frames) > 1:
+            old_key, (_, old_size) = self._frames.popitem(last=False)
+            self.nbytes -= old_size
+            evicted.append(old_key)
+        self.evictions += len(evicted)
+        return evicted
+
+    def get(self, key, default=None):
+        """
+        Return the frame of a key (marking it as recently used), or `default`.
+        """
+        if key not in self._frames:
+            return default
+        self._frames.move_to_end(key)
+        return self._frames[key][0]
+
+    def pop(self, key):
+        entry = self._frames.pop(key, None)
+        if entry is None:
+            return None
+        self.nbytes -= entry[1]
+        return entry[0]
+
+    def missing(self, keys):
+        """
+        Return the keys that are not (or no longer) stored.
+        """
+        return [key for key in keys if key not in self._frames]
+
+    def keys(self):
+        return list(self._frames)
+
+    def clear(self):
+        self._frames.clear()
+        self.nbytes = 0
+
+    def __contains__(self, key):
+        return key in self._frames
+
+    def __len__(self):
+        return len(self._frames)
@@ -1,19 +1,23 @@
 import csv
 import random
 import math
-import operator
-
-import pandas_datareader.data as web
 import datetime
+
+import numpy as np
 import pandas as pd
+import yfinance as yf
 
 import matplotlib.pyplot as plt   # Import matplotlib
-import json
+
+from price_store import PriceStore, normalize_ohlcv
+
+# columns of the csv written by getData; the first is the date and the last the class
+iv = ["date", "open", "high", "low", "yesterday closing adj", "state change"]
 
 # split the data into a trainingdataset and testdataset in ratio of 67/33
 
 def loadDataset(filename, split, trainingSet=[], testSet=[], content_header=[]):
-    with open(filename, 'rb') as csvfile:
+    with open(filename, 'r', newline='') as csvfile:
         # returns a reader object which will iterate over lines
         lines = csv.reader(csvfile)
         # dataset is a list of all data, where each item is a line as list
@@ -30,30 +34,92 @@ def loadDataset(filename, split, trainingSet=[], testSet=[], content_header=[]):
                 testSet.append(dataset[x])
 
 
+# turn csv rows [date, features..., class] into a float feature matrix and a label array
+def splitRows(rows):
+    features = np.array([row[1:-1] for row in rows], dtype='float64').reshape(len(rows), -1)
+    labels = np.array([row[-1] for row in rows])
+    return features, labels
+
 
 def euclideanDistance(instance1, instance2, length):
-    distance = 0
-    for x in range(1, length):
-        distance += pow((instance1[x] - instance2[x]), 2)
-    return math.sqrt(distance)
+    return math.sqrt(np.sum(np.square(np.subtract(instance1[1:length], instance2[1:length], dtype='float64'))))
+
+
+# votes of each row of neighbour class codes; ties go to the class of the nearest neighbour,
+# as with the insertion-ordered vote count of the original getResponse
+def majority_vote(codes, n_classes):
+    k = codes.shape[1]
+    onehot = codes[:, :, None] == np.arange(n_classes)
+    counts = onehot.sum(axis=1)
+    first = np.where(onehot.any(axis=1), onehot.argmax(axis=1), k)
+    return np.argmax(counts * (k + 1) + (k - first), axis=1)
+
+
+class KNNClassifier:
+    """
+    k-nearest-neighbour classifier over numeric feature rows.
+
+    All test instances are queried in one batch: through a KD-tree (scipy's cKDTree) for
+    low-dimensional features, otherwise with chunked brute-force distances and an
+    argpartition top-k, so there is no Python loop per instance and no full sort.
+    """
+
+    def __init__(self, k=5, algorithm='auto', chunk_size=512):
+        self.k = k
+        self.algorithm = algorithm
+        self.chunk_size = chunk_size
+
+    def fit(self, X, y):
+        self.X_ = np.ascontiguousarray(X, dtype='float64')
+        self.classes_, self.y_ = np.unique(np.asarray(y), return_inverse=True)
+        self.tree_ = None
+        if self.algorithm == 'kd_tree' or (self.algorithm == 'auto' and self.X_.shape[1] <= 15):
+            try:
+                from scipy.spatial import cKDTree
+            except ImportError:
+                if self.algorithm == 'kd_tree':
+                    raise
+            else:
+                self.tree_ = cKDTree(self.X_)
+        return self
+
+    def kneighbors(self, X):
+        """
+        Distances and training indices of the k nearest neighbours of every row, nearest first.
+        """
+        X = np.atleast_2d(np.asarray(X, dtype='float64'))
+        k = min(self.k, len(self.X_))
+        if self.tree_ is not None:
+            dist, idx = self.tree_.query(X, k=k, workers=-1)
+            return dist.reshape(len(X), k), idx.reshape(len(X), k)
+
+        dist = np.empty((len(X), k))
+        idx = np.empty((len(X), k), dtype=np.intp)
+        train_sq = np.einsum('ij,ij->i', self.X_, self.X_)
+        for start in range(0, len(X), self.chunk_size):
+            chunk = X[start:start + self.chunk_size]
+            d2 = np.einsum('ij,ij->i', chunk, chunk)[:, None] + train_sq[None, :] - 2 * chunk @ self.X_.T
+            np.maximum(d2, 0, out=d2)
+            # top-k without sorting the whole row, then order only those k
+            part = np.argpartition(d2, k - 1, axis=1)[:, :k]
+            part_d2 = np.take_along_axis(d2, part, axis=1)
+            order = np.argsort(part_d2, axis=1, kind='stable')
+            idx[start:start + len(chunk)] = np.take_along_axis(part, order, axis=1)
+            dist[start:start + len(chunk)] = np.sqrt(np.take_along_axis(part_d2, order, axis=1))
+        return dist, idx
+
+    def predict(self, X):
+        _, idx = self.kneighbors(X)
+        return self.classes_[majority_vote(self.y_[idx], len(self.classes_))]
 
 
 # get k nearest neighbors of the <array><num> testInstance among <array><array>
 # trainingSet
 def getNeighbors(trainingSet, testInstance, k):
-    distance = []
-    # minus 1 because we are splitting our data and test also has known class
-    length = len(testInstance) - 1
-
-    for x in range((len(trainingSet))):
-        dist = euclideanDistance(testInstance, trainingSet[x], length)
-        distance.append((trainingSet[x], dist))
-    # sort based on the the item at index 1 i.e the distance
-    distance.sort(key=operator.itemgetter(1))
-    neighbors = []
-    for x in range(k):
-        neighbors.append(distance[x][0])
-    return neighbors
+    features, labels = splitRows(trainingSet)
+    knn = KNNClassifier(k).fit(features, labels)
+    _, idx = knn.kneighbors(splitRows([testInstance])[0])
+    return [trainingSet[i] for i in idx[0]]
 
 
 # make all responses vote their classification, the one with the highest vote
@@ -66,24 +132,18 @@ def getResponse(neighbors):
             classVotes[response] += 1
         else:
             classVotes[response] = 1
-    sortedVotes = sorted(classVotes.iteritems(), key=operator.itemgetter(1), reverse=True)
+    sortedVotes = sorted(classVotes.items(), key=lambda item: item[1], reverse=True)
     return sortedVotes[0][0]
 
 
 def getAccuracy(testSet, predictions):
-    correct = 0
-    for x in range(len(testSet)):
-        if testSet[x][-1] == predictions[x]:
-            correct += 1
-    return (correct/float(len(testSet))) * 100.0
+    actual = np.array([row[-1] for row in testSet])
+    return float(np.mean(actual == np.asarray(predictions))) * 100.0
 
 
 def getAccuracy1(testSet, predictions):
-    correct = 0
-    for x in range(len(testSet)):
-        if RMSD(testSet[x][-1], predictions[x]) < 1:
-            correct += 1
-    return (correct/float(len(testSet))) * 100.0
+    actual = np.array([row[-1] for row in testSet], dtype='float64')
+    return float(np.mean(np.abs(actual - np.asarray(predictions, dtype='float64')) < 1)) * 100.0
 
 
 def RMSD(X, Y):
@@ -96,98 +156,117 @@ def change(today, yest):
     return 'down'
 
 
+# daily features of one ticker's OHLCV bars, one row per day after the first;
+# relative=True expresses open/high/low as ratios to yesterday's close so that
+# tickers at different price levels can share one training set
+def build_features(data, relative=False):
+    prev_close = data['Adj Close'].shift(1)
+    features = pd.DataFrame({
+        'open': data['Open'],
+        'high': data['High'],
+        'low': data['Low'],
+        'yesterday closing adj': prev_close,
+    }, index=data.index)
+    if relative:
+        features = features[['open', 'high', 'low']].div(prev_close, axis=0) - 1
+    features['state change'] = np.where(data['Adj Close'] > prev_close, 'up', 'down')
+    return features.iloc[1:].dropna()
+
 
 def getData(filename, stockname, startdate, enddate):
-    stock = web.DataReader(stockname, 'yahoo', startdate, enddate)
+    stock = normalize_ohlcv(yf.download(stockname, start=startdate, end=enddate, auto_adjust=False, progress=False))
     print("done making network call")
-    ass = [stock.index]
-    stck_json = stock.to_json(orient="index", date_format='iso')
-    stck_dates = json.loads(stck_json)
 
     plt.plot(stock["Adj Close"])
     plt.title("Stock movement of " + stockname)
 
-    first_time = True
-    with open(filename, 'wb') as pp:
-        stockwriter = csv.writer(pp)
-        stp = sorted(stck_dates.keys())
-        for i in stp:
-            new_format_date = i[:10]
-            if first_time:
-                first_time = False
-                prev_closing = stck_dates[i]["Adj Close"]
-                continue
-            stockwriter.writerow([new_format_date] + [stck_dates[i]["Open"]] +  [stck_dates[i]["High"]] + [stck_dates[i]["Low"]]  +  [stck_dates[i]["Adj Close"]] + [change(stck_dates[i]["Adj Close"], prev_closing)])
-            prev_closing = stck_dates[i]["Adj Close"]
+    features = build_features(stock)
+    features.insert(0, 'date', features.index.strftime('%Y-%m-%d'))
+    features.to_csv(filename, header=False, index=False)
 
 
 def abc(filename, stockname, startdate, enddate):
-    apple = web.DataReader(stockname, 'yahoo', startdate, enddate)
-    with open(filename, 'wb') as csvfile:
+    apple = normalize_ohlcv(yf.download(stockname, start=startdate, end=enddate, auto_adjust=False, progress=False))
+    with open(filename, 'w', newline='') as csvfile:
         stockwriter = csv.writer(csvfile, quotechar=',')
         for ind in range(1, len(apple.Open)):
-            stockwriter.writerow(["open: "] + [apple.Open[ind - 1]] + ["    high: "] + [apple.High[ind - 1]] + ["   low: "] + [apple.Low[ind - 1]] + ["  yester close: "] + [apple['Adj Close'][ind - 1]] + [" volume: "] + [apple.Volume[ind - 1]] + [change(apple['Adj Close'][ind], apple['Adj Close'][ind - 1])])
+            stockwriter.writerow(["open: "] + [apple.Open.iloc[ind - 1]] + ["    high: "] + [apple.High.iloc[ind - 1]] + ["   low: "] + [apple.Low.iloc[ind - 1]] + ["  yester close: "] + [apple['Adj Close'].iloc[ind - 1]] + [" volume: "] + [apple.Volume.iloc[ind - 1]] + [change(apple['Adj Close'].iloc[ind], apple['Adj Close'].iloc[ind - 1])])
 
 
+def plotTrends(dates, predictions, actual, stockname):
+    dates = pd.to_datetime(dates, format="%Y-%m-%d")
+    order = np.argsort(dates)
+    plt.figure(2)
+    plt.title("Prediction vs Actual Trend of " + stockname)
+    predicted_plt, = plt.plot(dates[order], np.where(np.asarray(predictions)[order] == "down", -1, 1), 'r', label="Predicted Trend")
+    actual_plt, = plt.plot(dates[order], np.where(np.asarray(actual)[order] == "down", -1, 1), 'b', label="Actual Trend")
+    plt.legend(handles=[predicted_plt, actual_plt])
+    plt.show()
 
 
-def predict_and_get_accuracy(testSet, trainingSet, k, stockname):
-    predictions = []
-    for x in range(len(testSet)):
-        neighbors = getNeighbors(trainingSet, testSet[x], k)
-        result = getResponse(neighbors)
-        predictions.append(result)
+def predict_and_get_accuracy(testSet, trainingSet, k, stockname, plot=True):
+    # one batched query for the whole test set
+    train_features, train_labels = splitRows(trainingSet)
+    test_features, test_labels = splitRows(testSet)
+    predictions = KNNClassifier(k).fit(train_features, train_labels).predict(test_features)
 
     accuracy = getAccuracy(testSet, predictions)
     print('Accuracy: ' + repr(accuracy) + '%')
 
-    # drawing another
-    plt.figure(2)
-    plt.title("Prediction vs Actual Trend of " + stockname)
-    plt.legend(loc="best")
-    row = []
-    col = []
-    for dates in range(len(testSet)):
-        new_date = datetime.datetime.strptime(testSet[dates][0], "%Y-%M-%d")
-        row.append(new_date)
-        if predictions[dates]== "down":
-            col.append(-1)
-        else:
-            col.append(1)
-    predicted_plt, = plt.plot(row, col, 'r', label="Predicted Trend")
-
-    row = []
-    col = []
-    for dates in range(len(testSet)):
-        new_date = datetime.datetime.strptime(testSet[dates][0], "%Y-%M-%d")
-        row.append(new_date)
-        if testSet[dates][-1]== "down":
-            col.append(-1)
-        else:
-            col.append(1)
-    actual_plt, = plt.plot(row, col, 'b', label="Actual Trend")
-
-    plt.legend(handles=[predicted_plt, actual_plt])
-
-
-    plt.show()
+    if plot:
+        plotTrends([row[0] for row in testSet], predictions, test_labels, stockname)
+    return predictions, accuracy
 
 
-def main():
- iv = ["date", "open", "high", "low", "yesterday closing adj", "state change"]
+def predictFor(k, filename, stockname, startdate, enddate, writeAgain, split):
     trainingSet = []
     testSet = []
     totalCount = 0
-    k = 5
 
-    print("Predicting for ", company_name)
-    print("Train: " + repr(len(X_train)))
-    print("Test: " + repr(len(X_test)))
-    totalCount += len(X_train) + len(X_test)
+    if writeAgain:
+        print("making a network request")
+        getData(filename, stockname, startdate, enddate)
+
+    loadDataset(filename, split, trainingSet, testSet, iv)
+
+    print("Predicting for ", stockname)
+    print("Train: " + repr(len(trainingSet)))
+    print("Test: " + repr(len(testSet)))
+    totalCount += len(trainingSet) + len(testSet)
     print("Total: " + repr(totalCount))
 
     # generate predictions
-    predict_and_get_accuracy(X_train, X_test, k, company_name)
-    predictFor(5, 'yahoo.csv', 'YHOO', startdate, enddate, 1, split)
+    return predict_and_get_accuracy(testSet, trainingSet, k, stockname)
+
+
+# classify up/down days of many tickers with one shared k-NN over relative features,
+# e.g. years of daily bars for a whole watchlist; the first `split` of the trading days
+# (all tickers) is the training set, so no day is predicted from later days
+def predictUniverse(k, tickers, startdate, enddate, split):
+    panel = PriceStore().get_many(tickers, startdate, enddate)
+    frames = {ticker: build_features(panel[ticker].dropna(how='all'), relative=True) for ticker in tickers}
+    data = pd.concat(frames, names=['ticker', 'date']).reset_index()
+
+    features = data[['open', 'high', 'low']].to_numpy(dtype='float64')
+    labels = data['state change'].to_numpy()
+    dates = np.sort(data['date'].unique())
+    cutoff = dates[min(int(len(dates) * split), len(dates) - 1)]
+    train = (data['date'] < cutoff).to_numpy()
+
+    predictions = KNNClassifier(k).fit(features[train], labels[train]).predict(features[~train])
+    results = data.loc[~train, ['ticker', 'date', 'state change']].assign(predicted=predictions)
+    accuracy = results.assign(correct=results['state change'] == results['predicted']).groupby('ticker')['correct'].mean() * 100.0
+    print("Train: " + repr(int(train.sum())) + " Test: " + repr(int((~train).sum())) + " from " + str(pd.Timestamp(cutoff).date()))
+    print(accuracy.to_string())
+    return results
+
+
+def main():
+    split = 0.67
+    startdate = datetime.datetime(2010, 1, 1)
+    enddate = datetime.date.today()
+    predictFor(5, 'aapl.csv', 'AAPL', startdate, enddate, 1, split)
+
 
-main()
\ No newline at end of file
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,149 @@
+# stock_dataset.py
+"""
+Partitioned on-disk dataset of daily stock bars, replacing the flat stock_data.csv.
+
+Rows are written in date order to one compressed parquet file per ticker and year
+(hive layout: <root>/ticker=AAPL/year=2024/part-0.parquet), with typed columns: a
+datetime64 Date, float64 prices and int64 volume. Readers load one ticker or date range
+by passing filters to pyarrow, which skips whole partitions and row groups instead of
+parsing everything.
+
+Usage:
+    python stock_dataset.py AAPL META NVDA NFLX --start 2020-01-01      # export from the price store
+    python stock_dataset.py --read AAPL --start 2023-01-01              # read back one ticker
+"""
+
+import argparse
+import os
+import shutil
+from datetime import date
+
+import pandas as pd
+
+from price_store import DEFAULT_STORE_DIR, PriceStore
+
+# Default location of the dataset (next to this module)
+DEFAULT_DATASET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'stock_dataset')
+
+# Column types of the stored bars
+COLUMN_TYPES = {'Open': 'float64', 'High': 'float64', 'Low': 'float64', 'Close': 'float64',
+                'Adj Close': 'float64', 'Volume': 'int64'}
+
+
+def _typed(data):
+    data = data[[col for col in COLUMN_TYPES if col in data.columns]]
+    if 'Volume' in data.columns:
+        data = data.assign(Volume=data['Volume'].fillna(0).round())
+    return data.astype({col: dtype for col, dtype in COLUMN_TYPES.items() if col in data.columns})
+
+
+def write_dataset(company_list, root=DEFAULT_DATASET_DIR, compression='zstd', ticker_col='company_name'):
+    """
+    Write per-ticker frames to the partitioned dataset, replacing everything stored for each ticker.
+
+    The years of a ticker are written to a hidden staging directory (ignored by readers) that
+    then takes the place of the ticker's directory, so no stale years or rows of an earlier save
+    survive and a failed write leaves the previous data intact.
+
+    Parameters:
+    - company_list: List of Date-indexed OHLCV DataFrames, one per ticker, each with the ticker in
+      `ticker_col` (as returned by download_and_preprocess_data), or a dict {ticker: DataFrame}.
+    - root: Dataset directory.
+    - compression: Parquet compression codec.
+    - ticker_col: Column holding the ticker of each frame in a list.
+
+    Returns:
+    - list: Paths of the files written.
+    """
+    if isinstance(company_list, dict):
+        frames = [(ticker, data) for ticker, data in company_list.items() if len(data)]
+    else:
+        frames = [(data[ticker_col].iloc[0], data) for data in company_list if len(data)]
+
+    written = []
+    for ticker, data in frames:
+        data = _typed(data.sort_index())
+        data.index = pd.DatetimeIndex(data.index, name='Date')
+        ticker_dir = os.path.join(root, f"ticker={ticker}")
+        staging_dir = os.path.join(root, f".ticker={ticker}.tmp")
+        shutil.rmtree(staging_dir, ignore_errors=True)
+        for year, rows in data.groupby(data.index.year, sort=True):
+            os.makedirs(os.path.join(staging_dir, f"year={year}"))
+            rows.to_parquet(os.path.join(staging_dir, f"year={year}", 'part-0.parquet'), compression=compression)
+            written.append(os.path.join(ticker_dir, f"year={year}", 'part-0.parquet'))
+        remove_ticker(ticker, root)
+        os.replace(staging_dir, ticker_dir)
+    return written
+
+
+def read_dataset(root=DEFAULT_DATASET_DIR, tickers=None, start=None, end=None, columns=None):
+    """
+    Load bars from the dataset, reading only the partitions and row groups that can match.
+
+    Parameters:
+    - root: Dataset directory.
+    - tickers: Ticker symbol or list of symbols (default: all).
+    - start, end: Date range (end exclusive; default: open-ended).
+    - columns: Price columns to load (default: all).
+
+    Returns:
+    - DataFrame: Date-indexed bars with a 'ticker' column, sorted by ticker and date.
+    """
+    filters = []
+    if tickers is not None:
+        filters.append(('ticker', 'in', [tickers] if isinstance(tickers, str) else list(tickers)))
+    if start is not None:
+        start = pd.Timestamp(start)
+        filters += [('year', '>=', start.year), ('Date', '>=', start)]
+    if end is not None:
+        end = pd.Timestamp(end)
+        filters += [('year', '<=', end.year), ('Date', '<', end)]
+    if columns is not None:
+        # The Date index is restored from the pandas metadata of the files
+        columns = ['ticker'] + [col for col in columns if col not in ('Date', 'ticker')]
+
+    data = pd.read_parquet(root, engine='pyarrow', columns=columns, filters=filters or None)
+    data['ticker'] = data['ticker'].astype(str)
+    data = data.drop(columns='year', errors='ignore')
+    if 'Date' in data.columns:
+        data = data.set_index('Date')
+    return data.sort_values(['ticker', 'Date'], kind='stable')
+
+
+def remove_ticker(ticker, root=DEFAULT_DATASET_DIR):
+    """
+    Delete every stored year of a ticker.
+    """
+    shutil.rmtree(os.path.join(root, f"ticker={ticker}"), ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export stored prices to the partitioned dataset, or read it back.")
+    parser.add_argument('tickers', nargs='*', help="Ticker symbols (default for --read: all)")
+    parser.add_argument('--tickers-file', help="Text file with one ticker per line")
+    parser.add_argument('--start', default='2020-01-01')
+    parser.add_argument('--end', default=None)
+    parser.add_argument('--read', action='store_true', help="Read the dataset instead of writing it")
+    parser.add_argument('--dataset-dir', default=DEFAULT_DATASET_DIR)
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers]
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip().upper() for line in f if line.strip()]
+
+    if args.read:
+        data = read_dataset(args.dataset_dir, tickers or None, args.start, args.end)
+        print(data)
+        print(data.groupby('ticker').size().rename('rows').to_string())
+        return
+
+    end = args.end or date.today().isoformat()
+    panel = PriceStore(args.store_dir).get_many(tickers, args.start, end)
+    written = write_dataset({ticker: panel[ticker].dropna(how='all').ffill() for ticker in tickers}, args.dataset_dir)
+    print(f"Wrote {len(written)} files for {len(tickers)} tickers to {args.dataset_dir}")
+
+
+if __name__ == '__main__':
+    main()
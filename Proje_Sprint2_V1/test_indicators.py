@@ -0,0 +1,37 @@
+# test_indicators.py
+"""
+Parity tests of the vectorized indicators.py against the original loop-based library.
+
+Run with:
+    python -m pytest Proje_Sprint2_V1/test_indicators.py
+"""
+
+import numpy as np
+import pytest
+
+import indicators
+from benchmark_indicators import LOOP_INDICATORS, _run, load_reference, synthetic_ohlcv
+
+RTOL = 1e-7
+ATOL = 1e-9
+
+
+@pytest.fixture(scope='module')
+def reference():
+    return load_reference()
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('name', LOOP_INDICATORS)
+def test_matches_reference(reference, name, seed):
+    base = synthetic_ohlcv(750, seed)
+    expected = _run(getattr(reference, name), base.copy())
+    actual = _run(getattr(indicators, name), base.copy())
+
+    new_columns = expected.columns.difference(base.columns)
+    assert list(new_columns), f"{name} added no columns"
+    assert set(new_columns) <= set(actual.columns)
+    for column in new_columns:
+        np.testing.assert_allclose(actual[column].to_numpy(dtype='float64'), expected[column].to_numpy(dtype='float64'),
+                                   rtol=RTOL, atol=ATOL, equal_nan=True, err_msg=f"{name}: {column}")
+
@@ -0,0 +1,69 @@
+# test_model_registry.py
+"""
+Tests of serving exported (ONNX) registry models without rebuilding the keras network.
+
+Run with:
+    python -m pytest Proje_Sprint2_V1/test_model_registry.py
+"""
+
+import os
+
+import pytest
+
+pytest.importorskip('joblib')
+pytest.importorskip('sklearn')
+
+import model_export  # noqa: E402
+from global_model import GLOBAL_TICKER  # noqa: E402
+from model_export import ArrayMinMaxScaler  # noqa: E402
+from model_registry import ModelRegistry  # noqa: E402
+
+
+class FakeOnnxModel:
+    """
+    Stand-in for OnnxPriceModel that only records the path it was opened with.
+    """
+
+    def __init__(self, path):
+        self.path = path
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    monkeypatch.setattr(model_export, 'onnxruntime_available', lambda: True)
+    monkeypatch.setattr(model_export, 'OnnxPriceModel', FakeOnnxModel)
+    registry = ModelRegistry(str(tmp_path))
+    monkeypatch.setattr(registry, 'load_keras', lambda key: ('keras', 'scaler'))
+    return registry
+
+
+def export(registry, key, scaler=None):
+    onnx_path, scaler_path = registry.onnx_paths(key)
+    os.makedirs(os.path.dirname(onnx_path), exist_ok=True)
+    with open(onnx_path, 'wb') as f:
+        f.write(b'onnx')
+    if scaler is not None:
+        scaler.save(scaler_path)
+    return onnx_path
+
+
+def test_global_model_without_scaler(registry):
+    key = ModelRegistry.make_key(GLOBAL_TICKER, 60, '2015-01-01', '2024-01-01')
+    onnx_path = export(registry, key)
+    model, scaler = registry.load(key)
+    assert isinstance(model, FakeOnnxModel) and model.path == onnx_path
+    assert scaler is None
+
+
+def test_ticker_model_with_scaler(registry):
+    key = ModelRegistry.make_key('AAPL', 60, '2015-01-01', '2024-01-01')
+    export(registry, key, ArrayMinMaxScaler([0.5], [-1.]))
+    model, scaler = registry.load(key)
+    assert isinstance(model, FakeOnnxModel)
+    assert scaler.transform([[4.]]).tolist() == [[1.]]
+
+
+def test_ticker_model_without_scaler_falls_back(registry):
+    key = ModelRegistry.make_key('AAPL', 60, '2015-01-01', '2024-01-01')
+    export(registry, key)
+    assert registry.load(key) == ('keras', 'scaler')
@@ -0,0 +1,94 @@
+# test_rolling_stats.py
+"""
+Tests of the incrementally updated rolling statistics against a full pandas recalculation.
+
+Run with:
+    python -m pytest Proje_Sprint2_V1/test_rolling_stats.py
+"""
+
+import numpy as np
+import pandas as pd
+
+from rolling_stats import RollingStatsStore, compute_rolling_stats
+
+
+class FakeStore:
+    """
+    PriceStore stand-in whose stored bars are replaced by the test.
+    """
+
+    def __init__(self, root, bars):
+        self.root = root
+        self.bars = bars
+
+    def load(self, ticker, interval='1d'):
+        return self.bars
+
+
+def synthetic_bars(start, end, seed=0):
+    dates = pd.bdate_range(start, end, inclusive='left', name='Date')
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, len(dates))))
+    return pd.DataFrame({'Open': close, 'High': close * 1.01, 'Low': close * 0.99, 'Close': close,
+                         'Volume': 1e6}, index=dates)
+
+
+def assert_matches_batch(stats, bars):
+    pd.testing.assert_frame_equal(stats, compute_rolling_stats(bars), check_freq=False, rtol=1e-10)
+
+
+def test_appended_bars(tmp_path):
+    history = synthetic_bars('2018-01-01', '2021-06-01')
+    store = FakeStore(str(tmp_path), history.loc[:'2020-12-31'])
+    stats_store = RollingStatsStore(store)
+    stats_store.update('AAPL')
+
+    store.bars = history
+    assert_matches_batch(stats_store.update('AAPL'), history)
+
+
+def test_prepended_history(tmp_path):
+    history = synthetic_bars('2018-01-01', '2021-06-01')
+    store = FakeStore(str(tmp_path), history.loc['2020-01-01':])
+    stats_store = RollingStatsStore(store)
+    stats_store.update('AAPL')
+
+    # Backfilling an earlier start date adds no bars after the last stored one
+    store.bars = history
+    stats = stats_store.get('AAPL', start='2018-01-01')
+    assert len(stats) == len(history)
+    assert_matches_batch(stats, history)
+
+
+def test_filled_gap(tmp_path):
+    history = synthetic_bars('2018-01-01', '2021-06-01')
+    store = FakeStore(str(tmp_path), history.drop(history.index[300:320]))
+    stats_store = RollingStatsStore(store)
+    stats_store.update('AAPL')
+
+    store.bars = history
+    assert_matches_batch(stats_store.update('AAPL'), history)
+
+
+def test_range_matches_in_range_calculation(tmp_path):
+    history = synthetic_bars('2018-01-01', '2021-06-01')
+    stats_store = RollingStatsStore(FakeStore(str(tmp_path), history))
+    stats_store.update('AAPL')
+
+    # Like the EMA/ADL columns, the windows start over at the beginning of the range
+    stats = stats_store.get('AAPL', start='2020-03-02', end='2021-01-01')
+    assert_matches_batch(stats, history.loc['2020-03-02':'2020-12-31'])
+
+
+def test_state_reloaded_from_disk(tmp_path):
+    history = synthetic_bars('2018-01-01', '2021-06-01')
+    store = FakeStore(str(tmp_path), history.loc[:'2020-12-31'])
+    RollingStatsStore(store).update('AAPL')
+
+    # A new instance has no in-memory cache and continues from the stored state
+    store.bars = history
+    stats_store = RollingStatsStore(store)
+    state, stats = stats_store._read('AAPL', '1d')
+    assert state.continues(history)
+    assert_matches_batch(stats, history.loc[:'2020-12-31'])
+    assert_matches_batch(stats_store.update('AAPL'), history)
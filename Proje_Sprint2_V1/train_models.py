@@ -0,0 +1,174 @@
+# train_models.py
+"""
+Offline batch trainer for the watchlist LSTM models.
+
+Trains one model per ticker across a process pool and writes the weights and scaler
+to the model registry, plus a JSON manifest with metrics and training time per ticker.
+
+Usage:
+    python train_models.py AAPL META NVDA NFLX --start 2020-01-01 --workers 4
+    python train_models.py --tickers-file watchlist.txt --end 2024-06-01 --profile fast
+    python train_models.py --global                 # one pooled model over every ticker in the store
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+from lstm_model import DEFAULT_PROFILE, TRAINING_PROFILES
+from model_registry import DEFAULT_REGISTRY_DIR, MODEL_CODE_VERSION
+from price_store import DEFAULT_STORE_DIR
+
+
+def _init_worker(threads_per_worker):
+    # Keep each worker's TensorFlow thread pools small so workers do not oversubscribe the CPU
+    for var in ('OMP_NUM_THREADS', 'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS'):
+        os.environ[var] = str(threads_per_worker)
+
+
+def train_ticker(ticker, start, end, window, store_dir, registry_dir, profile=DEFAULT_PROFILE, export=False):
+    """
+    Train, evaluate and register the LSTM of one ticker (runs inside a worker process).
+
+    Returns:
+    - dict: Manifest entry with the registry key id, metrics and training time.
+    """
+    from lstm_model import predict_holdout, train_lstm
+    from model_registry import ModelRegistry
+    from price_store import PriceStore
+
+    started = time.perf_counter()
+    dataset = PriceStore(store_dir).get(ticker, start, end).filter(['Close']).values
+    if len(dataset) <= window * 2:
+        return {'ticker': ticker, 'status': 'skipped', 'reason': f'only {len(dataset)} bars'}
+
+    registry = ModelRegistry(registry_dir)
+    key = registry.make_key(ticker, window, start, end, profile=profile)
+    model, scaler, report = train_lstm(dataset, window, profile=profile)
+    train_seconds = time.perf_counter() - started
+    _, rmse = predict_holdout(model, scaler, dataset, window)
+
+    metrics = dict(report, rmse=rmse, train_seconds=round(train_seconds, 3), n_bars=int(len(dataset)))
+    registry.save(key, model, scaler, metrics)
+    if export:
+        from model_export import export_registry_model
+        export_registry_model(registry, key)
+    return {'ticker': ticker, 'status': 'trained', 'key_id': registry.key_id(key), 'key': key, 'metrics': metrics}
+
+
+def train_watchlist(tickers, start, end, window=60, workers=None, threads_per_worker=1,
+                    store_dir=DEFAULT_STORE_DIR, registry_dir=DEFAULT_REGISTRY_DIR, profile=DEFAULT_PROFILE, export=False):
+    """
+    Train all tickers in parallel and write a manifest into the registry directory.
+
+    Returns:
+    - str: Path of the written manifest.
+    """
+    from price_store import PriceStore
+
+    # Fill the price store in one batched pass so workers only read from disk
+    PriceStore(store_dir).get_many(tickers, start, end)
+
+    started = time.perf_counter()
+    entries = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+        futures = {pool.submit(train_ticker, ticker, start, end, window, store_dir, registry_dir, profile, export): ticker
+                   for ticker in tickers}
+        for future in as_completed(futures):
+            try:
+                entry = future.result()
+            except Exception as e:
+                entry = {'ticker': futures[future], 'status': 'failed', 'reason': repr(e)}
+            print(f"{entry['ticker']}: {entry['status']} {entry.get('metrics', entry.get('reason', ''))}")
+            entries.append(entry)
+
+    manifest = {
+        'code_version': MODEL_CODE_VERSION,
+        'start': str(start),
+        'end': str(end),
+        'window': window,
+        'profile': profile,
+        'workers': workers or os.cpu_count(),
+        'wall_seconds': round(time.perf_counter() - started, 3),
+        'models': sorted(entries, key=lambda entry: entry['ticker']),
+    }
+    manifest_dir = os.path.join(registry_dir, 'manifests')
+    os.makedirs(manifest_dir, exist_ok=True)
+    manifest_path = os.path.join(manifest_dir, f"manifest_{time.strftime('%Y%m%dT%H%M%S')}.json")
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest_path
+
+
+def train_global(tickers, start, end, window=60, profile=DEFAULT_PROFILE, horizon=1,
+                 store_dir=DEFAULT_STORE_DIR, registry_dir=DEFAULT_REGISTRY_DIR):
+    """
+    Train the pooled global LSTM on all tickers and store it under GLOBAL_TICKER in the registry.
+
+    Returns:
+    - dict: Registry key of the stored model.
+    """
+    from global_model import GLOBAL_TICKER, train_global_lstm, universe_id
+    from model_registry import ModelRegistry
+    from price_store import PriceStore
+
+    panel = PriceStore(store_dir).get_many(tickers, start, end)
+    histories = {ticker: panel[ticker]['Close'] for ticker in tickers if ticker in panel.columns.get_level_values(0)}
+
+    model, report = train_global_lstm(histories, window, profile=profile, horizon=horizon)
+    registry = ModelRegistry(registry_dir)
+    key = registry.make_key(GLOBAL_TICKER, window, start, end, profile=profile,
+                            horizon=horizon if horizon > 1 else None, universe=universe_id(histories))
+    registry.save(key, model, None, dict(report, tickers=sorted(histories)))
+    print(f"Global model {registry.key_id(key)}: {report}")
+    return key
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train LSTM price models for a list of tickers.")
+    parser.add_argument('tickers', nargs='*', help="Ticker symbols, e.g. AAPL META")
+    parser.add_argument('--tickers-file', help="Text file with one ticker per line")
+    parser.add_argument('--start', default='2020-01-01', help="First date of the training history")
+    parser.add_argument('--end', default=str(date.today()), help="End of the training history (exclusive)")
+    parser.add_argument('--window', type=int, default=60, help="Number of past days per sample")
+    parser.add_argument('--profile', default=DEFAULT_PROFILE, choices=sorted(TRAINING_PROFILES),
+                        help="Training profile (speed/quality tradeoff)")
+    parser.add_argument('--global', dest='global_model', action='store_true',
+                        help="Train one pooled model on all tickers (default: every ticker in the store)")
+    parser.add_argument('--horizon', type=int, default=1,
+                        help="Outputs of the global model, for direct multi-step forecasts")
+    parser.add_argument('--export', action='store_true',
+                        help="Also export each trained model to ONNX for TensorFlow-free serving")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--threads-per-worker', type=int, default=1, help="TensorFlow threads per worker")
+    parser.add_argument('--registry-dir', default=DEFAULT_REGISTRY_DIR)
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers]
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip().upper() for line in f if line.strip() and not line.startswith('#')]
+    tickers = list(dict.fromkeys(tickers))
+    if args.global_model:
+        from price_store import PriceStore
+        train_global(tickers or PriceStore(args.store_dir).tickers(), args.start, args.end, args.window,
+                     args.profile, args.horizon, args.store_dir, args.registry_dir)
+        return
+    if not tickers:
+        parser.error("no tickers given")
+
+    manifest_path = train_watchlist(tickers, args.start, args.end, args.window, args.workers,
+                                    args.threads_per_worker, args.store_dir, args.registry_dir, args.profile,
+                                    args.export)
+    print(f"Manifest written to {manifest_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,295 @@
+# walk_forward.py
+"""
+Walk-forward evaluation of the price models (LSTM, GradientBoosting, k-NN).
+
+Every ticker's history is cut into expanding folds: each fold trains on all bars before
+its test block and is scored on the block, so no model ever sees future data. All models
+predict the next trading day, on the same date folds, so their direction accuracy can be
+compared directly; the regressors also report RMSE and MAE in price units.
+
+Fold datasets are built once per ticker and model, cached as .npz files, and then shared by
+all folds, which run in parallel across a process pool. The result is one row per
+(ticker, model, fold), written as CSV.
+
+Usage:
+    python walk_forward.py AAPL META NVDA NFLX --models gbr knn --folds 5
+    python walk_forward.py --tickers-file sp500.txt --workers 16 --output results.csv
+"""
+
+import argparse
+import functools
+import hashlib
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import date
+
+import numpy as np
+import pandas as pd
+
+from lstm_model import TRAINING_PROFILES
+from price_store import DEFAULT_STORE_DIR, PriceStore
+
+# Default location of the fold dataset cache (next to this module)
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'walk_forward_cache')
+
+# Bump whenever the dataset construction changes so cached datasets are rebuilt
+DATASET_VERSION = '1'
+
+MODELS = ['lstm', 'gbr', 'knn']
+
+
+def expanding_folds(n_bars, n_folds=5, test_size=None, min_train=504):
+    """
+    Positions of expanding-window folds over a history of `n_bars` bars.
+
+    Parameters:
+    - n_bars: Length of the history.
+    - n_folds: Number of consecutive test blocks at the end of the history.
+    - test_size: Bars per test block (default: split everything after `min_train` evenly).
+    - min_train: Minimum number of bars before the first test block.
+
+    Returns:
+    - list: (train_end, test_end) pairs; fold i trains on [0, train_end) and tests on [train_end, test_end).
+    """
+    if test_size is None:
+        test_size = (n_bars - min_train) // n_folds
+    folds = []
+    for i in range(n_folds):
+        train_end = n_bars - (n_folds - i) * test_size
+        if test_size > 0 and train_end >= min_train:
+            folds.append((train_end, train_end + test_size))
+    return folds
+
+
+def _price(data):
+    return data['Adj Close'] if 'Adj Close' in data.columns else data['Close']
+
+
+def build_dataset(model_name, data, window=60):
+    """
+    Build the samples of one model for one ticker, in date order.
+
+    Every dataset holds the ticker's trading `dates` and `target_dates`, the date of the bar
+    being predicted, which is how folds are mapped onto samples. 'lstm' keeps the raw price
+    series (windows are cut per fold, after the scaler is fitted on the training part);
+    'gbr' and 'knn' hold one feature row per day with the next day's price as target.
+
+    Returns:
+    - dict of numpy arrays.
+    """
+    price = _price(data).dropna()
+    dates = price.index.values.astype('datetime64[ns]').astype('int64')
+
+    if model_name == 'lstm':
+        return {'price': price.to_numpy(dtype='float64'), 'dates': dates,
+                'target_dates': dates[window:]}
+
+    next_price = price.shift(-1)
+    if model_name == 'gbr':
+        from gbr_models import GBR_FEATURES, compute_gbr_features
+        features = compute_gbr_features(data)[GBR_FEATURES]
+    elif model_name == 'knn':
+        from stock_Price_Prediction import build_features
+        features = build_features(data, relative=True)[['open', 'high', 'low']]
+    else:
+        raise ValueError(f"Unknown model {model_name!r}, expected one of {MODELS}")
+
+    frame = features.join(pd.DataFrame({'prev': price, 'y': next_price,
+                                        'target_date': pd.Series(price.index, index=price.index).shift(-1)}),
+                          how='inner').dropna()
+    return {'dates': dates,
+            'X': frame[features.columns].to_numpy(dtype='float64'),
+            'y': frame['y'].to_numpy(dtype='float64'),
+            'prev': frame['prev'].to_numpy(dtype='float64'),
+            'target_dates': frame['target_date'].values.astype('datetime64[ns]').astype('int64')}
+
+
+def dataset_path(cache_dir, ticker, model_name, start, end, window):
+    digest = hashlib.sha1(f"{ticker}|{model_name}|{start}|{end}|{window}|{DATASET_VERSION}".encode()).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{ticker.upper()}_{model_name}_{digest}.npz")
+
+
+def cache_datasets(tickers, models, start, end, window=60, store_dir=DEFAULT_STORE_DIR, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Build and cache the dataset of every (ticker, model) pair that is not cached yet.
+
+    Returns:
+    - dict: (ticker, model) -> cached dataset path, for tickers with any data.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    paths = {(ticker, model_name): dataset_path(cache_dir, ticker, model_name, start, end, window)
+             for ticker in tickers for model_name in models}
+    missing = sorted({ticker for (ticker, _), path in paths.items() if not os.path.exists(path)})
+
+    if missing:
+        panel = PriceStore(store_dir).get_many(missing, start, end)
+        available = set(panel.columns.get_level_values(0))
+        for ticker in missing:
+            if ticker not in available:
+                continue
+            data = panel[ticker].dropna(how='all')
+            for model_name in models:
+                path = paths[(ticker, model_name)]
+                if not os.path.exists(path):
+                    with open(path + '.tmp', 'wb') as f:
+                        np.savez(f, **build_dataset(model_name, data, window))
+                    os.replace(path + '.tmp', path)
+
+    return {pair: path for pair, path in paths.items() if os.path.exists(path)}
+
+
+@functools.lru_cache(maxsize=64)
+def load_dataset(path):
+    with np.load(path) as data:
+        return {name: data[name] for name in data.files}
+
+
+def _metrics(predictions, actual, prev):
+    metrics = {'direction_accuracy': float(np.mean(np.sign(predictions - prev) == np.sign(actual - prev)))}
+    metrics['rmse'] = float(np.sqrt(np.mean((predictions - actual) ** 2)))
+    metrics['mae'] = float(np.mean(np.abs(predictions - actual)))
+    return metrics
+
+
+def _evaluate_lstm(dataset, test_start, test_end, window, profile):
+    from lstm_model import train_lstm
+    from windowing import make_windows
+
+    price, dates = dataset['price'], dataset['dates']
+    train_end, stop = np.searchsorted(dates, [test_start, test_end])
+    model, scaler, _ = train_lstm(price[:train_end].reshape(-1, 1), window, train_fraction=1.0, profile=profile)
+
+    scaled = scaler.transform(price[train_end - window:stop].reshape(-1, 1))
+    x_test, _ = make_windows(scaled, window)
+    predictions = scaler.inverse_transform(model.predict(x_test, verbose=0))[:, 0]
+    metrics = _metrics(predictions, price[train_end:stop], price[train_end - 1:stop - 1])
+    return dict(metrics, n_train=int(train_end - window), n_test=int(stop - train_end))
+
+
+def _evaluate_tabular(model_name, dataset, test_start, test_end):
+    target_dates = dataset['target_dates']
+    train = target_dates < test_start
+    test = (target_dates >= test_start) & (target_dates < test_end)
+    X, y, prev = dataset['X'], dataset['y'], dataset['prev']
+
+    if model_name == 'gbr':
+        from sklearn.ensemble import GradientBoostingRegressor
+
+        # Standardize with training statistics only
+        mean, scale = X[train].mean(axis=0), X[train].std(axis=0)
+        scale[scale == 0] = 1.
+        model = GradientBoostingRegressor(random_state=42).fit((X[train] - mean) / scale, y[train])
+        predictions = model.predict((X[test] - mean) / scale)
+        metrics = _metrics(predictions, y[test], prev[test])
+    else:
+        from stock_Price_Prediction import KNNClassifier
+
+        up = y > prev
+        predicted_up = KNNClassifier(5).fit(X[train], up[train]).predict(X[test])
+        metrics = {'direction_accuracy': float(np.mean(predicted_up == up[test])), 'rmse': np.nan, 'mae': np.nan}
+    return dict(metrics, n_train=int(train.sum()), n_test=int(test.sum()))
+
+
+def run_fold(path, ticker, model_name, fold, test_start, test_end, window=60, profile='fast'):
+    """
+    Fit one model on one fold and score it (runs inside a worker process).
+
+    Returns:
+    - dict: One row of the result table.
+    """
+    started = time.perf_counter()
+    dataset = load_dataset(path)
+    if model_name == 'lstm':
+        metrics = _evaluate_lstm(dataset, test_start, test_end, window, profile)
+    else:
+        metrics = _evaluate_tabular(model_name, dataset, test_start, test_end)
+    return dict({'ticker': ticker, 'model': model_name, 'fold': fold,
+                 'test_start': pd.Timestamp(test_start).date(), 'test_end': pd.Timestamp(test_end).date()},
+                **metrics, fit_seconds=round(time.perf_counter() - started, 3))
+
+
+def walk_forward(tickers, models=MODELS, start='2010-01-01', end=None, n_folds=5, test_size=None, min_train=504,
+                 window=60, profile='fast', workers=None, threads_per_worker=1,
+                 store_dir=DEFAULT_STORE_DIR, cache_dir=DEFAULT_CACHE_DIR):
+    """
+    Run the walk-forward evaluation of `models` over `tickers`.
+
+    Fold boundaries are taken from each ticker's price history, so every model is scored on
+    exactly the same test dates.
+
+    Returns:
+    - DataFrame: One row per (ticker, model, fold) with the metrics and fit time.
+    """
+    from train_models import _init_worker
+
+    end = end or str(date.today())
+    paths = cache_datasets(tickers, models, start, end, window, store_dir, cache_dir)
+
+    tasks = []
+    for ticker in tickers:
+        if (ticker, models[0]) not in paths:
+            continue
+        dates = load_dataset(paths[(ticker, models[0])])['dates']
+        for fold, (train_end, test_end) in enumerate(expanding_folds(len(dates), n_folds, test_size, min_train)):
+            test_start_ns = int(dates[train_end])
+            test_end_ns = int(dates[test_end]) if test_end < len(dates) else int(dates[-1]) + 1
+            for model_name in models:
+                tasks.append((paths[(ticker, model_name)], ticker, model_name, fold, test_start_ns, test_end_ns,
+                              window, profile))
+
+    rows = []
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=_init_worker, initargs=(threads_per_worker,)) as pool:
+        futures = {pool.submit(run_fold, *task): task for task in tasks}
+        for future in as_completed(futures):
+            _, ticker, model_name, fold = futures[future][:4]
+            try:
+                rows.append(future.result())
+            except Exception as e:
+                rows.append({'ticker': ticker, 'model': model_name, 'fold': fold, 'error': repr(e)})
+
+    columns = ['ticker', 'model', 'fold', 'test_start', 'test_end', 'n_train', 'n_test',
+               'direction_accuracy', 'rmse', 'mae', 'fit_seconds', 'error']
+    return pd.DataFrame(rows).reindex(columns=columns).sort_values(['ticker', 'model', 'fold'], ignore_index=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Walk-forward evaluation of the price models.")
+    parser.add_argument('tickers', nargs='*', help="Ticker symbols, e.g. AAPL META")
+    parser.add_argument('--tickers-file', help="Text file with one ticker per line")
+    parser.add_argument('--models', nargs='+', default=MODELS, choices=MODELS)
+    parser.add_argument('--start', default='2010-01-01')
+    parser.add_argument('--end', default=str(date.today()), help="End of the history (exclusive)")
+    parser.add_argument('--folds', type=int, default=5)
+    parser.add_argument('--test-size', type=int, default=None, help="Trading days per test block")
+    parser.add_argument('--min-train', type=int, default=504, help="Minimum trading days before the first test block")
+    parser.add_argument('--window', type=int, default=60, help="LSTM window")
+    parser.add_argument('--profile', default='fast', choices=sorted(TRAINING_PROFILES), help="LSTM training profile")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--threads-per-worker', type=int, default=1)
+    parser.add_argument('--store-dir', default=DEFAULT_STORE_DIR)
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR)
+    parser.add_argument('--output', default=f"walk_forward_{time.strftime('%Y%m%dT%H%M%S')}.csv")
+    args = parser.parse_args()
+
+    tickers = [ticker.upper() for ticker in args.tickers]
+    if args.tickers_file:
+        with open(args.tickers_file) as f:
+            tickers += [line.strip().upper() for line in f if line.strip() and not line.startswith('#')]
+    tickers = list(dict.fromkeys(tickers))
+    if not tickers:
+        parser.error("no tickers given")
+
+    results = walk_forward(tickers, args.models, args.start, args.end, args.folds, args.test_size, args.min_train,
+                           args.window, args.profile, args.workers, args.threads_per_worker,
+                           args.store_dir, args.cache_dir)
+    results.to_csv(args.output, index=False)
+    print(results.groupby('model')[['direction_accuracy', 'rmse', 'mae', 'fit_seconds']].mean().to_string())
+    print(f"Per-fold results written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+# windowing.py
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+
+def make_windows(values, window=60, horizon=1, target_col=0):
+    """
+    Build sliding-window model inputs and targets as zero-copy strided views.
+
+    Sample i uses rows [i, i + window) as input and the following `horizon` rows of
+    `target_col` as target, which is what the `for i in range(60, len(...))` loops in the
+    app and notebooks produced, without copying every window into a Python list.
+
+    Parameters:
+    - values: numpy array of shape (n,) or (n, n_features).
+    - window: Number of past rows per sample.
+    - horizon: Number of future rows per target. With horizon=0 every window (including
+      the one ending at the last row) is returned and there is no target.
+    - target_col: Feature column used as target.
+
+    Returns:
+    - tuple: (x, y) with x of shape (n_samples, window, n_features) and y of shape
+      (n_samples,) for horizon 1, (n_samples, horizon) otherwise, or None for horizon 0.
+      Both are read-only views into `values`.
+    """
+    values = np.asarray(values)
+    if values.ndim == 1:
+        values = values[:, None]
+    n_features = values.shape[1]
+
+    n_samples = len(values) - window - horizon + 1
+    if n_samples <= 0:
+        x = np.empty((0, window, n_features), dtype=values.dtype)
+        y = None if horizon == 0 else np.empty((0,) if horizon == 1 else (0, horizon), dtype=values.dtype)
+        return x, y
+
+    # (n - window + 1, n_features, window) -> (n_samples, window, n_features), still a view
+    x = sliding_window_view(values, window, axis=0)[:n_samples].transpose(0, 2, 1)
+    if horizon == 0:
+        return x, None
+
+    y = sliding_window_view(values[window:, target_col], horizon)[:n_samples]
+    if horizon == 1:
+        y = y[:, 0]
+    return x, y
+
+
+def make_windows_multi(series_list, window=60, horizon=1, target_col=0, stack=True):
+    """
+    Build windows for many tickers at once.
+
+    Parameters:
+    - series_list: List of arrays, one per ticker, each (n_i,) or (n_i, n_features).
+    - window, horizon, target_col: As in make_windows.
+    - stack: If True, concatenate all tickers into one training set (a single copy);
+      otherwise return the per-ticker views.
+
+    Returns:
+    - tuple: (x, y, ticker_ids). ticker_ids holds the position in `series_list` of each sample.
+      With stack=False, x and y are lists of per-ticker views.
+    """
+    parts = [make_windows(values, window, horizon, target_col) for values in series_list]
+    ticker_ids = np.concatenate([np.full(len(x), i, dtype='int32') for i, (x, _) in enumerate(parts)]) if parts else np.empty(0, dtype='int32')
+    xs = [x for x, _ in parts]
+    ys = [y for _, y in parts]
+    if not stack:
+        return xs, ys, ticker_ids
+
+    x = np.concatenate(xs) if xs else np.empty((0, window, 1))
+    y = None if horizon == 0 or not ys else np.concatenate(ys)
+    return x, y, ticker_ids